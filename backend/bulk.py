@@ -0,0 +1,111 @@
+"""
+Bulk create/upsert shared by the reference data routers
+Routers validate a whole request up front (references are checked with one query per
+referenced table) and pass the per-item errors here. The remaining items are written
+with INSERT ... ON CONFLICT ... RETURNING, BULK_BATCH_SIZE rows per statement, all in
+one transaction. RETURNING tells inserted rows (xmax = 0) from updated ones; in create
+mode conflicting rows are left alone and reported as existing.
+"""
+import uuid
+from typing import Any, Dict, Iterable, List, Set
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from schemas import BulkItemStatus, BulkMode
+
+BULK_MAX_ITEMS = 5000
+BULK_BATCH_SIZE = 1000
+
+def missing_ids(db: Session, model, ids: Iterable[uuid.UUID], *criteria) -> Set[uuid.UUID]:
+    """Those of ids without a matching row, in one query"""
+    ids = set(ids)
+    if not ids:
+        return set()
+    found = {row[0] for row in db.query(model.id).filter(model.id.in_(ids), *criteria).all()}
+    return ids - found
+
+def bulk_write(
+    db: Session,
+    model,
+    items: List[BaseModel],
+    mode: BulkMode,
+    errors: Dict[int, str],
+    key: str = "id"
+) -> Dict[str, Any]:
+    """
+    Write the items without an entry in errors and commit
+    Upserts match on the key column, which needs a unique index; items repeating an
+    earlier item's key are reported as errors
+    """
+    table = model.__table__
+    key_column = table.c[key]
+    results: List[Dict[str, Any]] = [None] * len(items)
+    rows = []
+    index_by_key: Dict[Any, int] = {}
+    for index, item in enumerate(items):
+        if index in errors:
+            results[index] = {"index": index, "id": item.id, "status": BulkItemStatus.ERROR, "detail": errors[index]}
+            continue
+        values = item.model_dump()
+        if values["id"] is None:
+            values["id"] = uuid.uuid4()
+        if values[key] in index_by_key:
+            results[index] = {
+                "index": index,
+                "id": item.id,
+                "status": BulkItemStatus.ERROR,
+                "detail": f"Same {key} as item {index_by_key[values[key]]}"
+            }
+            continue
+        index_by_key[values[key]] = index
+        rows.append(values)
+    
+    written = {}
+    try:
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            stmt = insert(table).values(rows[start:start + BULK_BATCH_SIZE])
+            if mode == BulkMode.UPSERT:
+                updates = {column: stmt.excluded[column] for column in rows[0] if column not in ("id", key)}
+                updates["updated_at"] = func.now()
+                stmt = stmt.on_conflict_do_update(index_elements=[key_column], set_=updates)
+            else:
+                stmt = stmt.on_conflict_do_nothing()
+            stmt = stmt.returning(table.c.id, key_column.label("bulk_key"), literal_column("xmax = 0").label("inserted"))
+            for row in db.execute(stmt):
+                written[row.bulk_key] = row
+    except IntegrityError as e:
+        # Constraints the validation pass does not cover (e.g. an id taken by another region's name)
+        db.rollback()
+        diag = getattr(e.orig, "diag", None)
+        raise HTTPException(status_code=400, detail=f"Bulk write rejected: {getattr(diag, 'message_primary', None) or 'constraint violation'}")
+    
+    # Rows skipped by ON CONFLICT DO NOTHING are reported with the id they already have
+    skipped = [k for k in index_by_key if k not in written]
+    existing_ids = {}
+    if skipped:
+        existing_ids = dict(db.query(key_column, table.c.id).filter(key_column.in_(skipped)).all())
+    db.commit()
+    
+    for k, index in index_by_key.items():
+        row = written.get(k)
+        if row is None:
+            results[index] = {"index": index, "id": existing_ids.get(k), "status": BulkItemStatus.EXISTS}
+        else:
+            status = BulkItemStatus.CREATED if row.inserted else BulkItemStatus.UPDATED
+            results[index] = {"index": index, "id": row.id, "status": status}
+    
+    counts = {status: 0 for status in BulkItemStatus}
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "created": counts[BulkItemStatus.CREATED],
+        "updated": counts[BulkItemStatus.UPDATED],
+        "existing": counts[BulkItemStatus.EXISTS],
+        "errors": counts[BulkItemStatus.ERROR],
+        "items": results
+    }
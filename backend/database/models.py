@@ -1,11 +1,13 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, Enum, DECIMAL, ForeignKey, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, BigInteger, Date, DateTime, Text, Boolean, Enum, DECIMAL, Float, LargeBinary, ForeignKey, CheckConstraint, UniqueConstraint, Index, Identity, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 import uuid
 
+from money import ZERO
+
 Base = declarative_base()
 
 # Enum definitions
@@ -22,6 +24,7 @@ class AttendanceStatus(str, enum.Enum):
     PENDING = "Pending"
     VERIFIED = "Verified"
     REJECTED = "Rejected"
+    WAITLISTED = "Waitlisted"
 
 class CreditStatus(str, enum.Enum):
     AVAILABLE = "Available"
@@ -32,6 +35,19 @@ class AllocationKind(str, enum.Enum):
     MANDATORY_50 = "MANDATORY_50"
     FREE_CHOICE_50 = "FREE_CHOICE_50"
 
+class BrandEventType(str, enum.Enum):
+    IMPRESSION = "Impression"
+    CLICK = "Click"
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "Pending"
+    PROCESSED = "Processed"
+    FAILED = "Failed"
+
+class IdempotencyStatus(str, enum.Enum):
+    IN_PROGRESS = "InProgress"
+    COMPLETED = "Completed"
+
 # Models
 class Region(Base):
     __tablename__ = "regions"
@@ -95,9 +111,11 @@ class Profile(Base):
     __tablename__ = "profiles"
     
     volunteer_id = Column(UUID(as_uuid=True), ForeignKey("volunteers.id", ondelete="CASCADE"), primary_key=True)
-    total_hours = Column(DECIMAL(10,2), default=0.00)
-    total_credits_earned = Column(DECIMAL(10,2), default=0.00)
-    total_credits_allocated = Column(DECIMAL(10,2), default=0.00)
+    total_hours = Column(DECIMAL(10,2), default=ZERO)
+    total_credits_earned = Column(DECIMAL(10,2), default=ZERO)
+    total_credits_allocated = Column(DECIMAL(10,2), default=ZERO)
+    # Maintained by statement triggers on notifications; read-only from the API
+    unread_notifications = Column(Integer, nullable=False, default=0, server_default="0")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
@@ -130,7 +148,10 @@ class Activity(Base):
     starts_at = Column(DateTime(timezone=True), nullable=False)
     ends_at = Column(DateTime(timezone=True), nullable=False)
     location = Column(String(255))
+    latitude = Column(Float)
+    longitude = Column(Float)
     capacity = Column(Integer, CheckConstraint('capacity > 0'))
+    registered_count = Column(Integer, nullable=False, default=0, server_default="0")
     status = Column(Enum(ActivityStatus, values_callable=lambda obj: [e.value for e in obj]), default=ActivityStatus.SCHEDULED)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -138,11 +159,30 @@ class Activity(Base):
     # Relationships
     project = relationship("Project", back_populates="activities")
     attendances = relationship("Attendance", back_populates="activity")
+    stats = relationship("ActivityStats", uselist=False, viewonly=True)
     
     __table_args__ = (
         CheckConstraint('ends_at > starts_at', name='valid_activity_duration'),
+        CheckConstraint('capacity IS NULL OR registered_count <= capacity', name='activity_not_oversubscribed'),
+        CheckConstraint('(latitude IS NULL) = (longitude IS NULL)', name='activity_coordinates_paired'),
+        CheckConstraint('latitude BETWEEN -90 AND 90 AND longitude BETWEEN -180 AND 180', name='activity_coordinates_range'),
     )
 
+class ActivityStats(Base):
+    __tablename__ = "activity_stats"
+    
+    # Maintained by database triggers on attendances and volo_credits; read-only from the API
+    activity_id = Column(UUID(as_uuid=True), ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True)
+    registered_count = Column(Integer, nullable=False, default=0)
+    waitlisted_count = Column(Integer, nullable=False, default=0)
+    checked_in_count = Column(Integer, nullable=False, default=0)
+    verified_count = Column(Integer, nullable=False, default=0)
+    credits_minted = Column(DECIMAL(12, 2), nullable=False, default=ZERO)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    activity = relationship("Activity", viewonly=True)
+
 class Attendance(Base):
     __tablename__ = "attendances"
     
@@ -191,11 +231,30 @@ class BrandMessage(Base):
     image_url = Column(String(500))
     active_from = Column(DateTime(timezone=True), server_default=func.now())
     active_to = Column(DateTime(timezone=True))
+    weight = Column(Integer, nullable=False, default=1, server_default="1")
+    impression_count = Column(BigInteger, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     company = relationship("Company", back_populates="brand_messages")
+    
+    __table_args__ = (
+        CheckConstraint('weight > 0', name='brand_message_weight_positive'),
+        CheckConstraint('active_to IS NULL OR active_from IS NULL OR active_to > active_from', name='valid_brand_message_window'),
+    )
+
+class BrandImpression(Base):
+    __tablename__ = "brand_impressions"
+    
+    # Hourly counters written in batches by the API's impression buffer
+    brand_message_id = Column(UUID(as_uuid=True), primary_key=True)
+    event_type = Column(Enum(BrandEventType, values_callable=lambda obj: [e.value for e in obj]), primary_key=True)
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    company_id = Column(UUID(as_uuid=True), nullable=False)
+    event_count = Column(BigInteger, nullable=False, default=0)
+    
+    __table_args__ = {'postgresql_partition_by': 'RANGE (hour)'}
 
 class Allocation(Base):
     __tablename__ = "allocations"
@@ -216,6 +275,23 @@ class Allocation(Base):
     source_credit = relationship("VoloCredit", back_populates="allocations")
     credit_exchanges = relationship("CreditExchange", back_populates="allocation")
 
+class ProjectAllocationDaily(Base):
+    __tablename__ = "project_allocation_daily"
+    
+    # Rollup maintained by database triggers on allocations; read-only from the API
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    region_id = Column(UUID(as_uuid=True), ForeignKey("regions.id"), nullable=False)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"))
+    kind = Column(Enum(AllocationKind, values_callable=lambda obj: [e.value for e in obj]), nullable=False)
+    day = Column(Date, nullable=False)
+    allocation_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(DECIMAL(14, 2), nullable=False, default=ZERO)
+    
+    __table_args__ = (
+        UniqueConstraint('project_id', 'region_id', 'company_id', 'kind', 'day', name='project_allocation_daily_key', postgresql_nulls_not_distinct=True),
+    )
+
 class CreditExchange(Base):
     __tablename__ = "credit_exchanges"
     
@@ -236,7 +312,7 @@ class CompanyPartnership(Base):
     organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
     partnership_type = Column(String(50), nullable=False, default="FUNDING")
     budget_committed = Column(DECIMAL(12, 2))
-    budget_allocated = Column(DECIMAL(12, 2), default=0.00)
+    budget_allocated = Column(DECIMAL(12, 2), default=ZERO)
     active_from = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     active_to = Column(DateTime(timezone=True))
     description = Column(Text)
@@ -260,7 +336,7 @@ class ProjectCompanyFunding(Base):
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id"), nullable=False)
     max_budget = Column(DECIMAL(12, 2), nullable=False)
-    allocated_budget = Column(DECIMAL(12, 2), default=0.00)
+    allocated_budget = Column(DECIMAL(12, 2), default=ZERO)
     status = Column(String(20), default="ACTIVE")
     approved_at = Column(DateTime(timezone=True), server_default=func.now())
     approved_by = Column(String(100))
@@ -286,19 +362,72 @@ class LedgerEntry(Base):
     ref_id = Column(UUID(as_uuid=True), nullable=False)
     hash = Column(String(64), nullable=False)
     prev_hash = Column(String(64))
+    seq = Column(BigInteger, Identity(always=True), unique=True, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = Column(String(100), nullable=False)
+    aggregate_type = Column(String(50), nullable=False)
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    idempotency_key = Column(String(200), unique=True)
+    status = Column(Enum(OutboxStatus, values_callable=lambda obj: [e.value for e in obj]), nullable=False, default=OutboxStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index('idx_outbox_events_pending', 'available_at', postgresql_where=text("status = 'Pending'")),
+    )
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    idempotency_key = Column(String(255), nullable=False)
+    method = Column(String(10), nullable=False)
+    path = Column(String(500), nullable=False)
+    query_string = Column(String(1000), nullable=False, server_default="")
+    request_hash = Column(String(64), nullable=False)
+    status = Column(Enum(IdempotencyStatus, values_callable=lambda obj: [e.value for e in obj]), nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    response_status = Column(Integer)
+    response_content_type = Column(String(100))
+    response_body = Column(LargeBinary)
+    locked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('idempotency_key', 'method', 'path', 'query_string', name='idempotency_keys_scope'),
+    )
+
+class OutboxHandlerRun(Base):
+    __tablename__ = "outbox_handler_runs"
+    
+    event_id = Column(UUID(as_uuid=True), ForeignKey("outbox_events.id", ondelete="CASCADE"), primary_key=True)
+    handler = Column(String(100), primary_key=True)
+    completed_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     volunteer_id = Column(UUID(as_uuid=True), ForeignKey("volunteers.id"), nullable=False)
     message = Column(Text, nullable=False)
-    read = Column(Boolean, default=False)
+    read = Column(Boolean, nullable=False, default=False, server_default="false")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     volunteer = relationship("Volunteer", back_populates="notifications")
+    
+    __table_args__ = (
+        Index('idx_notifications_unread', 'volunteer_id', 'created_at', postgresql_where=text('read = false')),
+    )
 
 # Add table constraints that couldn't be added inline
 VoloCredit.__table_args__ = (
@@ -1,22 +1,113 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from database.connection import get_db
-from routers import volunteers, activities, organizations, projects, attendances, allocations, regions, companies, partnerships, project_fundings
+from routers import volunteers, activities, organizations, projects, attendances, allocations, regions, companies, partnerships, project_fundings, company_analytics, brand_messages, notifications, live, search, debug
 from database.models import Base
 from database.connection import engine
+from services.brand_messages import reload_index, run_index_refresher, run_impression_flusher, impression_buffer
+from services.live_updates import live_broker
+from services.outbox import run_outbox_worker
+from services import outbox_handlers  # noqa: F401  (registers the outbox handlers)
+from services.idempotency import run_idempotency_purger
+from middleware.idempotency import IdempotencyMiddleware
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.sql_timing import SQLTimingMiddleware
+from services.sql_instrumentation import instrument
+from services.metrics import instrument_pool, render_metrics, mark_worker_dead
+from middleware.metrics import MetricsMiddleware
+from services.tracing import TRACING_ENABLED, exporter as span_exporter, instrument as instrument_tracing
+from middleware.tracing import TracingMiddleware
+from services.profiling import PROFILING_ENABLED, PROFILE_OUTPUT_DIR, PROFILE_TOKEN, profiler
+from middleware.profiling import ProfilingMiddleware
 import uvicorn
 
+logger = logging.getLogger(__name__)
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Per-request statement counts and timings for SQLTimingMiddleware
+instrument(engine)
+# Connection pool gauges for /metrics
+instrument_pool(engine)
+# SQL spans (only when TRACING_ENABLED=true)
+instrument_tracing(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the brand message index; the refresher retries if the database isn't up yet
+    try:
+        await asyncio.to_thread(reload_index)
+    except Exception:
+        logger.exception("Initial brand message index load failed")
+    
+    if TRACING_ENABLED:
+        span_exporter.start()
+    
+    tasks = [
+        asyncio.create_task(run_index_refresher()),
+        asyncio.create_task(run_impression_flusher()),
+        asyncio.create_task(live_broker.run()),
+        asyncio.create_task(run_idempotency_purger())
+    ]
+    # Dedicated worker processes (outbox_worker.py) can take over by setting OUTBOX_WORKER_ENABLED=false
+    if os.getenv("OUTBOX_WORKER_ENABLED", "true").lower() == "true":
+        tasks.append(asyncio.create_task(run_outbox_worker()))
+    yield
+    for task in tasks:
+        task.cancel()
+    # Wake the flusher's waiting thread so shutdown doesn't sit out the interval
+    impression_buffer.request_flush()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Don't lose impressions counted since the last flush
+    try:
+        await asyncio.to_thread(impression_buffer.flush)
+    except Exception:
+        logger.exception("Final brand impression flush failed, %d buffered keys lost", impression_buffer.pending())
+    
+    if TRACING_ENABLED:
+        span_exporter.stop()
+    if PROFILING_ENABLED:
+        profiler.dump(PROFILE_OUTPUT_DIR)
+    mark_worker_dead()
+
 app = FastAPI(
     title="Volo API",
     description="API for the Volo volunteer credit allocation system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Add CORS middleware
+# Server-Timing and X-DB-Query-Count on every response, slow request and N+1 logging
+app.add_middleware(SQLTimingMiddleware)
+
+# Replays responses for retried mutating requests that carry an Idempotency-Key. Must stay
+# inside CORS: replays and its own 400/409/422 are sent without reaching the app
+app.add_middleware(IdempotencyMiddleware)
+
+# Token buckets per API client and volunteer; added last so it runs first and rejects before any database work
+app.add_middleware(RateLimitMiddleware)
+
+# Stack sampling or allocation tracing for requests that ask for it; not installed while profiling is off
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, router=app.router)
+
+# Root span per sampled request; not installed at all while tracing is off
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Outside everything but CORS, so latency histograms include throttled requests and time spent in the other middleware
+app.add_middleware(MetricsMiddleware, router=app.router)
+
+# Add CORS middleware last so it is outermost: responses the middleware above sends on its
+# own (429s with Retry-After) carry CORS headers, and preflights are answered before any
+# rate limit token is spent
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, replace with specific origins
@@ -36,6 +127,14 @@ app.include_router(regions.router, prefix="/api/v1/regions", tags=["regions"])
 app.include_router(companies.router, prefix="/api/v1/companies", tags=["companies"])
 app.include_router(partnerships.router, prefix="/api/v1/partnerships", tags=["partnerships"])
 app.include_router(project_fundings.router, prefix="/api/v1/project-fundings", tags=["project-fundings"])
+app.include_router(company_analytics.router, prefix="/api/v1/company-analytics", tags=["company-analytics"])
+app.include_router(brand_messages.router, prefix="/api/v1/brand-messages", tags=["brand-messages"])
+app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
+app.include_router(live.router, prefix="/api/v1/live", tags=["live"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
+# The debug routes write files and reset profiles, so they are never served without a token
+if PROFILING_ENABLED and PROFILE_TOKEN:
+    app.include_router(debug.router, prefix="/debug", tags=["debug"], include_in_schema=False)
 
 @app.get("/")
 async def root():
@@ -51,5 +150,11 @@ async def health_check(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus exposition, aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Helpers shared by the pure ASGI middleware
+"""
+import json
+
+from starlette.routing import Match
+
+async def send_response(send, status_code: int, body: bytes, content_type: str = "application/json", headers=None):
+    raw_headers = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+    raw_headers.extend(headers or [])
+    await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+async def send_error(send, status_code: int, detail: str, headers=None):
+    await send_response(send, status_code, json.dumps({"detail": detail}).encode(), headers=headers)
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+def replay_receive(body: bytes, receive):
+    """A receive callable that hands an already consumed body to the app once, then passes through (disconnects)"""
+    body_sent = False
+    
+    async def receive_again():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    
+    return receive_again
+
+def header(scope, name: bytes):
+    return next((value for key, value in scope["headers"] if key == name), None)
+
+def match_route(routes, scope):
+    """The route serving a request, or one with the right path but wrong method (the app answers 405)"""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    return partial
@@ -0,0 +1,87 @@
+"""
+Idempotency-Key middleware
+A POST/PUT/PATCH/DELETE carrying an Idempotency-Key header runs once; retries with the
+same key, query string and body get the stored response back (marked Idempotent-Replayed: true)
+without touching the handler. A duplicate that arrives while the first request is
+still running gets 409, a key reused with a different body gets 422. Failed requests
+(5xx or an exception) release the key so they can be retried.
+Install it inside CORSMiddleware so browsers can read replayed and rejected responses.
+"""
+import asyncio
+import hashlib
+
+from middleware.asgi import send_response, send_error, read_body, replay_receive, header
+from services.idempotency import (
+    IdempotencyStore, idempotency_store, REPLAY, IN_PROGRESS, MISMATCH
+)
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# Matches idempotency_keys.query_string; the query string is part of the key's scope
+MAX_QUERY_STRING_LENGTH = 1000
+
+class IdempotencyMiddleware:
+    def __init__(self, app, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            return await self.app(scope, receive, send)
+        
+        key = header(scope, HEADER)
+        if key is None:
+            return await self.app(scope, receive, send)
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await send_error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+        
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        if len(query_string) > MAX_QUERY_STRING_LENGTH:
+            return await send_error(send, 400, f"Query string is limited to {MAX_QUERY_STRING_LENGTH} characters on requests with an Idempotency-Key")
+        
+        body = await read_body(receive)
+        request_hash = hashlib.sha256(body).hexdigest()
+        key_scope = (key, scope["method"], scope["path"], query_string)
+        
+        outcome, stored = await asyncio.to_thread(self.store.claim, key_scope, request_hash)
+        if outcome == REPLAY:
+            return await send_response(
+                send, stored.status_code, stored.body, stored.content_type or "application/json",
+                headers=[(b"idempotent-replayed", b"true")]
+            )
+        if outcome == MISMATCH:
+            return await send_error(send, 422, "Idempotency-Key was already used with a different request body")
+        if outcome == IN_PROGRESS:
+            return await send_error(
+                send, 409, "A request with this Idempotency-Key is still being processed",
+                headers=[(b"retry-after", b"1")]
+            )
+        
+        response = {"status": None, "content_type": None, "chunks": []}
+        
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = next(
+                    (value.decode("latin-1") for name, value in message.get("headers", []) if name == b"content-type"),
+                    None
+                )
+            elif message["type"] == "http.response.body":
+                response["chunks"].append(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, replay_receive(body, receive), capture_send)
+        except Exception:
+            await asyncio.to_thread(self.store.release, key_scope)
+            raise
+        
+        if response["status"] is None or response["status"] >= 500:
+            await asyncio.to_thread(self.store.release, key_scope)
+        else:
+            await asyncio.to_thread(
+                self.store.complete, key_scope, request_hash,
+                response["status"], response["content_type"], b"".join(response["chunks"])
+            )
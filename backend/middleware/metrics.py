@@ -0,0 +1,39 @@
+"""
+Request metrics middleware
+Labels requests with their route template (/api/v1/volunteers/{volunteer_id}, not the raw
+path) so series stay bounded; paths that match no route are labelled "unmatched".
+"""
+import time
+
+from middleware.asgi import match_route
+from services.metrics import REQUEST_DURATION, REQUESTS_IN_PROGRESS
+
+UNMATCHED = "unmatched"
+
+class MetricsMiddleware:
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        method = scope["method"]
+        matched = match_route(self.router.routes, scope)
+        route = matched.path if matched else UNMATCHED
+        status = {"code": 500}
+        
+        async def status_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            in_progress.dec()
+            REQUEST_DURATION.labels(method, route, str(status["code"])).observe(time.perf_counter() - started)
@@ -0,0 +1,71 @@
+"""
+Profiling middleware
+Opens a profiling session for requests that ask for one (X-Profile: cpu|alloc) or are picked
+at PROFILE_SAMPLE_RATE, and marks their responses with X-Profile. Only installed when
+PROFILING_ENABLED=true. The header is only honoured with PROFILE_TOKEN set and a matching
+X-Profile-Token, so anonymous clients can't switch on process-wide tracing.
+"""
+import hmac
+import random
+
+from middleware.asgi import header, match_route
+from services.profiling import MODES, PROFILE_MODE, PROFILE_SAMPLE_RATE, PROFILE_TOKEN, profiler
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+# Never profile the profiler's own endpoints or the scrape
+EXEMPT_PREFIXES = ("/debug/", "/metrics")
+
+class ProfilingMiddleware:
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+        self._indexed = False
+    
+    def _requested_mode(self, scope):
+        requested = header(scope, PROFILE_HEADER)
+        if requested is not None:
+            mode = requested.decode("latin-1").lower()
+            if mode not in MODES or not PROFILE_TOKEN:
+                return None
+            token = header(scope, PROFILE_TOKEN_HEADER) or b""
+            if not hmac.compare_digest(token, PROFILE_TOKEN.encode()):
+                return None
+            return mode
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return PROFILE_MODE
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            return await self.app(scope, receive, send)
+        
+        mode = self._requested_mode(scope)
+        if mode is None:
+            return await self.app(scope, receive, send)
+        
+        if not self._indexed:
+            # Routers are all included by the time the first request arrives
+            profiler.endpoint_codes = frozenset(
+                route.endpoint.__code__ for route in self.router.routes if hasattr(getattr(route, "endpoint", None), "__code__")
+            )
+            self._indexed = True
+        
+        route = match_route(self.router.routes, scope)
+        session = profiler.begin(
+            mode,
+            route.path if route else "unmatched",
+            getattr(getattr(route, "endpoint", None), "__code__", None)
+        )
+        if session is None:
+            return await self.app(scope, receive, send)
+        
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_HEADER, mode.encode())]}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            profiler.end(session)
@@ -0,0 +1,112 @@
+"""
+Rate limiting middleware
+Every API request costs tokens from its client's bucket (an X-API-Key listed in
+RATE_LIMIT_API_KEYS, else the peer address) and, when the route names a volunteer, from that volunteer's bucket too. Expensive routes
+cost more. A request that can't pay gets 429 with Retry-After and never reaches a
+database connection.
+"""
+import asyncio
+import json
+import os
+import re
+from typing import NamedTuple, Optional
+
+from middleware.asgi import send_error, read_body, replay_receive, header
+from services.rate_limit import Limit, create_store
+
+CLIENT_LIMIT = Limit(
+    burst=float(os.getenv("RATE_LIMIT_CLIENT_BURST", "120")),
+    rate=float(os.getenv("RATE_LIMIT_CLIENT_PER_SECOND", "20"))
+)
+VOLUNTEER_LIMIT = Limit(
+    burst=float(os.getenv("RATE_LIMIT_VOLUNTEER_BURST", "30")),
+    rate=float(os.getenv("RATE_LIMIT_VOLUNTEER_PER_SECOND", "2"))
+)
+API_KEY_HEADER = b"x-api-key"
+# Keys that get a bucket of their own; any other X-API-Key is ignored so a client can't
+# dodge its limit by sending a fresh key with every request
+API_KEYS = {key.strip() for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key.strip()}
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"}
+# Bodies are only parsed for the volunteer on these routes, and only up to this size
+MAX_PARSED_BODY_BYTES = 64 * 1024
+
+class RouteCost(NamedTuple):
+    method: str
+    pattern: "re.Pattern"
+    cost: float
+    volunteer_in_body: bool = False
+
+_UUID = r"[0-9a-fA-F-]{36}"
+
+# First match wins; everything else costs 1
+ROUTE_COSTS = [
+    RouteCost("POST", re.compile(r"^/api/v1/allocations/?$"), 5, volunteer_in_body=True),
+    RouteCost("POST", re.compile(rf"^/api/v1/attendances/{_UUID}/verify$"), 5),
+    RouteCost("POST", re.compile(r"^/api/v1/attendances/?$"), 2, volunteer_in_body=True),
+    RouteCost("GET", re.compile(rf"^/api/v1/volunteers/{_UUID}/dashboard$"), 3),
+    RouteCost("POST", re.compile(r"^/api/v1/notifications/fan-out$"), 20),
+]
+VOLUNTEER_PATH = re.compile(rf"^/api/v1/(?:volunteers|allocations/volunteer|notifications/volunteer)/({_UUID})")
+
+def _route_cost(method: str, path: str) -> Optional[RouteCost]:
+    for route in ROUTE_COSTS:
+        if route.method == method and route.pattern.match(path):
+            return route
+    return None
+
+def _volunteer_from_body(body: bytes) -> Optional[str]:
+    if not body or len(body) > MAX_PARSED_BODY_BYTES:
+        return None
+    try:
+        volunteer_id = json.loads(body).get("volunteer_id")
+    except (ValueError, AttributeError):
+        return None
+    return volunteer_id if isinstance(volunteer_id, str) else None
+
+def _client_key(scope) -> str:
+    api_key = header(scope, API_KEY_HEADER)
+    if api_key:
+        api_key = api_key.decode("latin-1")
+        if api_key in API_KEYS:
+            return "key:" + api_key
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+class RateLimitMiddleware:
+    def __init__(self, app, store=None, enabled: Optional[bool] = None):
+        self.app = app
+        self.store = store if store is not None else create_store()
+        if enabled is None:
+            enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+    
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+        
+        method, path = scope["method"], scope["path"]
+        route = _route_cost(method, path)
+        cost = route.cost if route else 1
+        
+        buckets = [("client:" + _client_key(scope), CLIENT_LIMIT)]
+        volunteer_id = None
+        match = VOLUNTEER_PATH.match(path)
+        if match:
+            volunteer_id = match.group(1)
+        elif route and route.volunteer_in_body:
+            body = await read_body(receive)
+            receive = replay_receive(body, receive)
+            volunteer_id = _volunteer_from_body(body)
+        if volunteer_id:
+            buckets.append(("volunteer:" + volunteer_id.lower(), VOLUNTEER_LIMIT))
+        
+        if self.store.blocking:
+            decision = await asyncio.to_thread(self.store.take, buckets, cost)
+        else:
+            decision = self.store.take(buckets, cost)
+        if not decision.allowed:
+            return await send_error(
+                send, 429, "Rate limit exceeded",
+                headers=[(b"retry-after", str(decision.retry_after).encode())]
+            )
+        await self.app(scope, receive, send)
@@ -0,0 +1,73 @@
+"""
+SQL timing middleware
+Adds Server-Timing (total DB time, slowest statement, whole request) and X-DB-Query-Count
+to every response, logs requests slower than SLOW_REQUEST_MS with their slowest statement,
+and warns when one statement repeats N_PLUS_ONE_THRESHOLD times in a request.
+"""
+import logging
+import os
+import time
+
+from services.sql_instrumentation import QueryStats, current_query_stats
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Long statements are cut down to this in log lines
+LOGGED_STATEMENT_CHARS = 300
+
+def _short(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= LOGGED_STATEMENT_CHARS else statement[:LOGGED_STATEMENT_CHARS] + "..."
+
+def server_timing(stats: QueryStats, elapsed_ms: float) -> bytes:
+    return (
+        f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+        f'db-slowest;dur={stats.slowest_ms:.1f}, '
+        f'app;dur={elapsed_ms:.1f}'
+    ).encode()
+
+class SQLTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        streaming = False
+        
+        async def timed_send(message):
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                # Sync endpoints have finished all their queries by the time headers go out
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, elapsed_ms)))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                message = {**message, "headers": headers}
+                streaming = any(name == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers)
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            current_query_stats.reset(token)
+            # Event streams stay open for minutes by design
+            if not streaming:
+                self._report(scope, stats, (time.perf_counter() - started) * 1000)
+    
+    def _report(self, scope, stats: QueryStats, elapsed_ms: float):
+        method, path = scope["method"], scope["path"]
+        if elapsed_ms >= SLOW_REQUEST_MS:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d queries in %.1f ms, slowest %.1f ms: %s",
+                method, path, elapsed_ms, stats.count, stats.total_ms, stats.slowest_ms,
+                _short(stats.slowest_statement or "-")
+            )
+        for statement, count in stats.repeated(N_PLUS_ONE_THRESHOLD):
+            logger.warning("Possible N+1 in %s %s: statement ran %d times: %s", method, path, count, _short(statement))
@@ -0,0 +1,43 @@
+"""
+Tracing middleware
+Opens the root span for each sampled request (joining an incoming W3C traceparent) and
+returns the trace ID in X-Trace-Id so a slow response can be found in the export.
+Only installed when TRACING_ENABLED=true.
+"""
+from middleware.asgi import header
+from services.tracing import current_span, start_request_span
+
+TRACEPARENT_HEADER = b"traceparent"
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        root = start_request_span(
+            f"{scope['method']} {scope['path']}",
+            header(scope, TRACEPARENT_HEADER),
+            {"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        if root is None:
+            return await self.app(scope, receive, send)
+        
+        async def traced_send(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", root.trace_id.encode())]}
+            await send(message)
+        
+        token = current_span.set(root)
+        try:
+            await self.app(scope, receive, traced_send)
+        except BaseException as e:
+            root.end(e)
+            raise
+        else:
+            root.end()
+        finally:
+            current_span.reset(token)
@@ -0,0 +1,50 @@
+"""
+Money helpers shared by schemas, models and routers
+Credits and budgets are stored as DECIMAL(x,2); keep them as quantized
+Decimals end to end so Python comparisons match what PostgreSQL stores.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Annotated, Any
+
+from pydantic import BeforeValidator
+from sqlalchemy import func
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+# 10 credits per verified hour
+CREDITS_PER_HOUR = Decimal("10")
+
+def _to_decimal(value: Any) -> Decimal:
+    if isinstance(value, float):
+        # Go through str() so 0.1 becomes Decimal('0.1'), not its binary expansion
+        value = str(value)
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Invalid money amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid money amount: {value!r}")
+    return amount
+
+def to_money(value: Any) -> Decimal:
+    """Quantize any numeric value to cents (half-up, like PostgreSQL's numeric rounding)"""
+    return _to_decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def parse_money(value: Any) -> Decimal:
+    """Like to_money, but refuse fractions of a cent instead of rounding them away"""
+    amount = _to_decimal(value)
+    money = amount.quantize(CENT, rounding=ROUND_HALF_UP)
+    if money != amount:
+        raise ValueError(f"Money amounts can't have more than 2 decimal places: {value!r}")
+    return money
+
+def money_sum(column):
+    """SQL SUM over a money column that yields 0.00 instead of NULL for no rows"""
+    return func.coalesce(func.sum(column), ZERO)
+
+def credits_for_hours(hours: Decimal) -> Decimal:
+    return to_money(hours * CREDITS_PER_HOUR)
+
+# Pydantic field type: accepts int/str/float/Decimal in whole cents, always yields cents
+Money = Annotated[Decimal, BeforeValidator(parse_money)]
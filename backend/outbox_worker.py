@@ -0,0 +1,26 @@
+"""
+Standalone outbox worker
+Drains outbox_events outside the API process. Run as many as needed; batches are
+claimed with SKIP LOCKED so workers never handle the same event concurrently.
+
+Usage:
+    python outbox_worker.py
+"""
+import asyncio
+import logging
+
+from services import outbox_handlers  # noqa: F401  (registers the outbox handlers)
+from services.outbox import run_outbox_worker, registered_handlers
+
+logger = logging.getLogger(__name__)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Outbox worker started with handlers %s", registered_handlers())
+    try:
+        asyncio.run(run_outbox_worker())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
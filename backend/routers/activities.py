@@ -1,14 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from sqlalchemy import func, text
+from sqlalchemy.exc import DataError
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 
 from database.connection import get_db
-from database.models import Activity as ActivityModel
-from schemas import Activity, ActivityCreate, ActivityUpdate, ActivitiesResponse
+from database.models import Activity as ActivityModel, Project as ProjectModel
+from schemas import (
+    Activity, ActivityCreate, ActivityUpdate, ActivitiesResponse, ActivitySummary, NearbyActivity,
+    ActivityCalendarBucket, CalendarInterval, ActivityBulkItem, BulkMode, BulkResult
+)
+from bulk import BULK_MAX_ITEMS, bulk_write, missing_ids
 
 router = APIRouter()
 
+CALENDAR_DEFAULT_DAYS = 90
+CALENDAR_MAX_DAYS = 366
+
+ACTIVITY_SUMMARY_SQL = """
+    SELECT activity_id, starts_at, ends_at, location, capacity, status,
+           project_name, organization_name, region_name,
+           registered_volunteers, verified_attendances, waitlisted_volunteers,
+           checked_in_volunteers, credits_minted
+    FROM activity_summary
+"""
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """A query datetime as aware UTC; values sent without an offset are taken to be UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
 @router.post("/", response_model=Activity)
 def create_activity(
     activity: ActivityCreate,
@@ -18,18 +44,51 @@ def create_activity(
     if activity.ends_at <= activity.starts_at:
         raise HTTPException(status_code=400, detail="End time must be after start time")
     
+    if (activity.latitude is None) != (activity.longitude is None):
+        raise HTTPException(status_code=400, detail="Latitude and longitude must be set together")
+    
     db_activity = ActivityModel(**activity.model_dump())
     db.add(db_activity)
     db.commit()
     db.refresh(db_activity)
     return db_activity
 
+@router.post("/bulk", response_model=BulkResult)
+def bulk_write_activities(
+    activities: List[ActivityBulkItem] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    mode: BulkMode = BulkMode.CREATE,
+    db: Session = Depends(get_db)
+):
+    """Create or upsert (by id) many activities in one transaction, with a status per item"""
+    missing_projects = missing_ids(db, ProjectModel, (a.project_id for a in activities))
+    # An upsert may not shrink capacity below the seats already taken
+    registered = {}
+    if mode == BulkMode.UPSERT:
+        ids = [a.id for a in activities if a.id is not None]
+        if ids:
+            registered = dict(db.query(ActivityModel.id, ActivityModel.registered_count).filter(ActivityModel.id.in_(ids)).all())
+    
+    errors = {}
+    for index, activity in enumerate(activities):
+        if activity.ends_at <= activity.starts_at:
+            errors[index] = "End time must be after start time"
+        elif (activity.latitude is None) != (activity.longitude is None):
+            errors[index] = "Latitude and longitude must be set together"
+        elif activity.project_id in missing_projects:
+            errors[index] = "Project not found"
+        elif activity.capacity is not None and activity.capacity < registered.get(activity.id, 0):
+            errors[index] = f"Capacity cannot be lower than the number of registered volunteers ({registered[activity.id]})"
+    
+    return bulk_write(db, ActivityModel, activities, mode, errors)
+
 @router.get("/", response_model=ActivitiesResponse)
 def read_activities(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     project_id: Optional[UUID] = None,
     status: Optional[str] = None,
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ):
     query = db.query(ActivityModel)
@@ -40,8 +99,18 @@ def read_activities(
     if status:
         query = query.filter(ActivityModel.status == status)
     
+    if starts_after:
+        query = query.filter(ActivityModel.starts_at >= starts_after)
+    
+    if starts_before:
+        query = query.filter(ActivityModel.starts_at < starts_before)
+    
     total = query.count()
-    activities = query.offset(skip).limit(limit).all()
+    # Each activity is serialized with its project (and the project's NGO and region); load them in the same query
+    activities = query.options(
+        joinedload(ActivityModel.project).joinedload(ProjectModel.ngo),
+        joinedload(ActivityModel.project).joinedload(ProjectModel.region)
+    ).offset(skip).limit(limit).all()
     
     return {
         "activities": activities,
@@ -50,6 +119,104 @@ def read_activities(
         "per_page": limit
     }
 
+@router.get("/calendar", response_model=List[ActivityCalendarBucket])
+def read_activity_calendar(
+    interval: CalendarInterval = CalendarInterval.WEEK,
+    region_id: Optional[UUID] = None,
+    project_id: Optional[UUID] = None,
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    time_zone: str = Query("UTC", max_length=64),
+    db: Session = Depends(get_db)
+):
+    """Activity counts per week or month by start time, for the next 90 days unless a window is given"""
+    starts_after = _as_utc(starts_after) or datetime.now(timezone.utc)
+    starts_before = _as_utc(starts_before) or starts_after + timedelta(days=CALENDAR_DEFAULT_DAYS)
+    if starts_before <= starts_after:
+        raise HTTPException(status_code=400, detail="starts_before must be after starts_after")
+    if starts_before - starts_after > timedelta(days=CALENDAR_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Calendar windows are limited to {CALENDAR_MAX_DAYS} days")
+    
+    # Buckets follow the caller's time zone, so a week starts on their Monday midnight
+    bucket = func.date_trunc(interval.value, ActivityModel.starts_at, time_zone).label("bucket_start")
+    query = db.query(
+        bucket,
+        func.count(ActivityModel.id).label("activities"),
+        func.count(ActivityModel.id).filter(ActivityModel.status == "Scheduled").label("scheduled"),
+        func.count(ActivityModel.id).filter(ActivityModel.status == "Cancelled").label("cancelled"),
+        func.sum(ActivityModel.capacity).label("capacity"),
+        func.coalesce(func.sum(ActivityModel.registered_count), 0).label("registered")
+    ).filter(
+        ActivityModel.starts_at >= starts_after,
+        ActivityModel.starts_at < starts_before
+    )
+    if project_id:
+        query = query.filter(ActivityModel.project_id == project_id)
+    if region_id:
+        query = query.join(ProjectModel, ProjectModel.id == ActivityModel.project_id).filter(ProjectModel.region_id == region_id)
+    
+    try:
+        rows = query.group_by(bucket).order_by(bucket).all()
+    except DataError:
+        # Postgres validates the zone name
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Unknown time zone")
+    return [row._mapping for row in rows]
+
+@router.get("/nearby", response_model=List[NearbyActivity])
+def read_nearby_activities(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=500),
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    status: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Activities within radius_km of a point, nearest first; upcoming ones unless starts_after is given"""
+    starts_after = _as_utc(starts_after) or datetime.now(timezone.utc)
+    starts_before = _as_utc(starts_before)
+    if starts_before is not None and starts_before <= starts_after:
+        raise HTTPException(status_code=400, detail="starts_before must be after starts_after")
+    
+    radius_m = radius_km * 1000
+    origin = func.ll_to_earth(latitude, longitude)
+    # Must match the idx_activities_earth_starts_at expression (and its latitude IS NOT NULL predicate)
+    position = func.ll_to_earth(ActivityModel.latitude, ActivityModel.longitude)
+    distance = func.earth_distance(origin, position)
+    
+    # earth_box is the indexable bounding cube; its corners reach past the radius, so distance trims them
+    query = db.query(ActivityModel, distance.label("distance_m")).filter(
+        ActivityModel.latitude.isnot(None),
+        func.earth_box(origin, radius_m).op("@>")(position),
+        distance <= radius_m,
+        ActivityModel.starts_at >= starts_after
+    )
+    if starts_before is not None:
+        query = query.filter(ActivityModel.starts_at < starts_before)
+    if status:
+        query = query.filter(ActivityModel.status == status)
+    
+    rows = query.options(
+        joinedload(ActivityModel.project).joinedload(ProjectModel.ngo),
+        joinedload(ActivityModel.project).joinedload(ProjectModel.region)
+    ).order_by(distance, ActivityModel.starts_at).limit(limit).all()
+    
+    return [{"activity": activity, "distance_m": round(distance_m, 1)} for activity, distance_m in rows]
+
+@router.get("/summaries", response_model=List[ActivitySummary])
+def get_activity_summaries(
+    activity_ids: List[UUID] = Query(..., min_length=1, max_length=500),
+    db: Session = Depends(get_db)
+):
+    """Summaries for many activities in one round trip (unknown IDs are skipped)"""
+    results = db.execute(
+        text(f"{ACTIVITY_SUMMARY_SQL} WHERE activity_id = ANY(:activity_ids)"),
+        {"activity_ids": list(set(activity_ids))}
+    ).all()
+    return [row._mapping for row in results]
+
 @router.get("/{activity_id}", response_model=Activity)
 def read_activity(activity_id: UUID, db: Session = Depends(get_db)):
     activity = db.query(ActivityModel).filter(ActivityModel.id == activity_id).first()
@@ -76,6 +243,18 @@ def update_activity(
     if ends_at <= starts_at:
         raise HTTPException(status_code=400, detail="End time must be after start time")
     
+    latitude = activity_data.get('latitude', db_activity.latitude)
+    longitude = activity_data.get('longitude', db_activity.longitude)
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=400, detail="Latitude and longitude must be set together")
+    
+    capacity = activity_data.get('capacity')
+    if capacity is not None and capacity < db_activity.registered_count:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Capacity cannot be lower than the number of registered volunteers ({db_activity.registered_count})"
+        )
+    
     for key, value in activity_data.items():
         setattr(db_activity, key, value)
     
@@ -93,33 +272,15 @@ def delete_activity(activity_id: UUID, db: Session = Depends(get_db)):
     db.commit()
     return {"message": "Activity deleted successfully"}
 
-@router.get("/{activity_id}/summary")
+@router.get("/{activity_id}/summary", response_model=ActivitySummary)
 def get_activity_summary(activity_id: UUID, db: Session = Depends(get_db)):
-    # Use the activity_summary view
+    # activity_summary reads trigger-maintained counters from activity_stats
     result = db.execute(
-        """
-        SELECT activity_id, starts_at, ends_at, location, capacity, status,
-               project_name, organization_name, region_name, 
-               registered_volunteers, verified_attendances
-        FROM activity_summary 
-        WHERE activity_id = :activity_id
-        """,
+        text(f"{ACTIVITY_SUMMARY_SQL} WHERE activity_id = :activity_id"),
         {"activity_id": activity_id}
     ).first()
     
     if result is None:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    return {
-        "activity_id": result.activity_id,
-        "starts_at": result.starts_at,
-        "ends_at": result.ends_at,
-        "location": result.location,
-        "capacity": result.capacity,
-        "status": result.status,
-        "project_name": result.project_name,
-        "organization_name": result.organization_name,
-        "region_name": result.region_name,
-        "registered_volunteers": result.registered_volunteers,
-        "verified_attendances": result.verified_attendances
-    }
\ No newline at end of file
+    return result._mapping
@@ -1,111 +1,145 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
-from decimal import Decimal
-from database.models import LedgerEntry as LedgerEntryModel
-import uuid as uuid_lib
 
 from database.connection import get_db
 from database.models import (
     Allocation as AllocationModel, VoloCredit as VoloCreditModel,
-    Profile as ProfileModel
+    Profile as ProfileModel, Project as ProjectModel,
+    Volunteer as VolunteerModel, AllocationKind
 )
-from schemas import Allocation, AllocationCreate, AllocationUpdate
+from money import ZERO, money_sum
+from schemas import Allocation, AllocationCreate, AllocationEligibility, AllocationUpdate
+from services.eligibility import eligibility_cache
+from services.outbox import enqueue
+from services.metrics import ALLOCATIONS_CREATED
+from services.tracing import span
 
 router = APIRouter()
 
+def _flush_or_budget_error(db: Session):
+    """Flush allocation changes, turning a budget CHECK violation into a 400"""
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        constraint = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+        if constraint == "valid_funding_budget":
+            raise HTTPException(status_code=400, detail="Allocation would exceed company's approved budget for this project")
+        if constraint == "valid_budget":
+            raise HTTPException(status_code=400, detail="Allocation would exceed the company's partnership budget")
+        raise
+
+def _check_free_choice_region(db: Session, volunteer_id: UUID, project_id: UUID):
+    """Free-choice credits stay in the volunteer's region; answered from the eligibility cache"""
+    with span("allocation.eligibility"):
+        region_id = eligibility_cache.volunteer_region(db, volunteer_id)
+        if region_id is None:
+            raise HTTPException(status_code=404, detail="Volunteer not found")
+        if not eligibility_cache.is_eligible(db, region_id, project_id):
+            raise HTTPException(
+                status_code=400,
+                detail="FREE_CHOICE_50 allocations must go to a project in the volunteer's region"
+            )
+
 @router.post("/", response_model=Allocation)
 def create_allocation(
     allocation: AllocationCreate,
     db: Session = Depends(get_db)
 ):
+    if allocation.kind == AllocationKind.FREE_CHOICE_50:
+        _check_free_choice_region(db, allocation.volunteer_id, allocation.project_id)
+    
     # Validate company has pre-approved funding for this project
-    if allocation.company_id:
-        from database.models import ProjectCompanyFunding as ProjectCompanyFundingModel
-        
-        funding = db.query(ProjectCompanyFundingModel).filter(
-            ProjectCompanyFundingModel.project_id == allocation.project_id,
-            ProjectCompanyFundingModel.company_id == allocation.company_id,
-            ProjectCompanyFundingModel.status == "ACTIVE"
-        ).first()
-        
-        if not funding:
-            raise HTTPException(
-                status_code=400, 
-                detail="Company has not pre-approved funding for this project. Project funding approval required."
-            )
-        
-        # Check if allocation would exceed company's approved budget for this project
-        current_allocated = db.query(func.sum(AllocationModel.amount)).filter(
-            AllocationModel.project_id == allocation.project_id,
-            AllocationModel.company_id == allocation.company_id
-        ).scalar() or 0
-        
-        budget_remaining = funding.max_budget - funding.allocated_budget
-        
-        if allocation.amount > budget_remaining:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Allocation would exceed company's approved budget for this project. Available: €{budget_remaining}, Requested: €{allocation.amount}"
-            )
-
+    with span("allocation.funding_check"):
+        if allocation.company_id:
+            from database.models import ProjectCompanyFunding as ProjectCompanyFundingModel
+            
+            funding = db.query(ProjectCompanyFundingModel).filter(
+                ProjectCompanyFundingModel.project_id == allocation.project_id,
+                ProjectCompanyFundingModel.company_id == allocation.company_id,
+                ProjectCompanyFundingModel.status == "ACTIVE"
+            ).first()
+            
+            if not funding:
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Company has not pre-approved funding for this project. Project funding approval required."
+                )
+            
+            # Check if allocation would exceed company's approved budget for this project
+            budget_remaining = funding.max_budget - funding.allocated_budget
+            
+            if allocation.amount > budget_remaining:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Allocation would exceed company's approved budget for this project. Available: €{budget_remaining}, Requested: €{allocation.amount}"
+                )
+    
     # Validate that the credit exists and has sufficient balance
-    if allocation.source_credit_id:
-        credit = db.query(VoloCreditModel).filter(VoloCreditModel.id == allocation.source_credit_id).first()
-        if not credit:
-            raise HTTPException(status_code=404, detail="Source credit not found")
-        
-        # Check if volunteer owns the credit
-        if credit.volunteer_id != allocation.volunteer_id:
-            raise HTTPException(status_code=400, detail="Credit does not belong to this volunteer")
+    with span("allocation.credit_balance"):
+        if allocation.source_credit_id:
+            credit = db.query(VoloCreditModel).filter(VoloCreditModel.id == allocation.source_credit_id).first()
+            if not credit:
+                raise HTTPException(status_code=404, detail="Source credit not found")
             
-        # Check if credit has been fully allocated
-        total_allocated = db.query(func.sum(AllocationModel.amount)).filter(
-            AllocationModel.source_credit_id == allocation.source_credit_id
-        ).scalar() or 0
-        
-        remaining_balance = float(credit.amount) - float(total_allocated)
-        if float(allocation.amount) > remaining_balance:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Insufficient credit balance. Available: {remaining_balance}, Requested: {allocation.amount}"
-            )
+            # Check if volunteer owns the credit
+            if credit.volunteer_id != allocation.volunteer_id:
+                raise HTTPException(status_code=400, detail="Credit does not belong to this volunteer")
+            
+            # Check if credit has been fully allocated
+            total_allocated = db.query(money_sum(AllocationModel.amount)).filter(
+                AllocationModel.source_credit_id == allocation.source_credit_id
+            ).scalar()
+            
+            remaining_balance = credit.amount - total_allocated
+            if allocation.amount > remaining_balance:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Insufficient credit balance. Available: {remaining_balance}, Requested: {allocation.amount}"
+                )
     
     db_allocation = AllocationModel(**allocation.model_dump())
     db.add(db_allocation)
-    db.flush()  # Flush to get the allocation ID
+    # Flush to get the allocation ID. Funding/partnership budget counters are
+    # updated by database triggers; their CHECK constraints reject overspending
+    # even when concurrent allocations passed the check above.
+    with span("allocation.insert"):
+        _flush_or_budget_error(db)
     
-    # Update company funding allocated budget
-    if allocation.company_id:
-        funding.allocated_budget += allocation.amount
-        db.flush()
+    # The ledger entry is written by the outbox worker
+    with span("allocation.enqueue_ledger"):
+        enqueue(
+            db,
+            "allocation.created",
+            "Allocation",
+            db_allocation.id,
+            {
+                "allocation_id": str(db_allocation.id),
+                "volunteer_id": str(db_allocation.volunteer_id),
+                "project_id": str(db_allocation.project_id),
+                "company_id": str(db_allocation.company_id) if db_allocation.company_id else None,
+                "amount": str(allocation.amount),
+                "kind": allocation.kind.value
+            },
+            idempotency_key=f"allocation.created:{db_allocation.id}"
+        )
     
-    # Create ledger entry for allocation
-    ledger_entry = LedgerEntryModel(
-        id=uuid_lib.uuid4(),
-        ref_type="Allocation",
-        ref_id=db_allocation.id,
-        hash=f"hash_{str(db_allocation.id)[:8]}",
-        prev_hash=None  # Simplified for MVP
-    )
-    db.add(ledger_entry)
-    
-    # Update credit status if fully allocated
+    # Update credit status if fully allocated (no need to re-run the SUM)
     if allocation.source_credit_id:
-        total_allocated = db.query(func.sum(AllocationModel.amount)).filter(
-            AllocationModel.source_credit_id == allocation.source_credit_id
-        ).scalar() or 0
-        
-        if float(total_allocated) >= float(credit.amount):
+        if total_allocated + allocation.amount >= credit.amount:
             credit.status = "Allocated"
     
     # Note: Profile totals are automatically updated by database triggers
     # when allocations are created or modified
     
-    db.commit()
+    with span("allocation.commit"):
+        db.commit()
     db.refresh(db_allocation)
+    ALLOCATIONS_CREATED.labels(allocation.kind.value).inc()
     return db_allocation
 
 @router.get("/", response_model=List[Allocation])
@@ -128,7 +162,13 @@ def read_allocations(
     if kind:
         query = query.filter(AllocationModel.kind == kind)
     
-    allocations = query.offset(skip).limit(limit).all()
+    # Each allocation is serialized with its volunteer, project and company; load them in the same query
+    allocations = query.options(
+        joinedload(AllocationModel.volunteer).joinedload(VolunteerModel.region),
+        joinedload(AllocationModel.project).joinedload(ProjectModel.ngo),
+        joinedload(AllocationModel.project).joinedload(ProjectModel.region),
+        joinedload(AllocationModel.company)
+    ).offset(skip).limit(limit).all()
     return allocations
 
 @router.get("/{allocation_id}", response_model=Allocation)
@@ -149,9 +189,15 @@ def update_allocation(
         raise HTTPException(status_code=404, detail="Allocation not found")
     
     allocation_data = allocation.model_dump(exclude_unset=True)
+    # A kind switched to FREE_CHOICE_50 must meet the same region rule as a new allocation
+    if allocation_data.get("kind", db_allocation.kind) == AllocationKind.FREE_CHOICE_50:
+        _check_free_choice_region(db, db_allocation.volunteer_id, db_allocation.project_id)
+    
     for key, value in allocation_data.items():
         setattr(db_allocation, key, value)
     
+    # Budget counters follow amount changes via database triggers
+    _flush_or_budget_error(db)
     db.commit()
     db.refresh(db_allocation)
     return db_allocation
@@ -172,41 +218,45 @@ def delete_allocation(allocation_id: UUID, db: Session = Depends(get_db)):
     db.commit()
     return {"message": "Allocation deleted successfully"}
 
+@router.get("/volunteer/{volunteer_id}/eligible-projects", response_model=AllocationEligibility)
+def read_eligible_projects(volunteer_id: UUID, db: Session = Depends(get_db)):
+    """Projects the volunteer may choose for FREE_CHOICE_50 allocations, with their active fundings and remaining budgets"""
+    region_id = eligibility_cache.volunteer_region(db, volunteer_id)
+    if region_id is None:
+        raise HTTPException(status_code=404, detail="Volunteer not found")
+    
+    return {
+        "volunteer_id": volunteer_id,
+        "region_id": region_id,
+        "projects": eligibility_cache.catalog(db, region_id).projects
+    }
+
 @router.get("/volunteer/{volunteer_id}/summary")
 def get_volunteer_allocation_summary(volunteer_id: UUID, db: Session = Depends(get_db)):
     """Get allocation summary for a volunteer"""
     
-    # Get total allocations by kind
-    mandatory_total = db.query(AllocationModel).filter(
-        AllocationModel.volunteer_id == volunteer_id,
-        AllocationModel.kind == "MANDATORY_50"
-    ).count()
-    
-    free_choice_total = db.query(AllocationModel).filter(
-        AllocationModel.volunteer_id == volunteer_id,
-        AllocationModel.kind == "FREE_CHOICE_50"
-    ).count()
-    
-    # Get total amounts by kind
-    mandatory_amount = db.query(AllocationModel).filter(
-        AllocationModel.volunteer_id == volunteer_id,
-        AllocationModel.kind == "MANDATORY_50"
-    ).with_entities(db.func.sum(AllocationModel.amount)).scalar() or Decimal('0')
+    # Counts and amounts per kind in a single grouped query
+    rows = db.query(
+        AllocationModel.kind,
+        func.count(AllocationModel.id),
+        money_sum(AllocationModel.amount)
+    ).filter(
+        AllocationModel.volunteer_id == volunteer_id
+    ).group_by(AllocationModel.kind).all()
     
-    free_choice_amount = db.query(AllocationModel).filter(
-        AllocationModel.volunteer_id == volunteer_id,
-        AllocationModel.kind == "FREE_CHOICE_50"
-    ).with_entities(db.func.sum(AllocationModel.amount)).scalar() or Decimal('0')
+    totals = {kind: (count, amount) for kind, count, amount in rows}
+    mandatory_total, mandatory_amount = totals.get(AllocationKind.MANDATORY_50, (0, ZERO))
+    free_choice_total, free_choice_amount = totals.get(AllocationKind.FREE_CHOICE_50, (0, ZERO))
     
     return {
         "volunteer_id": volunteer_id,
         "mandatory_allocations": {
             "count": mandatory_total,
-            "total_amount": float(mandatory_amount)
+            "total_amount": mandatory_amount
         },
         "free_choice_allocations": {
             "count": free_choice_total,
-            "total_amount": float(free_choice_amount)
+            "total_amount": free_choice_amount
         },
-        "total_allocated": float(mandatory_amount + free_choice_amount)
-    }
\ No newline at end of file
+        "total_allocated": mandatory_amount + free_choice_amount
+    }
@@ -1,20 +1,112 @@
+import os
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 import uuid as uuid_lib
 
 from database.connection import get_db
 from database.models import (
-    Attendance as AttendanceModel, LedgerEntry as LedgerEntryModel,
-    VoloCredit as VoloCreditModel, Profile as ProfileModel
+    Attendance as AttendanceModel,
+    VoloCredit as VoloCreditModel, Profile as ProfileModel,
+    Activity as ActivityModel, Project as ProjectModel,
+    Volunteer as VolunteerModel, AttendanceStatus, ActivityStatus
 )
-from schemas import Attendance, AttendanceCreate, AttendanceUpdate, AttendancesResponse
+from schemas import Attendance, AttendanceCreate, AttendanceUpdate, AttendancesResponse, ScheduleConflict
+from money import credits_for_hours
+from services.outbox import enqueue
+from services.metrics import ATTENDANCES_VERIFIED, CHECK_INS, CREDITS_MINTED
+from services.tracing import span
 
 router = APIRouter()
 
+# Refuse sign-ups that overlap one of the volunteer's other activities. Concurrent sign-ups
+# can still both pass; the attendances_no_overlap exclusion constraint closes that gap
+REJECT_SCHEDULE_CONFLICTS = os.getenv("REJECT_SCHEDULE_CONFLICTS", "false").lower() == "true"
+SCHEDULE_CONFLICT_DETAIL = "Volunteer is already signed up for an overlapping activity"
+
+# activity_period && range is answered by idx_attendances_volunteer_period (same status predicate)
+SCHEDULE_CONFLICTS_SQL = """
+    SELECT at.id AS attendance_id, at.activity_id, at.status, a.starts_at, a.ends_at, p.name AS project_name
+    FROM attendances at
+    JOIN activities a ON a.id = at.activity_id
+    JOIN projects p ON p.id = a.project_id
+    WHERE at.volunteer_id = :volunteer_id
+      AND at.status <> 'Rejected'
+      AND at.activity_period && tstzrange(:starts_at, :ends_at, '[)')
+      AND at.activity_id <> :activity_id
+    ORDER BY a.starts_at
+"""
+
+def _schedule_conflicts(db: Session, volunteer_id: UUID, activity) -> list:
+    """The volunteer's other sign-ups overlapping the activity (none for a cancelled activity)"""
+    if activity.status == ActivityStatus.CANCELLED:
+        return []
+    return db.execute(text(SCHEDULE_CONFLICTS_SQL), {
+        "volunteer_id": volunteer_id,
+        "activity_id": activity.id,
+        "starts_at": activity.starts_at,
+        "ends_at": activity.ends_at
+    }).all()
+
+def _hours_between(start: datetime, end: datetime) -> Decimal:
+    """Exact duration in hours (microsecond precision, no float rounding)"""
+    return Decimal((end - start) // timedelta(microseconds=1)) / Decimal(3_600_000_000)
+
+# Waitlisted and rejected attendances don't hold a seat on the activity
+SEATLESS_STATUSES = (AttendanceStatus.WAITLISTED, AttendanceStatus.REJECTED)
+
+def _lock_activity(db: Session, activity_id: UUID):
+    """
+    Row lock on the activity, held until commit
+    Seat releases take it before looking at the waitlist, so a sign-up that found the
+    activity full and re-checks under the lock can't be waitlisted next to a free seat
+    """
+    db.execute(
+        text("SELECT 1 FROM activities WHERE id = :activity_id FOR UPDATE"),
+        {"activity_id": activity_id}
+    )
+
+def _claim_seat(db: Session, activity_id: UUID) -> bool:
+    """
+    Take one seat on the activity with a single conditional UPDATE
+    Concurrent sign-ups serialize on the activity row instead of racing a COUNT(*)
+    """
+    claimed = db.execute(
+        update(ActivityModel)
+        .where(
+            ActivityModel.id == activity_id,
+            or_(ActivityModel.capacity.is_(None), ActivityModel.registered_count < ActivityModel.capacity)
+        )
+        .values(registered_count=ActivityModel.registered_count + 1)
+        .returning(ActivityModel.registered_count)
+    ).first()
+    return claimed is not None
+
+def _release_seat(db: Session, activity_id: UUID):
+    """Hand a freed seat to the oldest waitlisted attendance, or give it back to the activity"""
+    _lock_activity(db, activity_id)
+    next_in_line = db.query(AttendanceModel).filter(
+        AttendanceModel.activity_id == activity_id,
+        AttendanceModel.status == AttendanceStatus.WAITLISTED
+    ).order_by(AttendanceModel.created_at).with_for_update(skip_locked=True).first()
+    
+    if next_in_line is not None:
+        # The seat moves to the promoted attendance; registered_count is unchanged
+        next_in_line.status = AttendanceStatus.PENDING
+        return next_in_line
+    
+    db.execute(
+        update(ActivityModel)
+        .where(ActivityModel.id == activity_id, ActivityModel.registered_count > 0)
+        .values(registered_count=ActivityModel.registered_count - 1)
+    )
+    return None
+
 @router.post("/", response_model=Attendance)
 def create_attendance(
     attendance: AttendanceCreate,
@@ -32,8 +124,40 @@ def create_attendance(
             detail="Attendance record already exists for this volunteer and activity"
         )
     
+    activity = db.query(
+        ActivityModel.id, ActivityModel.starts_at, ActivityModel.ends_at, ActivityModel.status
+    ).filter(ActivityModel.id == attendance.activity_id).first()
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    
+    if REJECT_SCHEDULE_CONFLICTS and _schedule_conflicts(db, attendance.volunteer_id, activity):
+        raise HTTPException(status_code=400, detail=SCHEDULE_CONFLICT_DETAIL)
+    
     db_attendance = AttendanceModel(**attendance.model_dump())
+    if db_attendance.status == AttendanceStatus.WAITLISTED:
+        db_attendance.status = AttendanceStatus.PENDING
     db.add(db_attendance)
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        constraint = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+        if constraint == "attendances_no_overlap":
+            raise HTTPException(status_code=400, detail=SCHEDULE_CONFLICT_DETAIL)
+        # Lost a race against a concurrent sign-up for the same volunteer/activity
+        raise HTTPException(
+            status_code=400, 
+            detail="Attendance record already exists for this volunteer and activity"
+        )
+    
+    # Claim a seat last so the activity row lock is only held until commit. A full activity
+    # is re-checked under the lock: a release that committed meanwhile freed a seat without
+    # seeing this (then uncommitted) attendance on the waitlist
+    if not _claim_seat(db, attendance.activity_id):
+        _lock_activity(db, attendance.activity_id)
+        if not _claim_seat(db, attendance.activity_id):
+            db_attendance.status = AttendanceStatus.WAITLISTED
+    
     db.commit()
     db.refresh(db_attendance)
     return db_attendance
@@ -59,7 +183,13 @@ def read_attendances(
         query = query.filter(AttendanceModel.status == status)
     
     total = query.count()
-    attendances = query.offset(skip).limit(limit).all()
+    # Each attendance is serialized with its volunteer and activity, nested down to regions and NGOs
+    activity_project = joinedload(AttendanceModel.activity).joinedload(ActivityModel.project)
+    attendances = query.options(
+        joinedload(AttendanceModel.volunteer).joinedload(VolunteerModel.region),
+        activity_project.joinedload(ProjectModel.ngo),
+        activity_project.joinedload(ProjectModel.region)
+    ).offset(skip).limit(limit).all()
     
     return {
         "attendances": attendances,
@@ -68,6 +198,21 @@ def read_attendances(
         "per_page": limit
     }
 
+@router.get("/volunteer/{volunteer_id}/conflicts", response_model=List[ScheduleConflict])
+def read_schedule_conflicts(
+    volunteer_id: UUID,
+    activity_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """The volunteer's sign-ups that overlap an activity, e.g. to warn before signing up"""
+    activity = db.query(
+        ActivityModel.id, ActivityModel.starts_at, ActivityModel.ends_at, ActivityModel.status
+    ).filter(ActivityModel.id == activity_id).first()
+    if activity is None:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    
+    return [row._mapping for row in _schedule_conflicts(db, volunteer_id, activity)]
+
 @router.get("/{attendance_id}", response_model=Attendance)
 def read_attendance(attendance_id: UUID, db: Session = Depends(get_db)):
     attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).first()
@@ -81,12 +226,18 @@ def update_attendance(
     attendance: AttendanceUpdate,
     db: Session = Depends(get_db)
 ):
-    db_attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).first()
+    # Row lock before the activity lock a status change may take, in the same order as deletes
+    db_attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).with_for_update().first()
     if db_attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
     
     attendance_data = attendance.model_dump(exclude_unset=True)
     
+    # Seats and the waitlist are managed by sign-up/cancellation only
+    new_status = attendance_data.get('status')
+    if new_status is not None and new_status != db_attendance.status and AttendanceStatus.WAITLISTED in (new_status, db_attendance.status):
+        raise HTTPException(status_code=400, detail="Waitlist status is managed automatically")
+    
     # Validate time constraints if both times are provided
     check_in_at = attendance_data.get('check_in_at', db_attendance.check_in_at)
     check_out_at = attendance_data.get('check_out_at', db_attendance.check_out_at)
@@ -94,6 +245,16 @@ def update_attendance(
     if check_in_at and check_out_at and check_out_at <= check_in_at:
         raise HTTPException(status_code=400, detail="Check-out time must be after check-in time")
     
+    # Rejecting frees the seat for the waitlist; taking a rejection back needs a seat again
+    if new_status is not None and new_status != db_attendance.status:
+        if new_status == AttendanceStatus.REJECTED:
+            _release_seat(db, db_attendance.activity_id)
+        elif db_attendance.status == AttendanceStatus.REJECTED:
+            _lock_activity(db, db_attendance.activity_id)
+            if not _claim_seat(db, db_attendance.activity_id):
+                db.rollback()
+                raise HTTPException(status_code=400, detail="Activity is full")
+    
     for key, value in attendance_data.items():
         setattr(db_attendance, key, value)
     
@@ -107,12 +268,16 @@ def check_in(attendance_id: UUID, db: Session = Depends(get_db)):
     if attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
     
+    if attendance.status == AttendanceStatus.WAITLISTED:
+        raise HTTPException(status_code=400, detail="Cannot check in while on the waitlist")
+    
     if attendance.check_in_at is not None:
         raise HTTPException(status_code=400, detail="Already checked in")
     
     attendance.check_in_at = datetime.utcnow()
     db.commit()
     db.refresh(attendance)
+    CHECK_INS.inc()
     
     return {"message": "Check-in successful", "check_in_at": attendance.check_in_at}
 
@@ -140,10 +305,15 @@ def verify_attendance(
     request_data: dict,
     db: Session = Depends(get_db)
 ):
-    attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).first()
+    # Row lock: a concurrent verification of the same attendance waits here and then sees Verified
+    with span("attendance.lock"):
+        attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).with_for_update().first()
     if attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
     
+    if attendance.status == AttendanceStatus.VERIFIED:
+        raise HTTPException(status_code=400, detail="Attendance is already verified")
+    
     if attendance.check_in_at is None or attendance.check_out_at is None:
         raise HTTPException(status_code=400, detail="Attendance must have both check-in and check-out times")
     
@@ -154,26 +324,15 @@ def verify_attendance(
     attendance.status = "Verified"
     attendance.verified_by_user_id = verified_by_user_id
     
-    # Create ledger entry for verified attendance
-    ledger_entry = LedgerEntryModel(
-        id=uuid_lib.uuid4(),
-        ref_type="Attendance",
-        ref_id=attendance_id,
-        hash=f"hash_{str(attendance_id)[:8]}",
-        prev_hash=None  # Simplified for MVP
-    )
-    db.add(ledger_entry)
-    
     # Auto-create VoloCredit for verified attendance
-    hours_worked = (attendance.check_out_at - attendance.check_in_at).total_seconds() / 3600.0
+    hours_worked = _hours_between(attendance.check_in_at, attendance.check_out_at)
     
     # Ensure minimum credit amount for short test durations
-    if hours_worked < 0.1:  # Less than 6 minutes, use activity duration instead
+    if hours_worked < Decimal("0.1"):  # Less than 6 minutes, use activity duration instead
         # Calculate from activity duration as fallback
-        activity_hours = (attendance.activity.ends_at - attendance.activity.starts_at).total_seconds() / 3600.0
-        hours_worked = activity_hours
+        hours_worked = _hours_between(attendance.activity.starts_at, attendance.activity.ends_at)
     
-    credit_amount = hours_worked * 10.0  # 10 credits per hour as per test
+    credit_amount = credits_for_hours(hours_worked)  # 10 credits per hour as per test
     
     volo_credit = VoloCreditModel(
         id=uuid_lib.uuid4(),
@@ -185,32 +344,52 @@ def verify_attendance(
         expires_at=datetime.utcnow().replace(year=datetime.utcnow().year + 1)  # Expires in 1 year
     )
     db.add(volo_credit)
-    db.flush()  # Get the credit ID
-    
-    # Create ledger entry for credit
-    credit_ledger_entry = LedgerEntryModel(
-        id=uuid_lib.uuid4(),
-        ref_type="VoloCredit",
-        ref_id=volo_credit.id,
-        hash=f"hash_{str(volo_credit.id)[:8]}",
-        prev_hash=None  # Simplified for MVP
-    )
-    db.add(credit_ledger_entry)
+    # Inserting the credit and updating the attendance fire the profile and activity stats triggers
+    with span("attendance.mint_credit"):
+        db.flush()  # Get the credit ID
+    
+    # Ledger entries and the volunteer notification are written by the outbox worker
+    with span("attendance.enqueue_side_effects"):
+        enqueue(
+            db,
+            "attendance.verified",
+            "Attendance",
+            attendance_id,
+            {
+                "attendance_id": str(attendance_id),
+                "volunteer_id": str(attendance.volunteer_id),
+                "activity_id": str(attendance.activity_id),
+                "credit_id": str(volo_credit.id),
+                "credit_amount": str(credit_amount)
+            },
+            idempotency_key=f"attendance.verified:{attendance_id}"
+        )
     
     # Note: Profile totals are automatically updated by database triggers
     # when volo_credits and attendances are modified
     
-    db.commit()
+    with span("attendance.commit"):
+        db.commit()
     db.refresh(attendance)
+    ATTENDANCES_VERIFIED.inc()
+    CREDITS_MINTED.inc(float(credit_amount))
     
     return {"message": "Attendance verified successfully", "credits_granted": credit_amount}
 
 @router.delete("/{attendance_id}")
 def delete_attendance(attendance_id: UUID, db: Session = Depends(get_db)):
-    attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).first()
+    attendance = db.query(AttendanceModel).filter(AttendanceModel.id == attendance_id).with_for_update().first()
     if attendance is None:
         raise HTTPException(status_code=404, detail="Attendance not found")
     
+    promoted = None
+    if attendance.status not in SEATLESS_STATUSES:
+        promoted = _release_seat(db, attendance.activity_id)
+    
     db.delete(attendance)
     db.commit()
-    return {"message": "Attendance deleted successfully"}
\ No newline at end of file
+    
+    response = {"message": "Attendance deleted successfully"}
+    if promoted is not None:
+        response["promoted_attendance_id"] = promoted.id
+    return response
\ No newline at end of file
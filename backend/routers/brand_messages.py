@@ -0,0 +1,260 @@
+"""
+Brand message endpoints
+Company messages shown on the allocation screen; active-message lookups are
+served from the in-process index without touching the database
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import math
+
+from database.connection import get_db
+from database.models import (
+    BrandMessage as BrandMessageModel,
+    BrandImpression as BrandImpressionModel,
+    BrandEventType as BrandEventTypeModel,
+    Company as CompanyModel
+)
+from schemas import (
+    ActiveBrandMessage, BrandMessage, BrandMessageCreate, BrandMessageUpdate,
+    BrandMessageEventBatch, BrandMessageEventsAccepted, BrandMessageStats
+)
+from services.brand_messages import brand_message_index, impression_buffer, BufferFull, IMPRESSION_FLUSH_SECONDS
+
+router = APIRouter()
+
+# Events outside this window are rejected so buffered keys stay bounded
+MAX_EVENT_AGE = timedelta(days=7)
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are taken as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _click_through_rate(impressions: int, clicks: int) -> Optional[Decimal]:
+    if not impressions:
+        return None
+    return round(Decimal(clicks) / impressions * 100, 2)
+
+def _validate_window(active_from: Optional[datetime], active_to: Optional[datetime]):
+    if active_from and active_to and active_to <= active_from:
+        raise HTTPException(status_code=400, detail="active_to must be after active_from")
+
+@router.post("/", response_model=BrandMessage)
+def create_brand_message(
+    message: BrandMessageCreate,
+    db: Session = Depends(get_db)
+):
+    company = db.query(CompanyModel).filter(CompanyModel.id == message.company_id).first()
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    _validate_window(message.active_from, message.active_to)
+    
+    # Let the database default active_from to now when it isn't given
+    db_message = BrandMessageModel(**message.model_dump(exclude_none=True))
+    db.add(db_message)
+    db.commit()
+    db.refresh(db_message)
+    
+    brand_message_index.upsert(ActiveBrandMessage.model_validate(db_message))
+    return db_message
+
+@router.get("/", response_model=List[BrandMessage])
+def list_brand_messages(
+    company_id: Optional[UUID] = Query(None),
+    active_only: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    query = db.query(BrandMessageModel)
+    
+    if company_id:
+        query = query.filter(BrandMessageModel.company_id == company_id)
+    
+    if active_only:
+        now = datetime.now(timezone.utc)
+        query = query.filter(
+            (BrandMessageModel.active_from.is_(None)) | (BrandMessageModel.active_from <= now),
+            (BrandMessageModel.active_to.is_(None)) | (BrandMessageModel.active_to > now)
+        )
+    
+    return query.order_by(BrandMessageModel.created_at.desc()).offset(skip).limit(limit).all()
+
+@router.get("/active/{company_id}", response_model=ActiveBrandMessage)
+def get_active_brand_message(
+    company_id: UUID,
+    record_impression: bool = Query(True),
+):
+    """
+    Pick the company's brand message to show on the allocation screen
+    Messages rotate by weight; the impression is counted in memory and flushed in the background
+    """
+    message = brand_message_index.pick(company_id)
+    if message is None:
+        raise HTTPException(status_code=404, detail="No active brand message for this company")
+    
+    if record_impression:
+        try:
+            impression_buffer.record(message.id)
+        except BufferFull:
+            # Showing the message matters more than counting it; the drop is tallied in impression_buffer.rejected
+            pass
+    return message
+
+@router.get("/active/{company_id}/all", response_model=List[ActiveBrandMessage])
+def list_active_brand_messages(company_id: UUID):
+    """All messages currently active for a company (no impression recorded)"""
+    return brand_message_index.active(company_id)
+
+@router.post("/events", response_model=BrandMessageEventsAccepted, status_code=202)
+def record_brand_message_events(batch: BrandMessageEventBatch):
+    """
+    Ingest impression and click events reported by clients
+    Events are aggregated per message and hour in memory and written in batches;
+    a full buffer answers 503 with Retry-After so clients back off
+    """
+    now = datetime.now(timezone.utc)
+    events = []
+    for event in batch.events:
+        occurred_at = _as_utc(event.occurred_at) if event.occurred_at else now
+        if occurred_at > now + MAX_CLOCK_SKEW:
+            raise HTTPException(status_code=400, detail="occurred_at cannot be in the future")
+        if occurred_at < now - MAX_EVENT_AGE:
+            raise HTTPException(status_code=400, detail=f"occurred_at cannot be older than {MAX_EVENT_AGE.days} days")
+        events.append((event.brand_message_id, event.event_type, occurred_at))
+    
+    try:
+        impression_buffer.record_many(events)
+    except BufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Event buffer is full, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(IMPRESSION_FLUSH_SECONDS)))}
+        )
+    return {"accepted": len(events), "pending": impression_buffer.pending()}
+
+@router.get("/stats/{company_id}", response_model=BrandMessageStats)
+def get_brand_message_stats(
+    company_id: UUID,
+    start: Optional[datetime] = Query(None, description="Defaults to 7 days before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    db: Session = Depends(get_db)
+):
+    """
+    Hourly impressions and clicks for a company's brand messages
+    Read from the brand_impressions rollup; the last few seconds may still be buffered in memory
+    """
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > timedelta(days=93):
+        raise HTTPException(status_code=400, detail="Range cannot exceed 93 days")
+    
+    impressions = func.coalesce(func.sum(case(
+        (BrandImpressionModel.event_type == BrandEventTypeModel.IMPRESSION, BrandImpressionModel.event_count), else_=0
+    )), 0)
+    clicks = func.coalesce(func.sum(case(
+        (BrandImpressionModel.event_type == BrandEventTypeModel.CLICK, BrandImpressionModel.event_count), else_=0
+    )), 0)
+    in_range = (
+        BrandImpressionModel.company_id == company_id,
+        BrandImpressionModel.hour >= start,
+        BrandImpressionModel.hour < end
+    )
+    
+    hourly = db.query(
+        BrandImpressionModel.hour,
+        impressions.label("impressions"),
+        clicks.label("clicks")
+    ).filter(*in_range).group_by(BrandImpressionModel.hour).order_by(BrandImpressionModel.hour).all()
+    
+    per_message = db.query(
+        BrandImpressionModel.brand_message_id,
+        BrandMessageModel.content,
+        impressions.label("impressions"),
+        clicks.label("clicks")
+    ).join(
+        BrandMessageModel, BrandMessageModel.id == BrandImpressionModel.brand_message_id
+    ).filter(*in_range).group_by(
+        BrandImpressionModel.brand_message_id, BrandMessageModel.content
+    ).order_by(impressions.desc()).all()
+    
+    total_impressions = sum(row.impressions for row in hourly)
+    total_clicks = sum(row.clicks for row in hourly)
+    return {
+        "company_id": company_id,
+        "start": start,
+        "end": end,
+        "impressions": total_impressions,
+        "clicks": total_clicks,
+        "click_through_rate": _click_through_rate(total_impressions, total_clicks),
+        "messages": [
+            {
+                "brand_message_id": row.brand_message_id,
+                "content": row.content,
+                "impressions": row.impressions,
+                "clicks": row.clicks,
+                "click_through_rate": _click_through_rate(row.impressions, row.clicks)
+            }
+            for row in per_message
+        ],
+        "hourly": [
+            {"hour": row.hour, "impressions": row.impressions, "clicks": row.clicks}
+            for row in hourly
+        ]
+    }
+
+@router.get("/{message_id}", response_model=BrandMessage)
+def get_brand_message(message_id: UUID, db: Session = Depends(get_db)):
+    message = db.query(BrandMessageModel).filter(BrandMessageModel.id == message_id).first()
+    if message is None:
+        raise HTTPException(status_code=404, detail="Brand message not found")
+    return message
+
+@router.put("/{message_id}", response_model=BrandMessage)
+def update_brand_message(
+    message_id: UUID,
+    updates: BrandMessageUpdate,
+    db: Session = Depends(get_db)
+):
+    db_message = db.query(BrandMessageModel).filter(BrandMessageModel.id == message_id).first()
+    if db_message is None:
+        raise HTTPException(status_code=404, detail="Brand message not found")
+    
+    update_data = updates.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    _validate_window(
+        update_data.get("active_from", db_message.active_from),
+        update_data.get("active_to", db_message.active_to)
+    )
+    
+    for field, value in update_data.items():
+        setattr(db_message, field, value)
+    
+    db.commit()
+    db.refresh(db_message)
+    
+    brand_message_index.upsert(ActiveBrandMessage.model_validate(db_message))
+    return db_message
+
+@router.delete("/{message_id}")
+def delete_brand_message(message_id: UUID, db: Session = Depends(get_db)):
+    db_message = db.query(BrandMessageModel).filter(BrandMessageModel.id == message_id).first()
+    if db_message is None:
+        raise HTTPException(status_code=404, detail="Brand message not found")
+    
+    company_id = db_message.company_id
+    db.delete(db_message)
+    db.commit()
+    
+    brand_message_index.remove(message_id, company_id)
+    return {"message": "Brand message deleted successfully"}
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
 from database.connection import get_db
 from database.models import Company as CompanyModel
-from schemas import Company, CompanyCreate, CompanyUpdate
+from schemas import Company, CompanyCreate, CompanyUpdate, CompanyBulkItem, BulkMode, BulkResult
+from bulk import BULK_MAX_ITEMS, bulk_write
 
 router = APIRouter()
 
@@ -20,6 +21,15 @@ def create_company(
     db.refresh(db_company)
     return db_company
 
+@router.post("/bulk", response_model=BulkResult)
+def bulk_write_companies(
+    companies: List[CompanyBulkItem] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    mode: BulkMode = BulkMode.CREATE,
+    db: Session = Depends(get_db)
+):
+    """Create or upsert (by id) many companies in one transaction"""
+    return bulk_write(db, CompanyModel, companies, mode, errors={})
+
 @router.get("/", response_model=List[Company])
 def read_companies(
     skip: int = Query(0, ge=0),
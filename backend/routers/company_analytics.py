@@ -0,0 +1,229 @@
+"""
+Company funding analytics endpoints
+Utilization, burn rate and projected depletion per project funding and per partnership
+"""
+import math
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, case, distinct, and_
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from database.connection import get_db
+from database.models import (
+    Company as CompanyModel,
+    CompanyPartnership as CompanyPartnershipModel,
+    Organization as OrganizationModel,
+    Project as ProjectModel,
+    ProjectCompanyFunding as ProjectCompanyFundingModel,
+    ProjectAllocationDaily as ProjectAllocationDailyModel
+)
+from schemas import CompanyAnalytics
+from money import ZERO, money_sum, to_money
+
+router = APIRouter()
+
+def _burn(remaining: Decimal, window_allocated: Decimal, window_days: int, today: date):
+    """Average daily spend over the window and the day the remaining budget runs out at that pace"""
+    daily_burn_rate = to_money(window_allocated / window_days)
+    if remaining is None or remaining <= 0 or daily_burn_rate <= 0:
+        return daily_burn_rate, None
+    return daily_burn_rate, today + timedelta(days=math.ceil(remaining / daily_burn_rate))
+
+def _utilization(allocated: Decimal, budget: Optional[Decimal]):
+    if not budget:
+        return None
+    return round(allocated / budget * 100, 2)
+
+def _as_date(value):
+    # The model maps the partnership window as DateTime (the table column is DATE); compare by day
+    return value.date() if isinstance(value, datetime) else value
+
+def _partnership_status(active_from, active_to, today: date) -> str:
+    if active_from is not None and _as_date(active_from) > today:
+        return "UPCOMING"
+    if active_to is not None and _as_date(active_to) < today:
+        return "EXPIRED"
+    return "ACTIVE"
+
+@router.get("/", response_model=List[CompanyAnalytics])
+def get_company_analytics(
+    company_ids: List[UUID] = Query(..., min_length=1, max_length=100),
+    window_days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """
+    Funding analytics for one or more companies
+
+    Runs three statements whatever the number of companies, fundings or partnerships:
+    companies, fundings (with names and rollup totals) and partnerships (same).
+    Burn rate is the average daily amount allocated over the last `window_days` days,
+    read from the project_allocation_daily rollup.
+    """
+    company_ids = list(set(company_ids))
+    today = datetime.now(timezone.utc).date()
+    window_start = today - timedelta(days=window_days - 1)
+    in_window = ProjectAllocationDailyModel.day >= window_start
+
+    companies = db.execute(
+        select(CompanyModel.id, CompanyModel.name).where(CompanyModel.id.in_(company_ids))
+    ).all()
+    if not companies:
+        raise HTTPException(status_code=404, detail="Company not found")
+
+    # Per (project, company) spend inside the window
+    funding_rollup = select(
+        ProjectAllocationDailyModel.project_id,
+        ProjectAllocationDailyModel.company_id,
+        money_sum(ProjectAllocationDailyModel.total_amount).label("window_allocated")
+    ).where(
+        ProjectAllocationDailyModel.company_id.in_(company_ids),
+        in_window
+    ).group_by(
+        ProjectAllocationDailyModel.project_id, ProjectAllocationDailyModel.company_id
+    ).subquery()
+
+    funding_rows = db.execute(
+        select(
+            ProjectCompanyFundingModel.id.label("funding_id"),
+            ProjectCompanyFundingModel.company_id,
+            ProjectCompanyFundingModel.project_id,
+            ProjectModel.name.label("project_name"),
+            OrganizationModel.name.label("organization_name"),
+            ProjectCompanyFundingModel.status,
+            ProjectCompanyFundingModel.max_budget,
+            ProjectCompanyFundingModel.allocated_budget,
+            func.coalesce(funding_rollup.c.window_allocated, ZERO).label("window_allocated"),
+            # Company totals computed alongside the rows instead of summed in Python
+            func.sum(ProjectCompanyFundingModel.max_budget).over(
+                partition_by=ProjectCompanyFundingModel.company_id
+            ).label("company_budget_committed"),
+            func.sum(ProjectCompanyFundingModel.allocated_budget).over(
+                partition_by=ProjectCompanyFundingModel.company_id
+            ).label("company_budget_allocated"),
+            func.sum(func.coalesce(funding_rollup.c.window_allocated, ZERO)).over(
+                partition_by=ProjectCompanyFundingModel.company_id
+            ).label("company_window_allocated")
+        )
+        .join(ProjectModel, ProjectModel.id == ProjectCompanyFundingModel.project_id)
+        .join(OrganizationModel, OrganizationModel.id == ProjectModel.ngo_id)
+        .outerjoin(funding_rollup, and_(
+            funding_rollup.c.project_id == ProjectCompanyFundingModel.project_id,
+            funding_rollup.c.company_id == ProjectCompanyFundingModel.company_id
+        ))
+        .where(ProjectCompanyFundingModel.company_id.in_(company_ids))
+        .order_by(ProjectCompanyFundingModel.company_id, ProjectCompanyFundingModel.approved_at.desc())
+    ).all()
+
+    # Per (company, organization) lifetime and in-window totals for partnerships
+    partnership_rollup = select(
+        ProjectAllocationDailyModel.company_id,
+        ProjectModel.ngo_id.label("organization_id"),
+        func.sum(ProjectAllocationDailyModel.allocation_count).label("total_allocations"),
+        func.count(distinct(case(
+            (ProjectAllocationDailyModel.allocation_count > 0, ProjectAllocationDailyModel.project_id)
+        ))).label("projects_funded"),
+        money_sum(case((in_window, ProjectAllocationDailyModel.total_amount), else_=ZERO)).label("window_allocated")
+    ).join(
+        ProjectModel, ProjectModel.id == ProjectAllocationDailyModel.project_id
+    ).where(
+        ProjectAllocationDailyModel.company_id.in_(company_ids)
+    ).group_by(
+        ProjectAllocationDailyModel.company_id, ProjectModel.ngo_id
+    ).subquery()
+
+    partnership_rows = db.execute(
+        select(
+            CompanyPartnershipModel.id.label("partnership_id"),
+            CompanyPartnershipModel.company_id,
+            CompanyModel.name.label("company_name"),
+            OrganizationModel.name.label("organization_name"),
+            CompanyPartnershipModel.partnership_type,
+            CompanyPartnershipModel.budget_committed,
+            CompanyPartnershipModel.budget_allocated,
+            CompanyPartnershipModel.active_from,
+            CompanyPartnershipModel.active_to,
+            func.coalesce(partnership_rollup.c.total_allocations, 0).label("total_allocations"),
+            func.coalesce(partnership_rollup.c.projects_funded, 0).label("projects_funded"),
+            func.coalesce(partnership_rollup.c.window_allocated, ZERO).label("window_allocated")
+        )
+        .join(CompanyModel, CompanyModel.id == CompanyPartnershipModel.company_id)
+        .join(OrganizationModel, OrganizationModel.id == CompanyPartnershipModel.organization_id)
+        .outerjoin(partnership_rollup, and_(
+            partnership_rollup.c.company_id == CompanyPartnershipModel.company_id,
+            partnership_rollup.c.organization_id == CompanyPartnershipModel.organization_id
+        ))
+        .where(CompanyPartnershipModel.company_id.in_(company_ids))
+        .order_by(CompanyPartnershipModel.company_id, CompanyPartnershipModel.created_at.desc())
+    ).all()
+
+    analytics = {
+        company.id: {
+            "company_id": company.id,
+            "company_name": company.name,
+            "window_days": window_days,
+            "total_budget_committed": ZERO,
+            "total_budget_allocated": ZERO,
+            "daily_burn_rate": ZERO,
+            "projected_depletion_date": None,
+            "fundings": [],
+            "partnerships": []
+        }
+        for company in companies
+    }
+
+    for row in funding_rows:
+        company = analytics[row.company_id]
+        allocated = row.allocated_budget or ZERO
+        remaining = row.max_budget - allocated
+        daily_burn_rate, depletion = _burn(remaining, row.window_allocated, window_days, today)
+        company["fundings"].append({
+            "funding_id": row.funding_id,
+            "project_id": row.project_id,
+            "project_name": row.project_name,
+            "organization_name": row.organization_name,
+            "status": row.status,
+            "max_budget": row.max_budget,
+            "allocated_budget": allocated,
+            "budget_remaining": remaining,
+            "utilization_percentage": _utilization(allocated, row.max_budget) or Decimal("0"),
+            "window_allocated": row.window_allocated,
+            "daily_burn_rate": daily_burn_rate,
+            "projected_depletion_date": depletion
+        })
+        # Window totals repeat on every row of the company's partition; read them once
+        if len(company["fundings"]) == 1:
+            committed = row.company_budget_committed
+            company_allocated = row.company_budget_allocated or ZERO
+            company["total_budget_committed"] = committed
+            company["total_budget_allocated"] = company_allocated
+            company["daily_burn_rate"], company["projected_depletion_date"] = _burn(
+                committed - company_allocated, row.company_window_allocated, window_days, today
+            )
+
+    for row in partnership_rows:
+        allocated = row.budget_allocated or ZERO
+        remaining = row.budget_committed - allocated if row.budget_committed is not None else None
+        daily_burn_rate, depletion = _burn(remaining, row.window_allocated, window_days, today)
+        analytics[row.company_id]["partnerships"].append({
+            "partnership_id": row.partnership_id,
+            "company_name": row.company_name,
+            "organization_name": row.organization_name,
+            "partnership_type": row.partnership_type,
+            "budget_committed": row.budget_committed,
+            "budget_allocated": allocated,
+            "budget_remaining": remaining,
+            "utilization_percentage": _utilization(allocated, row.budget_committed),
+            "active_from": row.active_from,
+            "active_to": row.active_to,
+            "status": _partnership_status(row.active_from, row.active_to, today),
+            "total_allocations": row.total_allocations,
+            "projects_funded": row.projects_funded,
+            "window_allocated": row.window_allocated,
+            "daily_burn_rate": daily_burn_rate,
+            "projected_depletion_date": depletion
+        })
+
+    return list(analytics.values())
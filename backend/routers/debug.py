@@ -0,0 +1,51 @@
+"""
+Debug endpoints
+Aggregated request profiles per route. Only mounted when PROFILING_ENABLED=true and
+PROFILE_TOKEN is set; every call needs a matching X-Profile-Token header.
+"""
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from typing import Optional
+
+from services.profiling import (
+    PROFILE_INTERVAL_SECONDS, PROFILE_MAX_CONCURRENT, PROFILE_MODE, PROFILE_OUTPUT_DIR,
+    PROFILE_SAMPLE_RATE, PROFILE_TOKEN, profiler
+)
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    if not PROFILE_TOKEN or not hmac.compare_digest((x_profile_token or "").encode(), PROFILE_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token")
+
+router = APIRouter(dependencies=[Depends(require_profile_token)])
+
+@router.get("/profile")
+def read_profile_summary(top: int = Query(10, ge=1, le=100)):
+    """Profiled requests per route and mode with their heaviest frames (samples for cpu, bytes for alloc)"""
+    return {
+        "sample_rate": PROFILE_SAMPLE_RATE,
+        "sample_mode": PROFILE_MODE,
+        "interval_ms": PROFILE_INTERVAL_SECONDS * 1000,
+        "max_concurrent": PROFILE_MAX_CONCURRENT,
+        "routes": profiler.summary(top)
+    }
+
+@router.get("/profile/folded")
+def read_profile_folded(
+    route: str = Query(..., description="Route template, e.g. /api/v1/volunteers/"),
+    mode: str = Query("cpu", pattern="^(cpu|alloc)$")
+):
+    """Collapsed stacks for one route, ready for flamegraph.pl, speedscope or inferno"""
+    folded = profiler.folded(mode, route)
+    if folded is None:
+        raise HTTPException(status_code=404, detail=f"No {mode} profile recorded for {route}")
+    return Response(content=folded, media_type="text/plain")
+
+@router.post("/profile/dump")
+def dump_profiles():
+    """Write every route's collapsed stacks to PROFILE_OUTPUT_DIR"""
+    return {"directory": PROFILE_OUTPUT_DIR, "files": profiler.dump(PROFILE_OUTPUT_DIR)}
+
+@router.delete("/profile")
+def reset_profiles():
+    profiler.reset()
+    return {"message": "Profiles cleared"}
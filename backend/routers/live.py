@@ -0,0 +1,62 @@
+"""
+Live update endpoints
+Server-sent events for dashboards and check-in screens, replacing polling
+"""
+import json
+import os
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List
+
+from services.live_updates import live_broker, parse_topic
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    topics: List[str] = Query(..., min_length=1, max_length=50, description="activity:<id>, volunteer:<id> or project:<id>")
+):
+    """
+    Stream changes for the given topics as server-sent events
+    
+    - activity:<id>: attendance changes (roster and check-in screens)
+    - volunteer:<id>: attendance, credit and allocation changes (dashboard)
+    - project:<id>: allocations to the project
+    
+    Events name the changed row; bursts on one topic are coalesced into the latest event
+    (`coalesced` says how many changes it stands for), so clients refetch at most once per burst.
+    """
+    try:
+        topics = [parse_topic(topic) for topic in topics]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    subscription = live_broker.subscribe(topics)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(HEARTBEAT_SECONDS)
+                if not batch:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                for event in batch:
+                    yield f"event: {event.get('kind', 'update')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            live_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+async def get_live_stats():
+    """Listener state and subscriber counts for this API worker"""
+    return live_broker.stats()
@@ -0,0 +1,160 @@
+"""
+Notification endpoints
+Region fan-out is a single INSERT ... SELECT; unread counts are read from
+profiles.unread_notifications, which statement-level triggers keep current
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import insert, select, update, literal, Text
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+
+from database.connection import get_db
+from database.models import (
+    Notification as NotificationModel,
+    Profile as ProfileModel,
+    Region as RegionModel,
+    Volunteer as VolunteerModel
+)
+from schemas import (
+    Notification, NotificationCreate, NotificationUpdate, NotificationsResponse,
+    NotificationFanOut, NotificationFanOutResult, NotificationMarkRead, NotificationMarkReadResult,
+    UnreadNotificationCount
+)
+
+router = APIRouter()
+
+def _ensure_volunteer(db: Session, volunteer_id: UUID):
+    if not db.query(VolunteerModel.id).filter(VolunteerModel.id == volunteer_id).first():
+        raise HTTPException(status_code=404, detail="Volunteer not found")
+
+def _unread_count(db: Session, volunteer_id: UUID) -> int:
+    count = db.query(ProfileModel.unread_notifications).filter(ProfileModel.volunteer_id == volunteer_id).scalar()
+    return count or 0
+
+@router.post("/", response_model=Notification)
+def create_notification(
+    notification: NotificationCreate,
+    db: Session = Depends(get_db)
+):
+    _ensure_volunteer(db, notification.volunteer_id)
+    
+    db_notification = NotificationModel(**notification.model_dump())
+    db.add(db_notification)
+    db.commit()
+    db.refresh(db_notification)
+    return db_notification
+
+@router.post("/fan-out", response_model=NotificationFanOutResult)
+def fan_out_notification(
+    fan_out: NotificationFanOut,
+    db: Session = Depends(get_db)
+):
+    """Send one message to every volunteer in a region with a single statement"""
+    region = db.query(RegionModel.id).filter(RegionModel.id == fan_out.region_id).first()
+    if not region:
+        raise HTTPException(status_code=404, detail="Region not found")
+    
+    # include_defaults=False: ids and timestamps come from the database defaults,
+    # a Python-side uuid default would be evaluated once for every row
+    result = db.execute(
+        insert(NotificationModel).from_select(
+            ["volunteer_id", "message"],
+            select(VolunteerModel.id, literal(fan_out.message, Text)).where(
+                VolunteerModel.region_id == fan_out.region_id
+            ),
+            include_defaults=False
+        )
+    )
+    db.commit()
+    return {"region_id": fan_out.region_id, "recipients": result.rowcount}
+
+@router.get("/volunteer/{volunteer_id}", response_model=NotificationsResponse)
+def read_inbox(
+    volunteer_id: UUID,
+    unread_only: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """A volunteer's notifications, newest first"""
+    _ensure_volunteer(db, volunteer_id)
+    unread_count = _unread_count(db, volunteer_id)
+    
+    query = db.query(NotificationModel).filter(NotificationModel.volunteer_id == volunteer_id)
+    if unread_only:
+        # `read = false` (not `IS false`) so the planner uses the partial unread index
+        query = query.filter(NotificationModel.read == False)  # noqa: E712
+        total = unread_count
+    else:
+        total = query.count()
+    
+    notifications = query.order_by(NotificationModel.created_at.desc()).offset(skip).limit(limit).all()
+    
+    return {
+        "notifications": notifications,
+        "total": total,
+        "unread_count": unread_count,
+        "page": (skip // limit) + 1,
+        "per_page": limit
+    }
+
+@router.get("/volunteer/{volunteer_id}/unread-count", response_model=UnreadNotificationCount)
+def get_unread_count(volunteer_id: UUID, db: Session = Depends(get_db)):
+    _ensure_volunteer(db, volunteer_id)
+    return {"volunteer_id": volunteer_id, "unread_count": _unread_count(db, volunteer_id)}
+
+@router.post("/volunteer/{volunteer_id}/mark-read", response_model=NotificationMarkReadResult)
+def mark_notifications_read(
+    volunteer_id: UUID,
+    selection: Optional[NotificationMarkRead] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Mark notifications read in one statement
+    Restrict to `notification_ids` and/or to notifications created up to `before`;
+    with neither, the whole inbox is marked read
+    """
+    _ensure_volunteer(db, volunteer_id)
+    selection = selection or NotificationMarkRead()
+    
+    stmt = update(NotificationModel).where(
+        NotificationModel.volunteer_id == volunteer_id,
+        NotificationModel.read == False  # noqa: E712
+    )
+    if selection.notification_ids:
+        stmt = stmt.where(NotificationModel.id.in_(selection.notification_ids))
+    if selection.before:
+        stmt = stmt.where(NotificationModel.created_at <= selection.before)
+    
+    result = db.execute(stmt.values(read=True).execution_options(synchronize_session=False))
+    db.commit()
+    return {"updated": result.rowcount, "unread_count": _unread_count(db, volunteer_id)}
+
+@router.put("/{notification_id}", response_model=Notification)
+def update_notification(
+    notification_id: UUID,
+    updates: NotificationUpdate,
+    db: Session = Depends(get_db)
+):
+    db_notification = db.query(NotificationModel).filter(NotificationModel.id == notification_id).first()
+    if not db_notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    
+    update_data = updates.model_dump(exclude_unset=True, exclude_none=True)
+    for field, value in update_data.items():
+        setattr(db_notification, field, value)
+    
+    db.commit()
+    db.refresh(db_notification)
+    return db_notification
+
+@router.delete("/{notification_id}")
+def delete_notification(notification_id: UUID, db: Session = Depends(get_db)):
+    db_notification = db.query(NotificationModel).filter(NotificationModel.id == notification_id).first()
+    if not db_notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    
+    db.delete(db_notification)
+    db.commit()
+    return {"message": "Notification deleted successfully"}
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
 from database.connection import get_db
 from database.models import Organization as OrganizationModel
-from schemas import Organization, OrganizationCreate, OrganizationUpdate
+from schemas import Organization, OrganizationCreate, OrganizationUpdate, OrganizationBulkItem, BulkMode, BulkResult
+from bulk import BULK_MAX_ITEMS, bulk_write
 
 router = APIRouter()
 
@@ -20,6 +21,15 @@ def create_organization(
     db.refresh(db_organization)
     return db_organization
 
+@router.post("/bulk", response_model=BulkResult)
+def bulk_write_organizations(
+    organizations: List[OrganizationBulkItem] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    mode: BulkMode = BulkMode.CREATE,
+    db: Session = Depends(get_db)
+):
+    """Create or upsert (by id) many organizations in one transaction"""
+    return bulk_write(db, OrganizationModel, organizations, mode, errors={})
+
 @router.get("/", response_model=List[Organization])
 def read_organizations(
     skip: int = Query(0, ge=0),
@@ -109,6 +109,14 @@ def update_partnership(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
+    # budget_allocated is maintained from allocations by database triggers
+    if update_data.get("budget_committed") is not None and partnership.budget_allocated is not None:
+        if update_data["budget_committed"] < partnership.budget_allocated:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Committed budget cannot be less than already allocated budget ({partnership.budget_allocated})"
+            )
+    
     for field, value in update_data.items():
         setattr(partnership, field, value)
     
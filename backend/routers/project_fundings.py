@@ -13,9 +13,12 @@ from database.connection import get_db
 from database.models import (
     ProjectCompanyFunding as ProjectCompanyFundingModel, 
     Project as ProjectModel,
-    Company as CompanyModel
+    Company as CompanyModel,
+    Organization as OrganizationModel
 )
 from schemas import ProjectCompanyFunding, ProjectCompanyFundingCreate, ProjectCompanyFundingUpdate
+from money import ZERO, to_money
+from services.eligibility import eligibility_cache
 
 router = APIRouter()
 
@@ -54,6 +57,7 @@ def approve_project_funding(
     db.add(db_funding)
     db.commit()
     db.refresh(db_funding)
+    eligibility_cache.invalidate_region(project.region_id)
     return db_funding
 
 @router.get("/", response_model=List[ProjectCompanyFunding])
@@ -121,6 +125,7 @@ def update_project_funding(
     
     db.commit()
     db.refresh(funding)
+    eligibility_cache.invalidate_region(funding.project.region_id)
     return funding
 
 @router.delete("/{funding_id}")
@@ -133,15 +138,18 @@ def revoke_project_funding(funding_id: UUID, db: Session = Depends(get_db)):
     if not funding:
         raise HTTPException(status_code=404, detail="Project funding not found")
     
+    region_id = funding.project.region_id
     if funding.allocated_budget > 0:
         # Don't delete if money has been allocated, just deactivate
         funding.status = "CANCELLED"
         db.commit()
+        eligibility_cache.invalidate_region(region_id)
         return {"message": "Project funding cancelled (existing allocations preserved)"}
     else:
         # Safe to delete if no allocations made yet
         db.delete(funding)
         db.commit()
+        eligibility_cache.invalidate_region(region_id)
         return {"message": "Project funding revoked"}
 
 @router.get("/company/{company_id}/approved-projects")
@@ -154,19 +162,30 @@ def get_company_approved_projects(
     Get all projects that a company has pre-approved for funding
     Used by allocation logic to validate funding availability
     """
-    query = db.query(ProjectCompanyFundingModel).join(ProjectModel).filter(
+    # Names and company totals come back with the rows: one statement, no lazy loads
+    rows = db.query(
+        ProjectCompanyFundingModel,
+        ProjectModel.name.label("project_name"),
+        OrganizationModel.name.label("organization_name"),
+        func.sum(ProjectCompanyFundingModel.max_budget).over().label("total_budget_committed"),
+        func.sum(ProjectCompanyFundingModel.allocated_budget).over().label("total_budget_allocated")
+    ).join(
+        ProjectModel, ProjectModel.id == ProjectCompanyFundingModel.project_id
+    ).join(
+        OrganizationModel, OrganizationModel.id == ProjectModel.ngo_id
+    ).filter(
         ProjectCompanyFundingModel.company_id == company_id,
         ProjectCompanyFundingModel.status == status
-    )
+    ).all()
     
     approved_projects = []
-    for funding in query.all():
+    for funding, project_name, organization_name, _, _ in rows:
         budget_remaining = funding.max_budget - funding.allocated_budget
         approved_projects.append({
             "funding_id": funding.id,
             "project_id": funding.project_id,
-            "project_name": funding.project.name,
-            "organization_name": funding.project.ngo.name,
+            "project_name": project_name,
+            "organization_name": organization_name,
             "max_budget": funding.max_budget,
             "allocated_budget": funding.allocated_budget,
             "budget_remaining": budget_remaining,
@@ -179,8 +198,8 @@ def get_company_approved_projects(
         "company_id": company_id,
         "approved_projects": approved_projects,
         "total_approved": len(approved_projects),
-        "total_budget_committed": sum(p["max_budget"] for p in approved_projects),
-        "total_budget_allocated": sum(p["allocated_budget"] for p in approved_projects)
+        "total_budget_committed": rows[0].total_budget_committed if rows else ZERO,
+        "total_budget_allocated": rows[0].total_budget_allocated if rows else ZERO
     }
 
 @router.post("/validate-allocation")
@@ -194,6 +213,7 @@ def validate_allocation_funding(
     Validate if a company can fund a specific allocation amount for a project
     Used by allocation creation logic
     """
+    amount = to_money(amount)
     funding = db.query(ProjectCompanyFundingModel).filter(
         ProjectCompanyFundingModel.project_id == project_id,
         ProjectCompanyFundingModel.company_id == company_id,
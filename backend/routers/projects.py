@@ -1,14 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
+from datetime import date, datetime, timezone
 
 from database.connection import get_db
-from database.models import Project as ProjectModel
-from schemas import Project, ProjectCreate, ProjectUpdate, ProjectsResponse
+from database.models import (
+    Project as ProjectModel, ProjectAllocationDaily as ProjectAllocationDailyModel,
+    Organization as OrganizationModel, Region as RegionModel, AllocationKind
+)
+from schemas import (
+    Project, ProjectCreate, ProjectUpdate, ProjectsResponse,
+    ProjectLeaderboard, ProjectAllocationTimeseries,
+    ProjectBulkItem, BulkMode, BulkResult
+)
+from money import money_sum
+from bulk import BULK_MAX_ITEMS, bulk_write, missing_ids
+from services.eligibility import eligibility_cache
 
 router = APIRouter()
 
+def _resolve_window(start_date: Optional[date], end_date: Optional[date]):
+    """Default to the current calendar month (UTC, same bucketing as the rollup)"""
+    today = datetime.now(timezone.utc).date()
+    start_date = start_date or today.replace(day=1)
+    end_date = end_date or today
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must be on or after start_date")
+    return start_date, end_date
+
 @router.post("/", response_model=Project)
 def create_project(
     project: ProjectCreate,
@@ -18,8 +39,36 @@ def create_project(
     db.add(db_project)
     db.commit()
     db.refresh(db_project)
+    eligibility_cache.invalidate_region(db_project.region_id)
     return db_project
 
+@router.post("/bulk", response_model=BulkResult)
+def bulk_write_projects(
+    projects: List[ProjectBulkItem] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    mode: BulkMode = BulkMode.CREATE,
+    db: Session = Depends(get_db)
+):
+    """Create or upsert (by id) many projects in one transaction, with a status per item"""
+    missing_ngos = missing_ids(db, OrganizationModel, (p.ngo_id for p in projects))
+    missing_regions = missing_ids(db, RegionModel, (p.region_id for p in projects))
+    errors = {}
+    for index, project in enumerate(projects):
+        if project.ngo_id in missing_ngos:
+            errors[index] = "NGO not found"
+        elif project.region_id in missing_regions:
+            errors[index] = "Region not found"
+    
+    # Upserts can move a project out of a region; its old region's catalog goes stale too
+    regions = {p.region_id for p in projects}
+    if mode == BulkMode.UPSERT:
+        ids = [p.id for p in projects if p.id is not None]
+        if ids:
+            regions.update(r for (r,) in db.query(ProjectModel.region_id).filter(ProjectModel.id.in_(ids)).distinct())
+    
+    result = bulk_write(db, ProjectModel, projects, mode, errors)
+    eligibility_cache.invalidate_region(*regions)
+    return result
+
 @router.get("/", response_model=ProjectsResponse)
 def read_projects(
     skip: int = Query(0, ge=0),
@@ -37,7 +86,9 @@ def read_projects(
         query = query.filter(ProjectModel.ngo_id == ngo_id)
     
     total = query.count()
-    projects = query.offset(skip).limit(limit).all()
+    projects = query.options(
+        joinedload(ProjectModel.ngo), joinedload(ProjectModel.region)
+    ).offset(skip).limit(limit).all()
     
     return {
         "projects": projects,
@@ -46,6 +97,97 @@ def read_projects(
         "per_page": limit
     }
 
+@router.get("/leaderboard", response_model=ProjectLeaderboard)
+def get_project_leaderboard(
+    region_id: Optional[UUID] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    company_id: Optional[UUID] = None,
+    kind: Optional[AllocationKind] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Top projects by credits received in a time window
+    Reads the project_allocation_daily rollup, never the allocations table
+    """
+    start_date, end_date = _resolve_window(start_date, end_date)
+    
+    total_amount = money_sum(ProjectAllocationDailyModel.total_amount).label("total_amount")
+    query = db.query(
+        ProjectAllocationDailyModel.project_id,
+        ProjectModel.name.label("project_name"),
+        ProjectAllocationDailyModel.region_id,
+        func.sum(ProjectAllocationDailyModel.allocation_count).label("allocation_count"),
+        total_amount
+    ).join(
+        ProjectModel, ProjectModel.id == ProjectAllocationDailyModel.project_id
+    ).filter(
+        ProjectAllocationDailyModel.day >= start_date,
+        ProjectAllocationDailyModel.day <= end_date
+    )
+    
+    if region_id:
+        query = query.filter(ProjectAllocationDailyModel.region_id == region_id)
+    
+    if company_id:
+        query = query.filter(ProjectAllocationDailyModel.company_id == company_id)
+    
+    if kind:
+        query = query.filter(ProjectAllocationDailyModel.kind == kind)
+    
+    rows = query.group_by(
+        ProjectAllocationDailyModel.project_id, ProjectModel.name, ProjectAllocationDailyModel.region_id
+    ).having(
+        func.sum(ProjectAllocationDailyModel.allocation_count) > 0
+    ).order_by(total_amount.desc()).limit(limit).all()
+    
+    return {
+        "region_id": region_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "projects": [row._mapping for row in rows]
+    }
+
+@router.get("/{project_id}/allocation-timeseries", response_model=ProjectAllocationTimeseries)
+def get_project_allocation_timeseries(
+    project_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    company_id: Optional[UUID] = None,
+    kind: Optional[AllocationKind] = None,
+    db: Session = Depends(get_db)
+):
+    """Credits received per day by one project (days without allocations are omitted)"""
+    start_date, end_date = _resolve_window(start_date, end_date)
+    
+    query = db.query(
+        ProjectAllocationDailyModel.day,
+        func.sum(ProjectAllocationDailyModel.allocation_count).label("allocation_count"),
+        money_sum(ProjectAllocationDailyModel.total_amount).label("total_amount")
+    ).filter(
+        ProjectAllocationDailyModel.project_id == project_id,
+        ProjectAllocationDailyModel.day >= start_date,
+        ProjectAllocationDailyModel.day <= end_date
+    )
+    
+    if company_id:
+        query = query.filter(ProjectAllocationDailyModel.company_id == company_id)
+    
+    if kind:
+        query = query.filter(ProjectAllocationDailyModel.kind == kind)
+    
+    rows = query.group_by(ProjectAllocationDailyModel.day).having(
+        func.sum(ProjectAllocationDailyModel.allocation_count) > 0
+    ).order_by(ProjectAllocationDailyModel.day).all()
+    
+    return {
+        "project_id": project_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "points": [row._mapping for row in rows]
+    }
+
 @router.get("/{project_id}", response_model=Project)
 def read_project(project_id: UUID, db: Session = Depends(get_db)):
     project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
@@ -63,12 +205,14 @@ def update_project(
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    previous_region_id = db_project.region_id
     project_data = project.model_dump(exclude_unset=True)
     for key, value in project_data.items():
         setattr(db_project, key, value)
     
     db.commit()
     db.refresh(db_project)
+    eligibility_cache.invalidate_region(previous_region_id, db_project.region_id)
     return db_project
 
 @router.delete("/{project_id}")
@@ -77,6 +221,8 @@ def delete_project(project_id: UUID, db: Session = Depends(get_db)):
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    region_id = project.region_id
     db.delete(project)
     db.commit()
+    eligibility_cache.invalidate_region(region_id)
     return {"message": "Project deleted successfully"}
\ No newline at end of file
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
 from database.connection import get_db
 from database.models import Region as RegionModel
-from schemas import Region, RegionCreate, RegionUpdate
+from schemas import Region, RegionCreate, RegionUpdate, RegionBulkItem, BulkMode, BulkResult
+from bulk import BULK_MAX_ITEMS, bulk_write
 
 router = APIRouter()
 
@@ -25,6 +26,15 @@ def create_region(
     db.refresh(db_region)
     return db_region
 
+@router.post("/bulk", response_model=BulkResult)
+def bulk_write_regions(
+    regions: List[RegionBulkItem] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    mode: BulkMode = BulkMode.CREATE,
+    db: Session = Depends(get_db)
+):
+    """Create or upsert many regions in one transaction; regions are matched by name, not id"""
+    return bulk_write(db, RegionModel, regions, mode, errors={}, key="name")
+
 @router.get("/", response_model=List[Region])
 def read_regions(
     skip: int = Query(0, ge=0),
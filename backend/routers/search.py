@@ -0,0 +1,115 @@
+"""
+Search endpoints
+Projects, organizations and activities are matched with full-text search (the generated
+search_vector columns) or, for typos, trigram word similarity on their names and
+locations. Both are served by GIN indexes. Hits are ranked by text rank plus
+similarity and paginated with a keyset cursor on (rank, type, id) instead of an offset,
+so a page never repeats or skips hits that moved while the client was paging.
+"""
+import base64
+import binascii
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+
+from database.connection import get_db
+from schemas import SearchResults, SearchType
+
+router = APIRouter()
+
+# Each branch yields (type, id, title, subtitle, region_id, ngo_id, starts_at, rank). ts_rank_cd
+# with normalization 32 is scaled to 0..1 like word_similarity, so the two add up comparably
+SEARCH_BRANCHES = {
+    SearchType.PROJECT: """
+        SELECT 'project' AS type, p.id, p.name AS title, o.name AS subtitle,
+               p.region_id, p.ngo_id, NULL::timestamptz AS starts_at,
+               (ts_rank_cd(p.search_vector, websearch_to_tsquery('english', :q), 32)
+                + word_similarity(:q, p.name))::float8 AS rank
+        FROM projects p
+        JOIN organizations o ON o.id = p.ngo_id
+        WHERE (p.search_vector @@ websearch_to_tsquery('english', :q) OR :q <% p.name)
+    """,
+    SearchType.ORGANIZATION: """
+        SELECT 'organization' AS type, o.id, o.name AS title, o.type::text AS subtitle,
+               NULL::uuid AS region_id, o.id AS ngo_id, NULL::timestamptz AS starts_at,
+               (ts_rank_cd(o.search_vector, websearch_to_tsquery('english', :q), 32)
+                + word_similarity(:q, o.name))::float8 AS rank
+        FROM organizations o
+        WHERE (o.search_vector @@ websearch_to_tsquery('english', :q) OR :q <% o.name)
+    """,
+    SearchType.ACTIVITY: """
+        SELECT 'activity' AS type, a.id, p.name AS title, a.location AS subtitle,
+               p.region_id, p.ngo_id, a.starts_at,
+               (ts_rank_cd(a.search_vector, websearch_to_tsquery('simple', :q), 32)
+                + word_similarity(:q, coalesce(a.location, '')))::float8 AS rank
+        FROM activities a
+        JOIN projects p ON p.id = a.project_id
+        WHERE (a.search_vector @@ websearch_to_tsquery('simple', :q) OR :q <% a.location)
+    """
+}
+
+# Filters per branch; organizations have no region of their own, they match one they run projects in
+REGION_FILTERS = {
+    SearchType.PROJECT: "p.region_id = :region_id",
+    SearchType.ORGANIZATION: "EXISTS (SELECT 1 FROM projects rp WHERE rp.ngo_id = o.id AND rp.region_id = :region_id)",
+    SearchType.ACTIVITY: "p.region_id = :region_id"
+}
+NGO_FILTERS = {
+    SearchType.PROJECT: "p.ngo_id = :ngo_id",
+    SearchType.ORGANIZATION: "o.id = :ngo_id",
+    SearchType.ACTIVITY: "p.ngo_id = :ngo_id"
+}
+
+def encode_cursor(hit) -> str:
+    raw = json.dumps([hit["rank"], hit["type"], str(hit["id"])]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        rank, type_, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), SearchType(type_).value, UUID(id_)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/", response_model=SearchResults)
+def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    types: List[SearchType] = Query(list(SearchType)),
+    region_id: Optional[UUID] = None,
+    ngo_id: Optional[UUID] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Ranked matches across projects, organizations and activities, best first"""
+    params = {"q": q, "region_id": region_id, "ngo_id": ngo_id, "limit": limit + 1}
+    branches = []
+    for search_type in dict.fromkeys(types):
+        sql = SEARCH_BRANCHES[search_type]
+        if region_id:
+            sql += f" AND {REGION_FILTERS[search_type]}"
+        if ngo_id:
+            sql += f" AND {NGO_FILTERS[search_type]}"
+        branches.append(sql)
+    
+    keyset = ""
+    if cursor:
+        params["after_rank"], params["after_type"], params["after_id"] = decode_cursor(cursor)
+        keyset = "WHERE (rank, type, id) < (:after_rank, :after_type, :after_id)"
+    
+    union = " UNION ALL ".join(branches)
+    rows = db.execute(text(f"""
+        SELECT * FROM ({union}) hits
+        {keyset}
+        ORDER BY rank DESC, type DESC, id DESC
+        LIMIT :limit
+    """), params).all()
+    
+    hits = [row._mapping for row in rows[:limit]]
+    return {
+        "results": hits,
+        "next_cursor": encode_cursor(hits[-1]) if len(rows) > limit else None
+    }
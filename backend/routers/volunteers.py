@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from uuid import UUID
 
@@ -10,6 +10,7 @@ from schemas import (
     Volunteer, VolunteerCreate, VolunteerUpdate, VolunteersResponse,
     Profile, ImpactDashboard
 )
+from services.eligibility import eligibility_cache
 
 router = APIRouter()
 
@@ -50,7 +51,7 @@ def read_volunteers(
         query = query.filter(VolunteerModel.region_id == region_id)
     
     total = query.count()
-    volunteers = query.offset(skip).limit(limit).all()
+    volunteers = query.options(joinedload(VolunteerModel.region)).offset(skip).limit(limit).all()
     
     return {
         "volunteers": volunteers,
@@ -82,6 +83,7 @@ def update_volunteer(
     
     db.commit()
     db.refresh(db_volunteer)
+    eligibility_cache.invalidate_volunteer(volunteer_id)
     return db_volunteer
 
 @router.delete("/{volunteer_id}")
@@ -92,6 +94,7 @@ def delete_volunteer(volunteer_id: UUID, db: Session = Depends(get_db)):
     
     db.delete(volunteer)
     db.commit()
+    eligibility_cache.invalidate_volunteer(volunteer_id)
     return {"message": "Volunteer deleted successfully"}
 
 @router.get("/{volunteer_id}/profile", response_model=Profile)
@@ -103,7 +106,7 @@ def read_volunteer_profile(volunteer_id: UUID, db: Session = Depends(get_db)):
 
 @router.get("/{volunteer_id}/dashboard", response_model=ImpactDashboard)
 def read_volunteer_dashboard(volunteer_id: UUID, db: Session = Depends(get_db)):
-    
+
     # Use the impact_dashboard view
     result = db.execute(
         text("""
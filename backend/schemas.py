@@ -1,10 +1,12 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from uuid import UUID
 import enum
 
+from money import Money, ZERO
+
 # Enum definitions for schemas
 class ActivityStatus(str, enum.Enum):
     SCHEDULED = "Scheduled"
@@ -19,6 +21,7 @@ class AttendanceStatus(str, enum.Enum):
     PENDING = "Pending"
     VERIFIED = "Verified"
     REJECTED = "Rejected"
+    WAITLISTED = "Waitlisted"
 
 class CreditStatus(str, enum.Enum):
     AVAILABLE = "Available"
@@ -29,6 +32,29 @@ class AllocationKind(str, enum.Enum):
     MANDATORY_50 = "MANDATORY_50"
     FREE_CHOICE_50 = "FREE_CHOICE_50"
 
+class BrandEventType(str, enum.Enum):
+    IMPRESSION = "Impression"
+    CLICK = "Click"
+
+class CalendarInterval(str, enum.Enum):
+    WEEK = "week"
+    MONTH = "month"
+
+class BulkMode(str, enum.Enum):
+    CREATE = "create"
+    UPSERT = "upsert"
+
+class BulkItemStatus(str, enum.Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    EXISTS = "exists"
+    ERROR = "error"
+
+class SearchType(str, enum.Enum):
+    PROJECT = "project"
+    ORGANIZATION = "organization"
+    ACTIVITY = "activity"
+
 # Base schemas
 class RegionBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -109,8 +135,8 @@ class Volunteer(VolunteerBase):
 # Profile schemas
 class ProfileBase(BaseModel):
     total_hours: Decimal = Field(default=Decimal('0.00'), ge=0)
-    total_credits_earned: Decimal = Field(default=Decimal('0.00'), ge=0)
-    total_credits_allocated: Decimal = Field(default=Decimal('0.00'), ge=0)
+    total_credits_earned: Money = Field(default=ZERO, ge=0)
+    total_credits_allocated: Money = Field(default=ZERO, ge=0)
 
 class ProfileUpdate(ProfileBase):
     pass
@@ -119,6 +145,7 @@ class Profile(ProfileBase):
     model_config = ConfigDict(from_attributes=True)
     
     volunteer_id: UUID
+    unread_notifications: int = 0
     updated_at: datetime
 
 # Project schemas
@@ -146,12 +173,38 @@ class Project(ProjectBase):
     ngo: Optional[Organization] = None
     region: Optional[Region] = None
 
+class ProjectLeaderboardEntry(BaseModel):
+    project_id: UUID
+    project_name: str
+    region_id: UUID
+    allocation_count: int
+    total_amount: Money
+
+class ProjectLeaderboard(BaseModel):
+    region_id: Optional[UUID]
+    start_date: date
+    end_date: date
+    projects: List[ProjectLeaderboardEntry]
+
+class ProjectAllocationPoint(BaseModel):
+    day: date
+    allocation_count: int
+    total_amount: Money
+
+class ProjectAllocationTimeseries(BaseModel):
+    project_id: UUID
+    start_date: date
+    end_date: date
+    points: List[ProjectAllocationPoint]
+
 # Activity schemas
 class ActivityBase(BaseModel):
     project_id: UUID
     starts_at: datetime
     ends_at: datetime
     location: Optional[str] = Field(None, max_length=255)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     capacity: Optional[int] = Field(None, gt=0)
     status: ActivityStatus = ActivityStatus.SCHEDULED
 
@@ -163,6 +216,8 @@ class ActivityUpdate(BaseModel):
     starts_at: Optional[datetime] = None
     ends_at: Optional[datetime] = None
     location: Optional[str] = Field(None, max_length=255)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     capacity: Optional[int] = Field(None, gt=0)
     status: Optional[ActivityStatus] = None
 
@@ -170,10 +225,41 @@ class Activity(ActivityBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: UUID
+    registered_count: int = 0
     created_at: datetime
     updated_at: datetime
     project: Optional[Project] = None
 
+class NearbyActivity(BaseModel):
+    activity: Activity
+    distance_m: float
+
+class ActivityCalendarBucket(BaseModel):
+    bucket_start: datetime
+    activities: int
+    scheduled: int
+    cancelled: int
+    capacity: Optional[int] = None  # Seats across activities with a capacity; None if all are unlimited
+    registered: int
+
+class ActivitySummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    activity_id: UUID
+    starts_at: datetime
+    ends_at: datetime
+    location: Optional[str]
+    capacity: Optional[int]
+    status: ActivityStatus
+    project_name: str
+    organization_name: str
+    region_name: str
+    registered_volunteers: int
+    verified_attendances: int
+    waitlisted_volunteers: int
+    checked_in_volunteers: int
+    credits_minted: Money
+
 # Attendance schemas
 class AttendanceBase(BaseModel):
     volunteer_id: UUID
@@ -201,11 +287,19 @@ class Attendance(AttendanceBase):
     volunteer: Optional[Volunteer] = None
     activity: Optional[Activity] = None
 
+class ScheduleConflict(BaseModel):
+    attendance_id: UUID
+    activity_id: UUID
+    status: AttendanceStatus
+    starts_at: datetime
+    ends_at: datetime
+    project_name: str
+
 # VoloCredit schemas
 class VoloCreditBase(BaseModel):
     volunteer_id: UUID
     source_attendance_id: Optional[UUID] = None
-    amount: Decimal = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     status: CreditStatus = CreditStatus.AVAILABLE
     granted_at: Optional[datetime] = None
     expires_at: Optional[datetime] = None
@@ -214,7 +308,7 @@ class VoloCreditCreate(VoloCreditBase):
     pass
 
 class VoloCreditUpdate(BaseModel):
-    amount: Optional[Decimal] = Field(None, gt=0)
+    amount: Optional[Money] = Field(None, gt=0)
     status: Optional[CreditStatus] = None
     expires_at: Optional[datetime] = None
 
@@ -232,6 +326,7 @@ class BrandMessageBase(BaseModel):
     image_url: Optional[str] = Field(None, max_length=500)
     active_from: Optional[datetime] = None
     active_to: Optional[datetime] = None
+    weight: int = Field(1, ge=1, le=1000)
 
 class BrandMessageCreate(BrandMessageBase):
     pass
@@ -241,29 +336,77 @@ class BrandMessageUpdate(BaseModel):
     image_url: Optional[str] = Field(None, max_length=500)
     active_from: Optional[datetime] = None
     active_to: Optional[datetime] = None
+    weight: Optional[int] = Field(None, ge=1, le=1000)
 
 class BrandMessage(BrandMessageBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: UUID
+    impression_count: int = 0
     created_at: datetime
     updated_at: datetime
     company: Optional[Company] = None
 
+class ActiveBrandMessage(BaseModel):
+    """Brand message as held by the in-process active-window index"""
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+    
+    id: UUID
+    company_id: UUID
+    content: str
+    image_url: Optional[str] = None
+    active_from: Optional[datetime] = None
+    active_to: Optional[datetime] = None
+    weight: int = 1
+
+class BrandMessageEvent(BaseModel):
+    brand_message_id: UUID
+    event_type: BrandEventType = BrandEventType.IMPRESSION
+    occurred_at: Optional[datetime] = None
+
+class BrandMessageEventBatch(BaseModel):
+    events: List[BrandMessageEvent] = Field(..., min_length=1, max_length=1000)
+
+class BrandMessageEventsAccepted(BaseModel):
+    accepted: int
+    pending: int
+
+class BrandMessageStatsPoint(BaseModel):
+    hour: datetime
+    impressions: int
+    clicks: int
+
+class BrandMessageStatsEntry(BaseModel):
+    brand_message_id: UUID
+    content: str
+    impressions: int
+    clicks: int
+    click_through_rate: Optional[Decimal] = None
+
+class BrandMessageStats(BaseModel):
+    company_id: UUID
+    start: datetime
+    end: datetime
+    impressions: int
+    clicks: int
+    click_through_rate: Optional[Decimal] = None
+    messages: List[BrandMessageStatsEntry]
+    hourly: List[BrandMessageStatsPoint]
+
 # Allocation schemas
 class AllocationBase(BaseModel):
     volunteer_id: UUID
     project_id: UUID
     company_id: Optional[UUID] = None
     source_credit_id: Optional[UUID] = None
-    amount: Decimal = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     kind: AllocationKind
 
 class AllocationCreate(AllocationBase):
     pass
 
 class AllocationUpdate(BaseModel):
-    amount: Optional[Decimal] = Field(None, gt=0)
+    amount: Optional[Money] = Field(None, gt=0)
     kind: Optional[AllocationKind] = None
 
 class Allocation(AllocationBase):
@@ -275,6 +418,27 @@ class Allocation(AllocationBase):
     project: Optional[Project] = None
     company: Optional[Company] = None
 
+# Free-choice eligibility schemas
+class EligibleFunding(BaseModel):
+    company_id: UUID
+    company_name: str
+    max_budget: Money
+    allocated_budget: Money
+    remaining_budget: Money
+
+class EligibleProject(BaseModel):
+    project_id: UUID
+    name: str
+    description: Optional[str] = None
+    ngo_id: UUID
+    ngo_name: str
+    fundings: List[EligibleFunding] = []
+
+class AllocationEligibility(BaseModel):
+    volunteer_id: UUID
+    region_id: UUID
+    projects: List[EligibleProject]
+
 # Notification schemas
 class NotificationBase(BaseModel):
     volunteer_id: UUID
@@ -293,6 +457,27 @@ class Notification(NotificationBase):
     id: UUID
     created_at: datetime
 
+class NotificationFanOut(BaseModel):
+    region_id: UUID
+    message: str = Field(..., min_length=1)
+
+class NotificationFanOutResult(BaseModel):
+    region_id: UUID
+    recipients: int
+
+class NotificationMarkRead(BaseModel):
+    # Neither given: mark the whole inbox read
+    notification_ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=1000)
+    before: Optional[datetime] = None
+
+class NotificationMarkReadResult(BaseModel):
+    updated: int
+    unread_count: int
+
+class UnreadNotificationCount(BaseModel):
+    volunteer_id: UUID
+    unread_count: int
+
 # Dashboard schemas
 class ImpactDashboard(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -300,8 +485,8 @@ class ImpactDashboard(BaseModel):
     volunteer_id: UUID
     volunteer_name: str
     total_hours: Optional[Decimal]
-    total_credits_earned: Optional[Decimal]
-    total_credits_allocated: Optional[Decimal]
+    total_credits_earned: Optional[Money]
+    total_credits_allocated: Optional[Money]
     projects_supported: int
     region_name: str
 
@@ -330,12 +515,63 @@ class AttendancesResponse(BaseModel):
     page: int
     per_page: int
 
+class NotificationsResponse(BaseModel):
+    notifications: List[Notification]
+    total: int
+    unread_count: int
+    page: int
+    per_page: int
+
+# Search schemas
+class SearchHit(BaseModel):
+    type: SearchType
+    id: UUID
+    title: str  # Project or organization name; for activities, the project name
+    subtitle: Optional[str] = None  # Project NGO or activity location
+    region_id: Optional[UUID] = None
+    ngo_id: Optional[UUID] = None
+    starts_at: Optional[datetime] = None
+    rank: float
+
+class SearchResults(BaseModel):
+    results: List[SearchHit]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` for the next page; None on the last page
+
+# Bulk write schemas (an id is generated for items without one; upserts match on it, except for regions)
+class RegionBulkItem(RegionCreate):
+    id: Optional[UUID] = None
+
+class OrganizationBulkItem(OrganizationCreate):
+    id: Optional[UUID] = None
+
+class CompanyBulkItem(CompanyCreate):
+    id: Optional[UUID] = None
+
+class ProjectBulkItem(ProjectCreate):
+    id: Optional[UUID] = None
+
+class ActivityBulkItem(ActivityCreate):
+    id: Optional[UUID] = None
+
+class BulkItemResult(BaseModel):
+    index: int  # Position in the request array
+    id: Optional[UUID] = None
+    status: BulkItemStatus
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    created: int
+    updated: int
+    existing: int
+    errors: int
+    items: List[BulkItemResult]
+
 # Company Partnership schemas
 class CompanyPartnershipBase(BaseModel):
     company_id: UUID
     organization_id: UUID
     partnership_type: str = "FUNDING"
-    budget_committed: Optional[Decimal] = None
+    budget_committed: Optional[Money] = None
     active_from: datetime
     active_to: Optional[datetime] = None
     description: Optional[str] = None
@@ -345,8 +581,7 @@ class CompanyPartnershipCreate(CompanyPartnershipBase):
 
 class CompanyPartnershipUpdate(BaseModel):
     partnership_type: Optional[str] = None
-    budget_committed: Optional[Decimal] = None
-    budget_allocated: Optional[Decimal] = None
+    budget_committed: Optional[Money] = None
     active_from: Optional[datetime] = None
     active_to: Optional[datetime] = None
     description: Optional[str] = None
@@ -355,7 +590,7 @@ class CompanyPartnership(CompanyPartnershipBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: UUID
-    budget_allocated: Decimal
+    budget_allocated: Money
     created_at: datetime
     updated_at: datetime
 
@@ -364,9 +599,9 @@ class CompanyPartnershipUtilization(BaseModel):
     company_name: str
     organization_name: str
     partnership_type: str
-    budget_committed: Optional[Decimal]
-    budget_allocated: Decimal
-    budget_remaining: Optional[Decimal]
+    budget_committed: Optional[Money]
+    budget_allocated: Money
+    budget_remaining: Optional[Money]
     utilization_percentage: Optional[Decimal]
     active_from: datetime
     active_to: Optional[datetime]
@@ -378,7 +613,7 @@ class CompanyPartnershipUtilization(BaseModel):
 class ProjectCompanyFundingBase(BaseModel):
     project_id: UUID
     company_id: UUID
-    max_budget: Decimal
+    max_budget: Money
     approved_by: Optional[str] = None
     notes: Optional[str] = None
 
@@ -386,7 +621,7 @@ class ProjectCompanyFundingCreate(ProjectCompanyFundingBase):
     pass
 
 class ProjectCompanyFundingUpdate(BaseModel):
-    max_budget: Optional[Decimal] = None
+    max_budget: Optional[Money] = None
     status: Optional[str] = None
     approved_by: Optional[str] = None
     notes: Optional[str] = None
@@ -395,8 +630,39 @@ class ProjectCompanyFunding(ProjectCompanyFundingBase):
     model_config = ConfigDict(from_attributes=True)
     
     id: UUID
-    allocated_budget: Decimal
+    allocated_budget: Money
     status: str
     approved_at: datetime
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+# Company analytics schemas
+class FundingUtilization(BaseModel):
+    funding_id: UUID
+    project_id: UUID
+    project_name: str
+    organization_name: str
+    status: str
+    max_budget: Money
+    allocated_budget: Money
+    budget_remaining: Money
+    utilization_percentage: Decimal
+    window_allocated: Money
+    daily_burn_rate: Money
+    projected_depletion_date: Optional[date]
+
+class PartnershipAnalytics(CompanyPartnershipUtilization):
+    window_allocated: Money
+    daily_burn_rate: Money
+    projected_depletion_date: Optional[date]
+
+class CompanyAnalytics(BaseModel):
+    company_id: UUID
+    company_name: str
+    window_days: int
+    total_budget_committed: Money
+    total_budget_allocated: Money
+    daily_burn_rate: Money
+    projected_depletion_date: Optional[date]
+    fundings: List[FundingUtilization]
+    partnerships: List[PartnershipAnalytics]
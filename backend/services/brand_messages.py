@@ -0,0 +1,303 @@
+"""
+Brand message selection service
+In-process index of active brand messages per company with weighted rotation,
+plus buffered impression and click counting flushed to the database in the background
+"""
+import asyncio
+import bisect
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import or_, text
+
+from database.connection import SessionLocal
+from database.models import BrandMessage as BrandMessageModel
+from schemas import ActiveBrandMessage, BrandEventType
+
+logger = logging.getLogger(__name__)
+
+# Full reload interval, so changes made by other API workers show up eventually
+INDEX_REFRESH_SECONDS = float(os.getenv("BRAND_INDEX_REFRESH_SECONDS", "60"))
+IMPRESSION_FLUSH_SECONDS = float(os.getenv("BRAND_IMPRESSION_FLUSH_SECONDS", "5"))
+# Distinct (message, event, hour) keys held in memory before new events are refused
+IMPRESSION_BUFFER_MAX_KEYS = int(os.getenv("BRAND_IMPRESSION_BUFFER_MAX_KEYS", "50000"))
+
+_MIN_TIME = datetime.min.replace(tzinfo=timezone.utc)
+_MAX_TIME = datetime.max.replace(tzinfo=timezone.utc)
+
+class _CompanySchedule:
+    """
+    One company's messages sorted by start time
+    The active set is cached together with the next instant it can change
+    (a start or an end), so most lookups are a single comparison.
+    """
+    
+    def __init__(self, messages: Iterable[ActiveBrandMessage]):
+        self.messages = sorted(messages, key=lambda m: m.active_from or _MIN_TIME)
+        self.starts = [m.active_from or _MIN_TIME for m in self.messages]
+        self.active: List[ActiveBrandMessage] = []
+        self.valid_from = _MAX_TIME
+        self.valid_until = _MIN_TIME
+        # Smooth weighted round-robin state: message id -> current weight
+        self.current_weights: Dict[UUID, int] = {}
+    
+    def active_at(self, now: datetime) -> List[ActiveBrandMessage]:
+        if self.valid_from <= now < self.valid_until:
+            return self.active
+        
+        started = bisect.bisect_right(self.starts, now)
+        active = [m for m in self.messages[:started] if m.active_to is None or m.active_to > now]
+        ends = [m.active_to for m in active if m.active_to is not None]
+        next_start = self.starts[started] if started < len(self.starts) else _MAX_TIME
+        
+        self.active = active
+        self.valid_from = now
+        self.valid_until = min([next_start] + ends)
+        self.current_weights = {m.id: self.current_weights.get(m.id, 0) for m in active}
+        return active
+    
+    def pick(self, now: datetime) -> Optional[ActiveBrandMessage]:
+        active = self.active_at(now)
+        if not active:
+            return None
+        if len(active) == 1:
+            return active[0]
+        
+        # Smooth weighted round-robin (as in nginx): evenly interleaved, no randomness
+        total = 0
+        best = None
+        for message in active:
+            self.current_weights[message.id] += message.weight
+            total += message.weight
+            if best is None or self.current_weights[message.id] > self.current_weights[best.id]:
+                best = message
+        self.current_weights[best.id] -= total
+        return best
+
+class BrandMessageIndex:
+    """Active-window index of brand messages, keyed by company"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedules: Dict[UUID, _CompanySchedule] = {}
+        self.loaded_at: Optional[datetime] = None
+    
+    def load(self, db) -> int:
+        """Replace the whole index with current and future messages from the database"""
+        now = datetime.now(timezone.utc)
+        rows = db.query(BrandMessageModel).filter(
+            or_(BrandMessageModel.active_to.is_(None), BrandMessageModel.active_to > now)
+        ).all()
+        by_company: Dict[UUID, List[ActiveBrandMessage]] = {}
+        for row in rows:
+            by_company.setdefault(row.company_id, []).append(ActiveBrandMessage.model_validate(row))
+        
+        with self._lock:
+            self._schedules = {
+                company_id: _CompanySchedule(messages) for company_id, messages in by_company.items()
+            }
+            self.loaded_at = now
+        return len(rows)
+    
+    def upsert(self, message: ActiveBrandMessage, previous_company_id: Optional[UUID] = None):
+        """Apply one created or updated message without reloading everything"""
+        with self._lock:
+            if previous_company_id is not None and previous_company_id != message.company_id:
+                self._remove_locked(message.id, previous_company_id)
+            schedule = self._schedules.get(message.company_id)
+            messages = [m for m in schedule.messages if m.id != message.id] if schedule else []
+            messages.append(message)
+            self._replace_locked(message.company_id, messages, schedule)
+    
+    def remove(self, message_id: UUID, company_id: UUID):
+        with self._lock:
+            self._remove_locked(message_id, company_id)
+    
+    def active(self, company_id: UUID, now: Optional[datetime] = None) -> List[ActiveBrandMessage]:
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            schedule = self._schedules.get(company_id)
+            return list(schedule.active_at(now)) if schedule else []
+    
+    def pick(self, company_id: UUID, now: Optional[datetime] = None) -> Optional[ActiveBrandMessage]:
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            schedule = self._schedules.get(company_id)
+            return schedule.pick(now) if schedule else None
+    
+    def _remove_locked(self, message_id: UUID, company_id: UUID):
+        schedule = self._schedules.get(company_id)
+        if schedule is None:
+            return
+        self._replace_locked(company_id, [m for m in schedule.messages if m.id != message_id], schedule)
+    
+    def _replace_locked(self, company_id: UUID, messages: List[ActiveBrandMessage], previous: Optional[_CompanySchedule]):
+        if not messages:
+            self._schedules.pop(company_id, None)
+            return
+        schedule = _CompanySchedule(messages)
+        if previous is not None:
+            # Keep rotation fairness across edits
+            schedule.current_weights = dict(previous.current_weights)
+        self._schedules[company_id] = schedule
+
+class BufferFull(Exception):
+    """The impression buffer is at capacity; the caller should back off and retry"""
+
+def _hour(at: Optional[datetime]) -> datetime:
+    # Naive timestamps are taken as UTC
+    at = at or datetime.now(timezone.utc)
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+class ImpressionBuffer:
+    """
+    Accumulates impressions and clicks in memory, pre-aggregated per message,
+    event type and UTC hour, and writes them to brand_impressions with one
+    multi-row upsert per flush, keeping writes off the allocation screen path
+    
+    Memory is bounded by the number of distinct (message, event, hour) keys:
+    past half of max_keys an early flush is requested, at max_keys new keys
+    are refused with BufferFull.
+    """
+    
+    def __init__(self, max_keys: int = IMPRESSION_BUFFER_MAX_KEYS):
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._flush_requested = threading.Event()
+        # Months whose brand_impressions partition is known to exist
+        self._partition_months = set()
+    
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._counts)
+    
+    def record(self, message_id: UUID, event_type: BrandEventType = BrandEventType.IMPRESSION,
+               at: Optional[datetime] = None, count: int = 1):
+        self.record_many([(message_id, event_type, at)], count)
+    
+    def record_many(self, events: Iterable[Tuple[UUID, BrandEventType, Optional[datetime]]], count: int = 1):
+        """Record all events or none of them"""
+        keys = Counter((message_id, BrandEventType(event_type), _hour(at)) for message_id, event_type, at in events)
+        with self._lock:
+            new_keys = sum(1 for key in keys if key not in self._counts)
+            if len(self._counts) + new_keys > self.max_keys:
+                self.rejected += sum(keys.values()) * count
+                self._flush_requested.set()
+                raise BufferFull()
+            for key, n in keys.items():
+                self._counts[key] += n * count
+            if len(self._counts) * 2 >= self.max_keys:
+                self._flush_requested.set()
+    
+    def request_flush(self):
+        self._flush_requested.set()
+    
+    def wait_for_flush(self, timeout: float) -> bool:
+        """Block until the flush interval passes or an early flush is requested"""
+        requested = self._flush_requested.wait(timeout)
+        self._flush_requested.clear()
+        return requested
+    
+    def drain(self) -> Counter:
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return counts
+    
+    def flush(self) -> int:
+        counts = self.drain()
+        if not counts:
+            return 0
+        
+        rows = [(message_id, event_type.value, hour, n) for (message_id, event_type, hour), n in counts.items()]
+        impressions = Counter()
+        for (message_id, event_type, _), n in counts.items():
+            if event_type == BrandEventType.IMPRESSION:
+                impressions[message_id] += n
+        months = {hour.date().replace(day=1) for _, _, hour in counts} - self._partition_months
+        
+        db = SessionLocal()
+        try:
+            for month in sorted(months):
+                db.execute(text("SELECT create_brand_impression_partitions(:month, 1)"), {"month": month})
+            
+            # Events for deleted messages are dropped by the join; company comes from the message
+            db.execute(
+                text("""
+                    INSERT INTO brand_impressions (brand_message_id, company_id, event_type, hour, event_count)
+                    SELECT v.id, bm.company_id, CAST(v.event_type AS brand_event_type), v.hour, v.n
+                    FROM (
+                        SELECT unnest(CAST(:ids AS uuid[])) AS id,
+                               unnest(CAST(:event_types AS text[])) AS event_type,
+                               unnest(CAST(:hours AS timestamptz[])) AS hour,
+                               unnest(CAST(:counts AS bigint[])) AS n
+                    ) v
+                    JOIN brand_messages bm ON bm.id = v.id
+                    ON CONFLICT (brand_message_id, event_type, hour)
+                    DO UPDATE SET event_count = brand_impressions.event_count + EXCLUDED.event_count
+                """),
+                {
+                    "ids": [str(row[0]) for row in rows],
+                    "event_types": [row[1] for row in rows],
+                    "hours": [row[2] for row in rows],
+                    "counts": [row[3] for row in rows]
+                }
+            )
+            if impressions:
+                db.execute(
+                    text("""
+                        UPDATE brand_messages bm
+                        SET impression_count = bm.impression_count + v.n
+                        FROM (SELECT unnest(CAST(:ids AS uuid[])) AS id, unnest(CAST(:counts AS bigint[])) AS n) v
+                        WHERE bm.id = v.id
+                    """),
+                    {"ids": [str(message_id) for message_id in impressions], "counts": list(impressions.values())}
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                self._counts.update(counts)
+            raise
+        finally:
+            db.close()
+        
+        self._partition_months |= months
+        return sum(counts.values())
+
+brand_message_index = BrandMessageIndex()
+impression_buffer = ImpressionBuffer()
+
+def reload_index():
+    db = SessionLocal()
+    try:
+        return brand_message_index.load(db)
+    finally:
+        db.close()
+
+async def run_index_refresher():
+    """Background task: periodic full reload of the index"""
+    while True:
+        await asyncio.sleep(INDEX_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(reload_index)
+        except Exception:
+            logger.exception("Brand message index refresh failed")
+
+async def run_impression_flusher():
+    """Background task: impression flush every interval, or sooner when the buffer fills up"""
+    while True:
+        await asyncio.to_thread(impression_buffer.wait_for_flush, IMPRESSION_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(impression_buffer.flush)
+        except Exception:
+            logger.exception("Brand impression flush failed")
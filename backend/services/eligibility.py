@@ -0,0 +1,143 @@
+"""
+Free-choice eligibility
+FREE_CHOICE_50 credits may go to any project in the volunteer's region. Each region's
+catalog (its projects with their active company fundings and remaining budgets) is loaded
+in one query and cached, and so is each volunteer's region, so allocation validation
+checks eligibility without extra round trips once the cache is warm.
+
+Entries expire after ELIGIBILITY_CACHE_SECONDS, which bounds how stale other API workers
+can be; writes through this worker invalidate immediately. Remaining budgets are for
+display only: the budget CHECK constraints still decide when allocating.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from database.models import (
+    Company as CompanyModel,
+    Organization as OrganizationModel,
+    Project as ProjectModel,
+    ProjectCompanyFunding as ProjectCompanyFundingModel,
+    Volunteer as VolunteerModel
+)
+from money import ZERO
+from schemas import EligibleFunding, EligibleProject
+
+ELIGIBILITY_CACHE_SECONDS = float(os.getenv("ELIGIBILITY_CACHE_SECONDS", "30"))
+# Volunteers whose region is remembered; least recently used are evicted first
+VOLUNTEER_REGION_CACHE_SIZE = int(os.getenv("VOLUNTEER_REGION_CACHE_SIZE", "100000"))
+
+class RegionCatalog:
+    def __init__(self, projects: List[EligibleProject]):
+        self.projects = projects
+        self.project_ids: FrozenSet[UUID] = frozenset(p.project_id for p in projects)
+        self.loaded_at = time.monotonic()
+
+def load_catalog(db: Session, region_id: UUID) -> RegionCatalog:
+    """Projects of a region with their active fundings, in a single statement"""
+    rows = db.query(
+        ProjectModel.id,
+        ProjectModel.name,
+        ProjectModel.description,
+        ProjectModel.ngo_id,
+        OrganizationModel.name,
+        ProjectCompanyFundingModel.company_id,
+        CompanyModel.name,
+        ProjectCompanyFundingModel.max_budget,
+        ProjectCompanyFundingModel.allocated_budget
+    ).join(
+        OrganizationModel, OrganizationModel.id == ProjectModel.ngo_id
+    ).outerjoin(
+        ProjectCompanyFundingModel,
+        and_(ProjectCompanyFundingModel.project_id == ProjectModel.id, ProjectCompanyFundingModel.status == "ACTIVE")
+    ).outerjoin(
+        CompanyModel, CompanyModel.id == ProjectCompanyFundingModel.company_id
+    ).filter(
+        ProjectModel.region_id == region_id
+    ).order_by(ProjectModel.name, ProjectModel.id, CompanyModel.name).all()
+    
+    projects: Dict[UUID, EligibleProject] = {}
+    for project_id, name, description, ngo_id, ngo_name, company_id, company_name, max_budget, allocated in rows:
+        project = projects.get(project_id)
+        if project is None:
+            project = projects[project_id] = EligibleProject(
+                project_id=project_id, name=name, description=description, ngo_id=ngo_id, ngo_name=ngo_name, fundings=[]
+            )
+        if company_id is not None:
+            allocated = allocated or ZERO
+            project.fundings.append(EligibleFunding(
+                company_id=company_id,
+                company_name=company_name,
+                max_budget=max_budget,
+                allocated_budget=allocated,
+                remaining_budget=max_budget - allocated
+            ))
+    return RegionCatalog(list(projects.values()))
+
+class EligibilityCache:
+    """Region catalogs and volunteer regions, each expiring after the cache TTL"""
+    
+    def __init__(self, ttl: float = ELIGIBILITY_CACHE_SECONDS, max_volunteers: int = VOLUNTEER_REGION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_volunteers = max_volunteers
+        self._lock = threading.Lock()
+        self._catalogs: Dict[UUID, RegionCatalog] = {}
+        self._volunteer_regions: "OrderedDict[UUID, Tuple[float, UUID]]" = OrderedDict()
+    
+    def volunteer_region(self, db: Session, volunteer_id: UUID) -> Optional[UUID]:
+        """The volunteer's region, or None if there is no such volunteer"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._volunteer_regions.get(volunteer_id)
+            if cached is not None and now - cached[0] < self.ttl:
+                self._volunteer_regions.move_to_end(volunteer_id)
+                return cached[1]
+        
+        region_id = db.query(VolunteerModel.region_id).filter(VolunteerModel.id == volunteer_id).scalar()
+        if region_id is None:
+            return None
+        with self._lock:
+            self._volunteer_regions[volunteer_id] = (now, region_id)
+            self._volunteer_regions.move_to_end(volunteer_id)
+            while len(self._volunteer_regions) > self.max_volunteers:
+                self._volunteer_regions.popitem(last=False)
+        return region_id
+    
+    def catalog(self, db: Session, region_id: UUID) -> RegionCatalog:
+        with self._lock:
+            cached = self._catalogs.get(region_id)
+        if cached is not None and time.monotonic() - cached.loaded_at < self.ttl:
+            return cached
+        
+        catalog = load_catalog(db, region_id)
+        with self._lock:
+            self._catalogs[region_id] = catalog
+        return catalog
+    
+    def is_eligible(self, db: Session, region_id: UUID, project_id: UUID) -> bool:
+        """Whether a free-choice allocation from this region may go to the project"""
+        if project_id in self.catalog(db, region_id).project_ids:
+            return True
+        # A project created through another worker may be missing from our copy, so confirm a
+        # miss with a primary key lookup. The catalog is left alone: reloading it here would let
+        # any client force a full region load per request by sending ineligible project ids
+        return db.query(ProjectModel.id).filter(
+            ProjectModel.id == project_id, ProjectModel.region_id == region_id
+        ).first() is not None
+    
+    def invalidate_region(self, *region_ids: UUID):
+        with self._lock:
+            for region_id in region_ids:
+                self._catalogs.pop(region_id, None)
+    
+    def invalidate_volunteer(self, volunteer_id: UUID):
+        with self._lock:
+            self._volunteer_regions.pop(volunteer_id, None)
+
+eligibility_cache = EligibilityCache()
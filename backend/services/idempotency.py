@@ -0,0 +1,173 @@
+"""
+Idempotency key store
+Responses to requests carrying an Idempotency-Key are kept in the idempotency_keys
+table for IDEMPOTENCY_TTL_HOURS. Completed responses are also cached in a per-worker
+LRU, so replays of recent keys skip the database entirely.
+"""
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+
+from database.connection import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")) * 3600
+# An InProgress key older than this is assumed abandoned (crashed worker) and can be retried
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+PURGE_INTERVAL_SECONDS = 3600
+
+# Outcomes of IdempotencyStore.claim
+CLAIMED = "claimed"
+REPLAY = "replay"
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    content_type: Optional[str]
+    body: bytes
+    expires_at: datetime
+
+# (key, method, path, query string)
+Scope = Tuple[str, str, str, str]
+
+class IdempotencyStore:
+    def __init__(self, cache_size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Scope, StoredResponse]" = OrderedDict()
+    
+    def _cached(self, scope: Scope) -> Optional[StoredResponse]:
+        with self._lock:
+            stored = self._cache.get(scope)
+            if stored is None:
+                return None
+            if stored.expires_at <= datetime.now(timezone.utc):
+                del self._cache[scope]
+                return None
+            self._cache.move_to_end(scope)
+            return stored
+    
+    def _remember(self, scope: Scope, stored: StoredResponse):
+        with self._lock:
+            self._cache[scope] = stored
+            self._cache.move_to_end(scope)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def claim(self, scope: Scope, request_hash: str) -> Tuple[str, Optional[StoredResponse]]:
+        """
+        Take ownership of a key, or report what happened to it before
+        A new key costs one INSERT on the unique index; only duplicates read the row back.
+        """
+        stored = self._cached(scope)
+        if stored is not None:
+            return (REPLAY, stored) if stored.request_hash == request_hash else (MISMATCH, None)
+        
+        key, method, path, query_string = scope
+        params = {"key": key, "method": method, "path": path, "query_string": query_string}
+        db = SessionLocal()
+        try:
+            claimed = db.execute(text("""
+                INSERT INTO idempotency_keys (idempotency_key, method, path, query_string, request_hash, expires_at)
+                VALUES (:key, :method, :path, :query_string, :request_hash, now() + make_interval(secs => :ttl))
+                ON CONFLICT ON CONSTRAINT idempotency_keys_scope DO UPDATE SET
+                    request_hash = EXCLUDED.request_hash,
+                    status = 'InProgress',
+                    response_status = NULL,
+                    response_content_type = NULL,
+                    response_body = NULL,
+                    locked_at = now(),
+                    expires_at = EXCLUDED.expires_at
+                WHERE idempotency_keys.expires_at <= now()
+                   OR (idempotency_keys.status = 'InProgress'
+                       AND idempotency_keys.locked_at < now() - make_interval(secs => :lock_seconds))
+                RETURNING id
+            """), {**params, "request_hash": request_hash, "ttl": IDEMPOTENCY_TTL_SECONDS,
+                   "lock_seconds": IDEMPOTENCY_LOCK_SECONDS}).first()
+            db.commit()
+            if claimed is not None:
+                return CLAIMED, None
+            
+            row = db.execute(text("""
+                SELECT request_hash, status, response_status, response_content_type, response_body, expires_at
+                FROM idempotency_keys
+                WHERE idempotency_key = :key AND method = :method AND path = :path AND query_string = :query_string
+            """), params).first()
+        finally:
+            db.close()
+        
+        # Released between our two statements: the client should simply retry
+        if row is None or row.status != "Completed":
+            if row is not None and row.request_hash != request_hash:
+                return MISMATCH, None
+            return IN_PROGRESS, None
+        if row.request_hash != request_hash:
+            return MISMATCH, None
+        
+        stored = StoredResponse(row.request_hash, row.response_status, row.response_content_type,
+                                bytes(row.response_body or b""), row.expires_at)
+        self._remember(scope, stored)
+        return REPLAY, stored
+    
+    def complete(self, scope: Scope, request_hash: str, status_code: int, content_type: Optional[str], body: bytes):
+        key, method, path, query_string = scope
+        db = SessionLocal()
+        try:
+            row = db.execute(text("""
+                UPDATE idempotency_keys SET
+                    status = 'Completed',
+                    response_status = :status_code,
+                    response_content_type = :content_type,
+                    response_body = :body
+                WHERE idempotency_key = :key AND method = :method AND path = :path AND query_string = :query_string AND status = 'InProgress'
+                RETURNING expires_at
+            """), {"key": key, "method": method, "path": path, "query_string": query_string, "status_code": status_code,
+                   "content_type": content_type, "body": body}).first()
+            db.commit()
+        finally:
+            db.close()
+        if row is not None:
+            self._remember(scope, StoredResponse(request_hash, status_code, content_type, body, row.expires_at))
+    
+    def release(self, scope: Scope):
+        """Forget a key whose request failed, so the client's retry runs it again"""
+        key, method, path, query_string = scope
+        db = SessionLocal()
+        try:
+            db.execute(text("""
+                DELETE FROM idempotency_keys
+                WHERE idempotency_key = :key AND method = :method AND path = :path AND query_string = :query_string AND status = 'InProgress'
+            """), {"key": key, "method": method, "path": path, "query_string": query_string})
+            db.commit()
+        finally:
+            db.close()
+    
+    def purge_expired(self) -> int:
+        db = SessionLocal()
+        try:
+            deleted = db.execute(text("DELETE FROM idempotency_keys WHERE expires_at <= now()")).rowcount
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+idempotency_store = IdempotencyStore()
+
+async def run_idempotency_purger():
+    """Background task: drop expired idempotency keys"""
+    while True:
+        await asyncio.sleep(PURGE_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(idempotency_store.purge_expired)
+        except Exception:
+            logger.exception("Idempotency key purge failed")
@@ -0,0 +1,171 @@
+"""
+Live update broker
+One LISTEN connection per API worker receives change notifications published by
+database triggers and fans them out to in-process subscribers by topic.
+Notifications for the same topic are coalesced over a short window, and each
+subscriber only ever holds the latest event per topic, so slow clients cannot
+build up a backlog.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+import psycopg2
+
+from database.connection import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "volo_live"
+TOPIC_KINDS = ("activity", "volunteer", "project")
+COALESCE_SECONDS = float(os.getenv("LIVE_COALESCE_MS", "250")) / 1000
+RECONNECT_MAX_SECONDS = 30
+
+_TOPIC_PATTERN = re.compile(r"^(%s):(.+)$" % "|".join(TOPIC_KINDS))
+
+def parse_topic(topic: str) -> str:
+    """Validate `kind:uuid` and return it in the form the database publishes (lowercase uuid)"""
+    match = _TOPIC_PATTERN.match(topic)
+    if not match:
+        raise ValueError(f"Topic must look like <{'|'.join(TOPIC_KINDS)}>:<uuid>, got {topic!r}")
+    return f"{match.group(1)}:{UUID(match.group(2))}"
+
+class Subscription:
+    """One client's topics and the latest undelivered event for each of them"""
+    
+    def __init__(self, topics: Iterable[str]):
+        self.topics = frozenset(topics)
+        self._pending: Dict[str, dict] = {}
+        self._ready = asyncio.Event()
+    
+    def push(self, topic: str, event: dict):
+        # A newer event for the same topic replaces the undelivered one
+        self._pending[topic] = event
+        self._ready.set()
+    
+    async def next_batch(self, timeout: float) -> List[dict]:
+        """Wait for events; an empty list means the timeout passed (time for a keep-alive)"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        batch, self._pending = list(self._pending.values()), {}
+        return batch
+
+class LiveUpdateBroker:
+    """
+    Topic fan-out fed by Postgres LISTEN/NOTIFY
+    Everything except the initial connect runs on the event loop thread, so no locking is needed.
+    """
+    
+    def __init__(self, coalesce_seconds: float = COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self.listening = False
+        self.notifications_received = 0
+        self.events_delivered = 0
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._dirty: Dict[str, dict] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(topics)
+        for topic in subscription.topics:
+            self._subscribers[topic].add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[topic]
+    
+    def stats(self) -> dict:
+        return {
+            "listening": self.listening,
+            "topics": len(self._subscribers),
+            "subscriptions": len({s for subscribers in self._subscribers.values() for s in subscribers}),
+            "notifications_received": self.notifications_received,
+            "events_delivered": self.events_delivered
+        }
+    
+    def publish(self, event: dict):
+        """Queue an event for its topic; delivered at the end of the coalescing window"""
+        topic = event.get("topic")
+        if topic not in self._subscribers:
+            return
+        previous = self._dirty.get(topic)
+        event["coalesced"] = previous["coalesced"] + 1 if previous else 1
+        self._dirty[topic] = event
+        if self._flush_handle is None:
+            loop = self._loop or asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.coalesce_seconds, self._flush)
+    
+    def _flush(self):
+        self._flush_handle = None
+        dirty, self._dirty = self._dirty, {}
+        for topic, event in dirty.items():
+            for subscription in self._subscribers.get(topic, ()):
+                subscription.push(topic, event)
+                self.events_delivered += 1
+    
+    def _connect(self):
+        conn = psycopg2.connect(**engine.url.translate_connect_args(username="user"))
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        return conn
+    
+    def _on_readable(self, conn, closed: asyncio.Future):
+        try:
+            conn.poll()
+        except psycopg2.Error as e:
+            if not closed.done():
+                closed.set_exception(e)
+            return
+        notifies, conn.notifies[:] = list(conn.notifies), []
+        for notify in notifies:
+            self.notifications_received += 1
+            try:
+                self.publish(json.loads(notify.payload))
+            except (ValueError, TypeError):
+                logger.warning("Ignoring malformed live update payload: %r", notify.payload)
+    
+    async def run(self):
+        """Background task: keep the LISTEN connection open, reconnecting with backoff"""
+        self._loop = asyncio.get_running_loop()
+        backoff = 1
+        while True:
+            try:
+                conn = await asyncio.to_thread(self._connect)
+            except Exception:
+                logger.exception("Live update listener could not connect, retrying in %ss", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+                continue
+            
+            backoff = 1
+            closed = self._loop.create_future()
+            self._loop.add_reader(conn.fileno(), self._on_readable, conn, closed)
+            self.listening = True
+            try:
+                await closed
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live update listener lost its connection")
+            finally:
+                self.listening = False
+                self._loop.remove_reader(conn.fileno())
+                conn.close()
+
+live_broker = LiveUpdateBroker()
@@ -0,0 +1,86 @@
+"""
+Prometheus metrics
+Request histograms per route template, in-flight and connection pool gauges, and business
+counters. Each worker accumulates its own values; with PROMETHEUS_MULTIPROC_DIR set (required
+for uvicorn --workers), every worker writes them to its own files in that directory and
+/metrics sums them across workers at scrape time.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_DURATION = Histogram(
+    "volo_http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "volo_http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "volo_db_pool_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum"
+)
+DB_POOL_OPEN = Gauge(
+    "volo_db_pool_open_connections",
+    "Database connections currently open (pooled and overflow)",
+    multiprocess_mode="livesum"
+)
+DB_POOL_SIZE = Gauge(
+    "volo_db_pool_size",
+    "Configured pool size (connections kept open once created)",
+    multiprocess_mode="livesum"
+)
+
+CREDITS_MINTED = Counter(
+    "volo_credits_minted",
+    "VoloCredits granted for verified attendances"
+)
+ATTENDANCES_VERIFIED = Counter(
+    "volo_attendances_verified",
+    "Attendances verified"
+)
+ALLOCATIONS_CREATED = Counter(
+    "volo_allocations_created",
+    "Allocations created",
+    ["kind"]
+)
+CHECK_INS = Counter(
+    "volo_check_ins",
+    "Volunteer check-ins"
+)
+
+def instrument_pool(engine: Engine):
+    pool = engine.pool
+    DB_POOL_SIZE.set(pool.size())
+    event.listen(pool, "connect", lambda *args: DB_POOL_OPEN.inc())
+    event.listen(pool, "close", lambda *args: DB_POOL_OPEN.dec())
+    event.listen(pool, "checkout", lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(pool, "checkin", lambda *args: DB_POOL_CHECKED_OUT.dec())
+
+def render_metrics():
+    """Exposition body and content type; sums all workers' files in multiprocess mode"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the aggregate when it shuts down"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
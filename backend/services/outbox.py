@@ -0,0 +1,160 @@
+"""
+Transactional outbox
+Write paths call enqueue() inside their own transaction; the worker claims pending
+events in SKIP LOCKED batches and runs the handlers registered for each event type.
+Delivery is at-least-once: a handler's effects and its completion marker commit
+together, so redelivered events only re-run handlers that had not finished.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from database.connection import SessionLocal
+from database.models import (
+    OutboxEvent as OutboxEventModel,
+    OutboxHandlerRun as OutboxHandlerRunModel,
+    OutboxStatus
+)
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+MAX_RETRY_DELAY_SECONDS = 3600
+
+Handler = Callable[[Session, OutboxEventModel], None]
+
+# event type -> [(handler name, function)]
+_handlers: Dict[str, List[Tuple[str, Handler]]] = {}
+
+def handler(event_type: str, name: str):
+    """Register a handler for an event type; the name is its idempotency key per event"""
+    def register(fn: Handler) -> Handler:
+        _handlers.setdefault(event_type, []).append((name, fn))
+        return fn
+    return register
+
+def registered_handlers() -> Dict[str, List[str]]:
+    return {event_type: [name for name, _ in entries] for event_type, entries in _handlers.items()}
+
+def enqueue(
+    db: Session,
+    event_type: str,
+    aggregate_type: str,
+    aggregate_id: UUID,
+    payload: dict,
+    idempotency_key: Optional[str] = None
+):
+    """
+    Record an event in the caller's transaction (nothing happens until it commits)
+    Enqueues repeating an idempotency_key are ignored.
+    """
+    stmt = pg_insert(OutboxEventModel).values(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload,
+        idempotency_key=idempotency_key
+    )
+    if idempotency_key is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["idempotency_key"])
+    db.execute(stmt)
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2 ** attempts, MAX_RETRY_DELAY_SECONDS))
+
+def process_batch(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Claim and handle one batch of due events; returns how many were claimed"""
+    events = db.query(OutboxEventModel).filter(
+        OutboxEventModel.status == OutboxStatus.PENDING,
+        OutboxEventModel.available_at <= func.now()
+    ).order_by(OutboxEventModel.available_at).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not events:
+        db.rollback()
+        return 0
+    
+    completed = set(db.query(OutboxHandlerRunModel.event_id, OutboxHandlerRunModel.handler).filter(
+        OutboxHandlerRunModel.event_id.in_([event.id for event in events])
+    ).all())
+    
+    now = datetime.now(timezone.utc)
+    for event in events:
+        errors = []
+        for name, fn in _handlers.get(event.event_type, []):
+            if (event.id, name) in completed:
+                continue
+            try:
+                # Savepoint per handler: a failure undoes only that handler's writes
+                with db.begin_nested():
+                    fn(db, event)
+                    db.add(OutboxHandlerRunModel(event_id=event.id, handler=name))
+            except Exception as e:
+                logger.exception("Outbox handler %s failed for event %s", name, event.id)
+                errors.append(f"{name}: {e}")
+        
+        if errors:
+            event.attempts += 1
+            event.last_error = "; ".join(errors)[:2000]
+            if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+                event.status = OutboxStatus.FAILED
+            else:
+                event.available_at = now + _retry_delay(event.attempts)
+        else:
+            event.status = OutboxStatus.PROCESSED
+            event.processed_at = now
+    
+    db.commit()
+    return len(events)
+
+def purge_processed(db: Session, retention_days: int = OUTBOX_RETENTION_DAYS) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    deleted = db.query(OutboxEventModel).filter(
+        OutboxEventModel.status == OutboxStatus.PROCESSED,
+        OutboxEventModel.processed_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def drain_once(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    db = SessionLocal()
+    try:
+        return process_batch(db, batch_size)
+    finally:
+        db.close()
+
+def purge_once() -> int:
+    db = SessionLocal()
+    try:
+        return purge_processed(db)
+    finally:
+        db.close()
+
+async def run_outbox_worker():
+    """Background task: drain the outbox, polling while idle; several workers can run side by side"""
+    last_purge = None
+    while True:
+        try:
+            claimed = await asyncio.to_thread(drain_once)
+        except Exception:
+            logger.exception("Outbox batch failed")
+            claimed = 0
+        
+        if last_purge is None or datetime.now(timezone.utc) - last_purge > timedelta(hours=1):
+            last_purge = datetime.now(timezone.utc)
+            try:
+                await asyncio.to_thread(purge_once)
+            except Exception:
+                logger.exception("Outbox purge failed")
+        
+        # A full batch means there is probably more waiting
+        if claimed < OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(OUTBOX_POLL_SECONDS)
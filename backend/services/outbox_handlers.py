@@ -0,0 +1,51 @@
+"""
+Outbox handlers
+Side effects moved off the request path: ledger hash chain and volunteer notifications.
+Rollups (activity_stats, project_allocation_daily, budget counters) stay trigger-maintained
+because budget checks and capacity limits read them in the same transaction.
+"""
+import hashlib
+import json
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.models import (
+    LedgerEntry as LedgerEntryModel,
+    Notification as NotificationModel,
+    OutboxEvent as OutboxEventModel
+)
+from services.outbox import handler
+
+def append_ledger_entry(db: Session, ref_type: str, ref_id, payload: dict):
+    """Append to the single ledger hash chain: hash = sha256(prev_hash | ref_type | ref_id | payload)"""
+    # One chain, so appenders take turns until their transaction ends
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('ledger_entries'))"))
+    prev_hash = db.query(LedgerEntryModel.hash).order_by(LedgerEntryModel.seq.desc()).limit(1).scalar()
+    material = "|".join([prev_hash or "", ref_type, str(ref_id), json.dumps(payload, sort_keys=True, default=str)])
+    db.add(LedgerEntryModel(
+        ref_type=ref_type,
+        ref_id=ref_id,
+        hash=hashlib.sha256(material.encode()).hexdigest(),
+        prev_hash=prev_hash
+    ))
+    # Make the new head visible to the next append in this transaction
+    db.flush()
+
+@handler("attendance.verified", "ledger")
+def ledger_for_verified_attendance(db: Session, event: OutboxEventModel):
+    payload = event.payload
+    append_ledger_entry(db, "Attendance", payload["attendance_id"], payload)
+    append_ledger_entry(db, "VoloCredit", payload["credit_id"], payload)
+
+@handler("allocation.created", "ledger")
+def ledger_for_allocation(db: Session, event: OutboxEventModel):
+    append_ledger_entry(db, "Allocation", event.payload["allocation_id"], event.payload)
+
+@handler("attendance.verified", "notifications")
+def notify_credits_granted(db: Session, event: OutboxEventModel):
+    payload = event.payload
+    db.add(NotificationModel(
+        volunteer_id=payload["volunteer_id"],
+        message=f"Your attendance was verified: {payload['credit_amount']} credits granted"
+    ))
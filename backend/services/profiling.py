@@ -0,0 +1,226 @@
+"""
+Request profiling
+cpu mode samples the stack of every thread from a background thread while a profiled request
+is in flight (sync endpoints run in the threadpool, so profiling the event loop thread alone
+would miss them). alloc mode traces allocations with tracemalloc for one request at a time
+and weighs stacks by the bytes still allocated when it ends. Both aggregate per route as
+collapsed stacks ("frame;frame;frame count"), the input format of flamegraph.pl, speedscope
+and inferno.
+
+Off unless PROFILING_ENABLED=true. A request is profiled when it sends X-Profile: cpu|alloc
+or is picked at PROFILE_SAMPLE_RATE, and only while fewer than PROFILE_MAX_CONCURRENT are.
+Samples are attributed by the endpoint frame on the stack; work outside it (response
+validation, middleware) is attributed only while a single request is being profiled.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Fraction of requests profiled without asking, in PROFILE_MODE; keep it low in production
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cpu")
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "4"))
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+# When set, X-Profile and /debug/profile require a matching X-Profile-Token
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+
+MODES = ("cpu", "alloc")
+MAX_STACK_DEPTH = 64
+ALLOC_TRACEBACK_FRAMES = 32
+# Distinct stacks kept per route and mode; new stacks past this are counted under OTHER_STACK
+MAX_STACKS_PER_ROUTE = 5000
+OTHER_STACK = "(other stacks)"
+
+# Innermost Python frames of a thread that is waiting for work rather than running it
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("socket.py", "accept")
+}
+
+_labels: Dict[Any, str] = {}
+
+def _short_path(filename: str) -> str:
+    return "/".join(filename.replace("\\", "/").split("/")[-2:])
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+def _is_idle(code) -> bool:
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+class Session:
+    __slots__ = ("mode", "route", "endpoint_code", "stacks", "started")
+    
+    def __init__(self, mode: str, route: str, endpoint_code):
+        self.mode = mode
+        self.route = route
+        self.endpoint_code = endpoint_code
+        self.stacks: Counter = Counter()
+        self.started = time.perf_counter()
+
+class RouteProfile:
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.requests = 0
+        self.seconds = 0.0
+    
+    def merge(self, session: Session, elapsed: float):
+        self.requests += 1
+        self.seconds += elapsed
+        for stack, weight in session.stacks.items():
+            if stack in self.stacks or len(self.stacks) < MAX_STACKS_PER_ROUTE:
+                self.stacks[stack] += weight
+            else:
+                self.stacks[OTHER_STACK] += weight
+
+class Profiler:
+    def __init__(self):
+        self.endpoint_codes = frozenset()
+        self._lock = threading.Lock()
+        self._cpu_sessions: List[Session] = []
+        self._alloc_session: Optional[Session] = None
+        self._profiles: Dict[Tuple[str, str], RouteProfile] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def begin(self, mode: str, route: str, endpoint_code) -> Optional[Session]:
+        """A new session, or None when the profiling budget is used up"""
+        session = Session(mode, route, endpoint_code)
+        with self._lock:
+            if len(self._cpu_sessions) + (self._alloc_session is not None) >= PROFILE_MAX_CONCURRENT:
+                return None
+            if mode == "alloc":
+                # tracemalloc is process-wide: one session at a time, and never on top of someone else's tracing
+                if self._alloc_session is not None or tracemalloc.is_tracing():
+                    return None
+                self._alloc_session = session
+                tracemalloc.start(ALLOC_TRACEBACK_FRAMES)
+            else:
+                self._cpu_sessions.append(session)
+                self._start_sampler()
+                self._wake.set()
+        return session
+    
+    def end(self, session: Session):
+        elapsed = time.perf_counter() - session.started
+        if session.mode == "alloc":
+            self._collect_allocations(session)
+        with self._lock:
+            if session.mode == "alloc":
+                self._alloc_session = None
+            else:
+                self._cpu_sessions.remove(session)
+                if not self._cpu_sessions:
+                    self._wake.clear()
+            self._profiles.setdefault((session.mode, session.route), RouteProfile()).merge(session, elapsed)
+    
+    def _collect_allocations(self, session: Session):
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        finally:
+            tracemalloc.stop()
+        for stat in snapshot.statistics("traceback"):
+            stack = ";".join(f"{_short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback)
+            session.stacks[stack] += stat.size
+    
+    def _start_sampler(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            time.sleep(PROFILE_INTERVAL_SECONDS)
+            # Held while sampling so end() never merges a session that is still being written to
+            with self._lock:
+                if not self._cpu_sessions:
+                    continue
+                try:
+                    self._sample(self._cpu_sessions, me)
+                except Exception:
+                    logger.exception("Stack sampling failed")
+    
+    def _sample(self, sessions: List[Session], me: int):
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            codes = []
+            while frame is not None and len(codes) < MAX_STACK_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if not codes or _is_idle(codes[0]):
+                continue
+            owner = self._owner(sessions, codes)
+            if owner is not None:
+                owner.stacks[";".join(_label(code) for code in reversed(codes))] += 1
+    
+    def _owner(self, sessions: List[Session], codes) -> Optional[Session]:
+        endpoint = next((code for code in codes if code in self.endpoint_codes), None)
+        if endpoint is not None:
+            return next((s for s in sessions if s.endpoint_code is endpoint), None)
+        return sessions[0] if len(sessions) == 1 else None
+    
+    def summary(self, top: int = 10) -> List[Dict[str, Any]]:
+        """Per route and mode: requests, total weight (samples or bytes) and the heaviest leaf frames"""
+        with self._lock:
+            profiles = [(key, Counter(p.stacks), p.requests, p.seconds) for key, p in self._profiles.items()]
+        routes = []
+        for (mode, route), stacks, requests, seconds in sorted(profiles, key=lambda item: item[0]):
+            leaves: Counter = Counter()
+            for stack, weight in stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += weight
+            routes.append({
+                "mode": mode,
+                "route": route,
+                "requests": requests,
+                "avg_ms": round(seconds / requests * 1000, 2),
+                "unit": "bytes" if mode == "alloc" else "samples",
+                "total": sum(stacks.values()),
+                "top_frames": [{"frame": frame, "weight": weight} for frame, weight in leaves.most_common(top)]
+            })
+        return routes
+    
+    def folded(self, mode: str, route: str) -> Optional[str]:
+        with self._lock:
+            profile = self._profiles.get((mode, route))
+            if profile is None:
+                return None
+            return "".join(f"{stack} {weight}\n" for stack, weight in profile.stacks.most_common())
+    
+    def dump(self, directory: str = PROFILE_OUTPUT_DIR) -> List[str]:
+        """Write one collapsed stack file per route and mode"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            keys = list(self._profiles)
+        paths = []
+        for mode, route in keys:
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+            path = os.path.join(directory, f"{mode}-{slug}.folded")
+            with open(path, "w") as f:
+                f.write(self.folded(mode, route) or "")
+            paths.append(path)
+        return paths
+    
+    def reset(self):
+        with self._lock:
+            self._profiles.clear()
+
+profiler = Profiler()
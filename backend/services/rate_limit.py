@@ -0,0 +1,144 @@
+"""
+Token bucket rate limiting
+Each bucket holds up to `burst` tokens and refills at `rate` tokens per second. A request
+takes its cost from every bucket it is keyed by (API client, and the volunteer when one
+is known) or from none of them. Buckets live in-process by default; set RATE_LIMIT_REDIS_URL
+to share them between API workers.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Shared buckets expire after this long without traffic (a full bucket needs no state)
+REDIS_KEY_TTL_SECONDS = 3600
+
+class Limit(NamedTuple):
+    burst: float
+    rate: float
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: int
+
+ALLOWED = Decision(True, 0)
+
+def _retry_after(shortfall: float, rate: float) -> int:
+    return max(1, math.ceil(shortfall / rate))
+
+class InMemoryBucketStore:
+    """Buckets for one worker; the least recently used are dropped past max_keys (they come back full)"""
+    # Cheap enough to call on the event loop
+    blocking = False
+    
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._lock = threading.Lock()
+        # key -> [tokens, updated_at]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+    
+    def take(self, buckets: List[Tuple[str, Limit]], cost: float) -> Decision:
+        now = self.clock()
+        with self._lock:
+            states = []
+            retry_after = 0
+            for key, limit in buckets:
+                state = self._buckets.get(key)
+                if state is None:
+                    tokens = limit.burst
+                else:
+                    tokens = min(limit.burst, state[0] + (now - state[1]) * limit.rate)
+                states.append((key, tokens))
+                if tokens < cost:
+                    retry_after = max(retry_after, _retry_after(cost - tokens, limit.rate))
+            
+            for key, tokens in states:
+                if not retry_after:
+                    tokens -= cost
+                self._buckets[key] = [tokens, now]
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        
+        return Decision(False, retry_after) if retry_after else ALLOWED
+
+# All-or-nothing take over KEYS, with ARGV = cost, ttl, then burst/rate per key
+_TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local burst = tonumber(ARGV[1 + i * 2])
+    local rate = tonumber(ARGV[2 + i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = burst
+    if state[1] then
+        available = math.min(burst, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+    end
+    tokens[i] = available
+    if available < cost then
+        retry_after = math.max(retry_after, math.ceil((cost - available) / rate))
+    end
+end
+for i, key in ipairs(KEYS) do
+    local remaining = tokens[i]
+    if retry_after == 0 then
+        remaining = remaining - cost
+    end
+    redis.call('HSET', key, 'tokens', tostring(remaining), 'ts', tostring(now))
+    redis.call('EXPIRE', key, ttl)
+end
+return retry_after
+"""
+
+class RedisBucketStore:
+    """Buckets shared by every worker; the check-and-take runs as one Lua script"""
+    blocking = True
+    
+    def __init__(self, url: str, prefix: str = "volo:ratelimit:"):
+        import redis
+        
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+    
+    def take(self, buckets: List[Tuple[str, Limit]], cost: float) -> Decision:
+        args = [cost, REDIS_KEY_TTL_SECONDS]
+        for _, limit in buckets:
+            args.extend([limit.burst, limit.rate])
+        retry_after = int(self._take(keys=[self.prefix + key for key, _ in buckets], args=args))
+        return Decision(False, max(1, retry_after)) if retry_after else ALLOWED
+
+class FailOpenStore:
+    """Let requests through while the shared store is unreachable rather than failing the API"""
+    
+    def __init__(self, store):
+        self.store = store
+        self.blocking = store.blocking
+    
+    def take(self, buckets: List[Tuple[str, Limit]], cost: float) -> Decision:
+        try:
+            return self.store.take(buckets, cost)
+        except Exception:
+            logger.warning("Rate limit store unavailable, allowing request", exc_info=True)
+            return ALLOWED
+
+def create_store():
+    if not RATE_LIMIT_REDIS_URL:
+        return InMemoryBucketStore()
+    try:
+        return FailOpenStore(RedisBucketStore(RATE_LIMIT_REDIS_URL))
+    except ImportError:
+        logger.warning("RATE_LIMIT_REDIS_URL is set but the redis package is not installed; using in-process buckets")
+        return InMemoryBucketStore()
@@ -0,0 +1,61 @@
+"""
+Per-request SQL instrumentation
+Engine events time every statement executed while a request is being served and add it
+to that request's QueryStats (statement count, DB time, slowest statement, and how often
+each statement text repeated). Statements outside a request, such as background tasks,
+are not recorded.
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+    
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.statements[statement] += 1
+        if duration_ms > self.slowest_ms:
+            self.slowest_ms = duration_ms
+            self.slowest_statement = statement
+    
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements run at least `threshold` times: the same query issued per row is the usual N+1 shape"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+# Set by the request middleware; sync endpoints see it too because the threadpool copies the context
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    started = conn.info.get("query_started_at")
+    if stats is None or not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time so timings stay paired
+    conn = exception_context.connection
+    started = conn.info.get("query_started_at") if conn is not None else None
+    if started:
+        started.pop()
+
+def instrument(engine: Engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,222 @@
+"""
+Request tracing
+Spans in the OpenTelemetry shape (trace/span/parent IDs, attributes, start and end in
+nanoseconds) for each request, the logical steps inside expensive handlers, and each SQL
+statement. Finished traces are exported as JSON lines to TRACE_EXPORT_PATH and/or POSTed
+in batches to TRACE_COLLECTOR_URL by a background thread.
+
+Off unless TRACING_ENABLED=true. When off, or when a request is not sampled, span() hands
+back a shared no-op context manager and nothing else runs, not even the SQL hooks.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# Fraction of requests without an incoming sampled traceparent that are traced
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL")
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 2.0
+# Spans waiting for export past this are dropped rather than growing without bound
+MAX_QUEUED_SPANS = 100_000
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "status")
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "OK"
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def end(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = "ERROR"
+            self.attributes["error.type"] = type(error).__name__
+        exporter.submit(self)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+@contextmanager
+def _child_span(parent: Span, name: str, attributes: Dict[str, Any]):
+    child = Span(name, parent.trace_id, parent.span_id, attributes)
+    token = current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.end(e)
+        raise
+    else:
+        child.end()
+    finally:
+        current_span.reset(token)
+
+def span(name: str, **attributes):
+    """A child of the current span, or a no-op when this request isn't being traced"""
+    parent = current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return _child_span(parent, name, attributes)
+
+def start_request_span(name: str, traceparent: Optional[bytes], attributes: Dict[str, Any]) -> Optional[Span]:
+    """
+    Root span for a request, or None when it isn't sampled
+    An incoming traceparent decides sampling and joins the caller's trace.
+    """
+    match = TRACEPARENT.match(traceparent.decode("latin-1")) if traceparent else None
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+    else:
+        if random.random() >= TRACE_SAMPLE_RATE:
+            return None
+        trace_id, parent_id = "%032x" % random.getrandbits(128), None
+    return Span(name, trace_id, parent_id, attributes)
+
+class SpanExporter:
+    def __init__(self, path: Optional[str] = TRACE_EXPORT_PATH, collector_url: Optional[str] = TRACE_COLLECTOR_URL):
+        self.path = path
+        self.collector_url = collector_url
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    def submit(self, finished: Span):
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.export_pending()
+    
+    def _run(self):
+        while not self._stop.wait(EXPORT_INTERVAL_SECONDS):
+            self.export_pending()
+    
+    def export_pending(self):
+        while True:
+            batch: List[Span] = []
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            try:
+                self._export([s.to_dict() for s in batch])
+            except Exception:
+                logger.exception("Exporting %d spans failed", len(batch))
+    
+    def _export(self, spans: List[Dict[str, Any]]):
+        if self.path:
+            with open(self.path, "a") as f:
+                for item in spans:
+                    f.write(json.dumps(item, default=str) + "\n")
+        if self.collector_url:
+            request = urllib.request.Request(
+                self.collector_url,
+                data=json.dumps({"spans": spans}, default=str).encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+
+exporter = SpanExporter()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span.get()
+    if parent is None:
+        return
+    # Only the statement text with its placeholders is kept; bound values never leave the process
+    attributes = {"db.system": "postgresql", "db.statement": statement}
+    if parameters:
+        attributes["db.parameter_count"] = len(parameters)
+    if executemany:
+        attributes["db.executemany"] = True
+    conn.info.setdefault("trace_spans", []).append(Span("db.query", parent.trace_id, parent.span_id, attributes))
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        finished = spans.pop()
+        finished.set_attribute("db.rows", cursor.rowcount)
+        finished.end()
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        spans.pop().end(exception_context.original_exception)
+
+def instrument(engine: Engine):
+    """Hook SQL statements into the current trace; a no-op unless tracing is enabled"""
+    if not TRACING_ENABLED or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -3,13 +3,23 @@
 
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+-- Trigram matching for typo-tolerant search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- Great-circle distances and radius searches (contrib modules, available on stock Postgres);
+-- btree_gist lets the activity location index also cover starts_at
+CREATE EXTENSION IF NOT EXISTS cube;
+CREATE EXTENSION IF NOT EXISTS earthdistance;
+CREATE EXTENSION IF NOT EXISTS btree_gist;
 
 -- ===== ENUMS =====
 CREATE TYPE activity_status AS ENUM ('Scheduled', 'Completed', 'Cancelled');
 CREATE TYPE organization_type AS ENUM ('NGO', 'NBE');
-CREATE TYPE attendance_status AS ENUM ('Pending', 'Verified', 'Rejected');
+CREATE TYPE attendance_status AS ENUM ('Pending', 'Verified', 'Rejected', 'Waitlisted');
 CREATE TYPE credit_status AS ENUM ('Available', 'Allocated', 'Expired');
 CREATE TYPE allocation_kind AS ENUM ('MANDATORY_50', 'FREE_CHOICE_50');
+CREATE TYPE brand_event_type AS ENUM ('Impression', 'Click');
+CREATE TYPE outbox_status AS ENUM ('Pending', 'Processed', 'Failed');
+CREATE TYPE idempotency_status AS ENUM ('InProgress', 'Completed');
 
 -- ===== CORE TABLES =====
 
@@ -26,6 +36,7 @@ CREATE TABLE organizations (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     type organization_type NOT NULL,
     name VARCHAR(200) NOT NULL,
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('english', name)) STORED,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -55,6 +66,7 @@ CREATE TABLE profiles (
     total_hours DECIMAL(10,2) DEFAULT 0.00,
     total_credits_earned DECIMAL(10,2) DEFAULT 0.00,
     total_credits_allocated DECIMAL(10,2) DEFAULT 0.00,
+    unread_notifications INTEGER NOT NULL DEFAULT 0, -- Maintained by statement triggers on notifications
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -65,6 +77,11 @@ CREATE TABLE projects (
     region_id UUID NOT NULL REFERENCES regions(id),
     name VARCHAR(200) NOT NULL,
     description TEXT,
+    -- Name matches outrank description matches
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', name), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -76,11 +93,19 @@ CREATE TABLE activities (
     starts_at TIMESTAMP WITH TIME ZONE NOT NULL,
     ends_at TIMESTAMP WITH TIME ZONE NOT NULL,
     location VARCHAR(255),
+    -- Place names and addresses are not English prose, so no stemming
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('simple', coalesce(location, ''))) STORED,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
     capacity INTEGER CHECK (capacity > 0),
+    registered_count INTEGER NOT NULL DEFAULT 0 CHECK (registered_count >= 0), -- Seats held by attendances that are neither waitlisted nor rejected
     status activity_status DEFAULT 'Scheduled',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT valid_activity_duration CHECK (ends_at > starts_at)
+    CONSTRAINT valid_activity_duration CHECK (ends_at > starts_at),
+    CONSTRAINT activity_not_oversubscribed CHECK (capacity IS NULL OR registered_count <= capacity),
+    CONSTRAINT activity_coordinates_paired CHECK ((latitude IS NULL) = (longitude IS NULL)),
+    CONSTRAINT activity_coordinates_range CHECK (latitude BETWEEN -90 AND 90 AND longitude BETWEEN -180 AND 180)
 );
 
 -- Attendance table
@@ -92,6 +117,7 @@ CREATE TABLE attendances (
     check_out_at TIMESTAMP WITH TIME ZONE,
     verified_by_user_id UUID, -- Reference to NGO/NBE representative (could be a separate users table)
     status attendance_status DEFAULT 'Pending',
+    activity_period TSTZRANGE, -- The activity's [starts_at, ends_at), NULL once cancelled; maintained by triggers
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT valid_attendance_duration CHECK (check_out_at IS NULL OR check_out_at > check_in_at),
@@ -118,8 +144,11 @@ CREATE TABLE brand_messages (
     image_url VARCHAR(500),
     active_from TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     active_to TIMESTAMP WITH TIME ZONE,
+    weight INTEGER NOT NULL DEFAULT 1 CHECK (weight > 0), -- Share of rotation among a company's active messages
+    impression_count BIGINT NOT NULL DEFAULT 0, -- Flushed periodically from the API's in-memory buffer
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT valid_brand_message_window CHECK (active_to IS NULL OR active_from IS NULL OR active_to > active_from)
 );
 
 -- Allocations table
@@ -184,18 +213,101 @@ CREATE TABLE ledger_entries (
     ref_id UUID NOT NULL,
     hash VARCHAR(64) NOT NULL,
     prev_hash VARCHAR(64),
+    seq BIGINT GENERATED ALWAYS AS IDENTITY UNIQUE, -- Chain order (prev_hash is the hash at seq - 1)
     timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Transactional outbox: side effects of a write are recorded in the write's own
+-- transaction and carried out afterwards by the outbox worker (at-least-once)
+CREATE TABLE outbox_events (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    event_type VARCHAR(100) NOT NULL, -- e.g., 'attendance.verified', 'allocation.created'
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id UUID NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    idempotency_key VARCHAR(200) UNIQUE, -- Repeated enqueues with the same key are ignored
+    status outbox_status NOT NULL DEFAULT 'Pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP, -- Pushed back on retry
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Idempotency-Key records: the first request with a key runs, retries replay its response
+CREATE TABLE idempotency_keys (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    idempotency_key VARCHAR(255) NOT NULL,
+    method VARCHAR(10) NOT NULL,
+    path VARCHAR(500) NOT NULL,
+    query_string VARCHAR(1000) NOT NULL DEFAULT '', -- Raw query string; the same key on another query is another request
+    request_hash VARCHAR(64) NOT NULL, -- SHA-256 of the request body; a reused key with another body is rejected
+    status idempotency_status NOT NULL DEFAULT 'InProgress',
+    response_status INTEGER,
+    response_content_type VARCHAR(100),
+    response_body BYTEA,
+    locked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP, -- InProgress rows older than the lock timeout can be taken over
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT idempotency_keys_scope UNIQUE (idempotency_key, method, path, query_string)
+);
+
+-- Handlers already run for an event, so redelivery never repeats a completed handler
+CREATE TABLE outbox_handler_runs (
+    event_id UUID NOT NULL REFERENCES outbox_events(id) ON DELETE CASCADE,
+    handler VARCHAR(100) NOT NULL,
+    completed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (event_id, handler)
+);
+
 -- Notifications table
 CREATE TABLE notifications (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     volunteer_id UUID NOT NULL REFERENCES volunteers(id),
     message TEXT NOT NULL,
-    read BOOLEAN DEFAULT FALSE,
+    read BOOLEAN NOT NULL DEFAULT FALSE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Activity statistics (read model, maintained by triggers on attendances and volo_credits)
+CREATE TABLE activity_stats (
+    activity_id UUID PRIMARY KEY REFERENCES activities(id) ON DELETE CASCADE,
+    registered_count INTEGER NOT NULL DEFAULT 0, -- Attendances holding a seat (neither waitlisted nor rejected)
+    waitlisted_count INTEGER NOT NULL DEFAULT 0,
+    checked_in_count INTEGER NOT NULL DEFAULT 0,
+    verified_count INTEGER NOT NULL DEFAULT 0,
+    credits_minted DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Daily allocation rollup per project/region/company/kind (maintained by triggers on allocations)
+-- region_id follows the project's current region (re-bucketed when the project moves)
+CREATE TABLE project_allocation_daily (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    region_id UUID NOT NULL REFERENCES regions(id),
+    company_id UUID REFERENCES companies(id), -- NULL for allocations without a funding company
+    kind allocation_kind NOT NULL,
+    day DATE NOT NULL, -- UTC day of allocations.created_at
+    allocation_count INTEGER NOT NULL DEFAULT 0,
+    total_amount DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+    CONSTRAINT project_allocation_daily_key UNIQUE NULLS NOT DISTINCT (project_id, region_id, company_id, kind, day)
+);
+
+-- Hourly brand message impressions and clicks, pre-aggregated by the API before writing
+-- Range-partitioned by month so old months can be detached or dropped cheaply
+CREATE TABLE brand_impressions (
+    brand_message_id UUID NOT NULL,
+    company_id UUID NOT NULL,
+    event_type brand_event_type NOT NULL,
+    hour TIMESTAMP WITH TIME ZONE NOT NULL, -- start of the UTC hour
+    event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (brand_message_id, event_type, hour)
+) PARTITION BY RANGE (hour);
+
+-- Catches rows for months without a partition so ingestion never fails on a missing one
+CREATE TABLE brand_impressions_default PARTITION OF brand_impressions DEFAULT;
+
 -- ===== INDEXES =====
 
 -- Performance indexes
@@ -209,20 +321,47 @@ CREATE INDEX idx_activities_status ON activities(status);
 CREATE INDEX idx_attendances_volunteer_id ON attendances(volunteer_id);
 CREATE INDEX idx_attendances_activity_id ON attendances(activity_id);
 CREATE INDEX idx_attendances_status ON attendances(status);
+CREATE INDEX idx_attendances_waitlist ON attendances(activity_id, created_at) WHERE status = 'Waitlisted';
+-- A volunteer's sign-ups overlapping a time range (schedule conflicts)
+CREATE INDEX idx_attendances_volunteer_period ON attendances USING GIST (volunteer_id, activity_period) WHERE status <> 'Rejected';
 CREATE INDEX idx_volo_credits_volunteer_id ON volo_credits(volunteer_id);
 CREATE INDEX idx_volo_credits_status ON volo_credits(status);
 CREATE INDEX idx_allocations_volunteer_id ON allocations(volunteer_id);
 CREATE INDEX idx_allocations_project_id ON allocations(project_id);
+CREATE INDEX idx_allocations_company_project ON allocations(company_id, project_id);
+-- Credit balance check on every allocation: SUM(amount) WHERE source_credit_id = ?
+CREATE INDEX idx_allocations_source_credit_id ON allocations(source_credit_id);
+CREATE INDEX idx_brand_messages_company_window ON brand_messages(company_id, active_from, active_to);
 CREATE INDEX idx_ledger_entries_ref_type ON ledger_entries(ref_type);
 CREATE INDEX idx_ledger_entries_ref_id ON ledger_entries(ref_id);
-CREATE INDEX idx_notifications_volunteer_id ON notifications(volunteer_id);
-CREATE INDEX idx_notifications_read ON notifications(read);
+CREATE INDEX idx_outbox_events_pending ON outbox_events(available_at) WHERE status = 'Pending';
+CREATE INDEX idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+CREATE INDEX idx_outbox_events_processed ON outbox_events(processed_at) WHERE status = 'Processed';
+CREATE INDEX idx_notifications_volunteer_created ON notifications(volunteer_id, created_at DESC);
+CREATE INDEX idx_notifications_unread ON notifications(volunteer_id, created_at) WHERE read = false;
 CREATE INDEX idx_company_partnerships_company_id ON company_partnerships(company_id);
 CREATE INDEX idx_company_partnerships_organization_id ON company_partnerships(organization_id);
 CREATE INDEX idx_company_partnerships_active ON company_partnerships(active_from, active_to);
 CREATE INDEX idx_project_company_fundings_project_id ON project_company_fundings(project_id);
 CREATE INDEX idx_project_company_fundings_company_id ON project_company_fundings(company_id);
 CREATE INDEX idx_project_company_fundings_status ON project_company_fundings(status);
+CREATE INDEX idx_project_allocation_daily_region_day ON project_allocation_daily(region_id, day);
+CREATE INDEX idx_project_allocation_daily_project_day ON project_allocation_daily(project_id, day);
+CREATE INDEX idx_brand_impressions_company_hour ON brand_impressions(company_id, hour);
+
+-- Search: full-text matches use the tsvector indexes, typo-tolerant matches (word_similarity, <%) the trigram ones
+CREATE INDEX idx_projects_search ON projects USING GIN (search_vector);
+CREATE INDEX idx_projects_name_trgm ON projects USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_organizations_search ON organizations USING GIN (search_vector);
+CREATE INDEX idx_organizations_name_trgm ON organizations USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_activities_search ON activities USING GIN (search_vector);
+CREATE INDEX idx_activities_location_trgm ON activities USING GIN (location gin_trgm_ops);
+
+-- Nearby activities: one GiST index answers both the radius (earth_box) and the time window,
+-- so a dense city with years of history is not filtered row by row
+CREATE INDEX idx_activities_earth_starts_at ON activities
+    USING GIST (ll_to_earth(latitude, longitude), starts_at)
+    WHERE latitude IS NOT NULL;
 
 -- ===== TRIGGERS =====
 
@@ -280,7 +419,7 @@ JOIN regions r ON v.region_id = r.id
 LEFT JOIN allocations a ON v.id = a.volunteer_id
 GROUP BY v.id, v.name, p.total_hours, p.total_credits_earned, p.total_credits_allocated, r.name;
 
--- Activity summary view
+-- Activity summary view (counters come from activity_stats, so this is primary-key joins only)
 CREATE VIEW activity_summary AS
 SELECT 
     act.id as activity_id,
@@ -292,15 +431,16 @@ SELECT
     p.name as project_name,
     o.name as organization_name,
     r.name as region_name,
-    COUNT(att.id) as registered_volunteers,
-    COUNT(CASE WHEN att.status = 'Verified' THEN 1 END) as verified_attendances
+    s.registered_count as registered_volunteers,
+    s.verified_count as verified_attendances,
+    s.waitlisted_count as waitlisted_volunteers,
+    s.checked_in_count as checked_in_volunteers,
+    s.credits_minted
 FROM activities act
+JOIN activity_stats s ON act.id = s.activity_id
 JOIN projects p ON act.project_id = p.id
 JOIN organizations o ON p.ngo_id = o.id
-JOIN regions r ON p.region_id = r.id
-LEFT JOIN attendances att ON act.id = att.activity_id
-GROUP BY act.id, act.starts_at, act.ends_at, act.location, act.capacity, act.status, 
-         p.name, o.name, r.name;
+JOIN regions r ON p.region_id = r.id;
 
 -- ===== PROFILE AGGREGATION TRIGGERS =====
 
@@ -389,4 +529,576 @@ CREATE TRIGGER update_profile_on_credits_change
 
 CREATE TRIGGER update_profile_on_allocations_change
     AFTER INSERT OR UPDATE OR DELETE ON allocations
-    FOR EACH ROW EXECUTE FUNCTION trigger_update_profile_on_allocations();
\ No newline at end of file
+    FOR EACH ROW EXECUTE FUNCTION trigger_update_profile_on_allocations();
+
+-- Recompute every profile from scratch (repair after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION rebuild_profile_totals()
+RETURNS void AS $$
+BEGIN
+    INSERT INTO profiles (volunteer_id)
+    SELECT id FROM volunteers
+    ON CONFLICT (volunteer_id) DO NOTHING;
+
+    UPDATE profiles p SET
+        total_hours = COALESCE(h.total_hours, 0),
+        total_credits_earned = COALESCE(c.total_credits_earned, 0),
+        total_credits_allocated = COALESCE(al.total_credits_allocated, 0),
+        updated_at = CURRENT_TIMESTAMP
+    FROM profiles p2
+    LEFT JOIN (
+        SELECT volunteer_id,
+               SUM(EXTRACT(EPOCH FROM (check_out_at - check_in_at)) / 3600.0) as total_hours
+        FROM attendances
+        WHERE status = 'Verified' AND check_in_at IS NOT NULL AND check_out_at IS NOT NULL
+        GROUP BY volunteer_id
+    ) h ON h.volunteer_id = p2.volunteer_id
+    LEFT JOIN (
+        SELECT volunteer_id, SUM(amount) as total_credits_earned
+        FROM volo_credits
+        GROUP BY volunteer_id
+    ) c ON c.volunteer_id = p2.volunteer_id
+    LEFT JOIN (
+        SELECT volunteer_id, SUM(amount) as total_credits_allocated
+        FROM allocations
+        GROUP BY volunteer_id
+    ) al ON al.volunteer_id = p2.volunteer_id
+    WHERE p.volunteer_id = p2.volunteer_id;
+END;
+$$ language 'plpgsql';
+
+-- ===== ACTIVITY STATS TRIGGERS =====
+
+-- Every activity gets a counters row up front so the attendance triggers only UPDATE
+CREATE OR REPLACE FUNCTION create_activity_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO activity_stats (activity_id) VALUES (NEW.id);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER create_stats_for_new_activity
+    AFTER INSERT ON activities
+    FOR EACH ROW
+    EXECUTE FUNCTION create_activity_stats();
+
+-- Add (delta = 1) or remove (delta = -1) one attendance's contribution
+CREATE OR REPLACE FUNCTION apply_activity_stats_delta(
+    activity_uuid UUID, att_status attendance_status, checked_in BOOLEAN, delta INTEGER
+)
+RETURNS void AS $$
+BEGIN
+    UPDATE activity_stats SET
+        registered_count = registered_count + CASE WHEN att_status NOT IN ('Waitlisted', 'Rejected') THEN delta ELSE 0 END,
+        waitlisted_count = waitlisted_count + CASE WHEN att_status = 'Waitlisted' THEN delta ELSE 0 END,
+        checked_in_count = checked_in_count + CASE WHEN checked_in THEN delta ELSE 0 END,
+        verified_count = verified_count + CASE WHEN att_status = 'Verified' THEN delta ELSE 0 END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE activity_id = activity_uuid;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_update_activity_stats_on_attendance()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Skip updates that don't move any counter (e.g. check-out, verifier changes)
+    IF TG_OP = 'UPDATE'
+       AND NEW.activity_id = OLD.activity_id
+       AND NEW.status IS NOT DISTINCT FROM OLD.status
+       AND (NEW.check_in_at IS NULL) = (OLD.check_in_at IS NULL) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM apply_activity_stats_delta(OLD.activity_id, OLD.status, OLD.check_in_at IS NOT NULL, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM apply_activity_stats_delta(NEW.activity_id, NEW.status, NEW.check_in_at IS NOT NULL, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_update_activity_stats_on_credits()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.amount = OLD.amount
+       AND NEW.source_attendance_id IS NOT DISTINCT FROM OLD.source_attendance_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' AND OLD.source_attendance_id IS NOT NULL THEN
+        UPDATE activity_stats s SET
+            credits_minted = s.credits_minted - OLD.amount,
+            updated_at = CURRENT_TIMESTAMP
+        FROM attendances a
+        WHERE a.id = OLD.source_attendance_id AND s.activity_id = a.activity_id;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.source_attendance_id IS NOT NULL THEN
+        UPDATE activity_stats s SET
+            credits_minted = s.credits_minted + NEW.amount,
+            updated_at = CURRENT_TIMESTAMP
+        FROM attendances a
+        WHERE a.id = NEW.source_attendance_id AND s.activity_id = a.activity_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER update_activity_stats_on_attendance_change
+    AFTER INSERT OR UPDATE OR DELETE ON attendances
+    FOR EACH ROW EXECUTE FUNCTION trigger_update_activity_stats_on_attendance();
+
+CREATE TRIGGER update_activity_stats_on_credits_change
+    AFTER INSERT OR UPDATE OR DELETE ON volo_credits
+    FOR EACH ROW EXECUTE FUNCTION trigger_update_activity_stats_on_credits();
+
+-- Recompute every counter from scratch (repair after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION rebuild_activity_stats()
+RETURNS void AS $$
+BEGIN
+    INSERT INTO activity_stats (activity_id)
+    SELECT id FROM activities
+    ON CONFLICT (activity_id) DO NOTHING;
+
+    UPDATE activity_stats s SET
+        registered_count = COALESCE(agg.registered_count, 0),
+        waitlisted_count = COALESCE(agg.waitlisted_count, 0),
+        checked_in_count = COALESCE(agg.checked_in_count, 0),
+        verified_count = COALESCE(agg.verified_count, 0),
+        credits_minted = COALESCE(cr.credits_minted, 0),
+        updated_at = CURRENT_TIMESTAMP
+    FROM activity_stats s2
+    LEFT JOIN (
+        SELECT activity_id,
+               COUNT(*) FILTER (WHERE status NOT IN ('Waitlisted', 'Rejected')) as registered_count,
+               COUNT(*) FILTER (WHERE status = 'Waitlisted') as waitlisted_count,
+               COUNT(*) FILTER (WHERE check_in_at IS NOT NULL) as checked_in_count,
+               COUNT(*) FILTER (WHERE status = 'Verified') as verified_count
+        FROM attendances
+        GROUP BY activity_id
+    ) agg ON agg.activity_id = s2.activity_id
+    LEFT JOIN (
+        SELECT a.activity_id, SUM(vc.amount) as credits_minted
+        FROM volo_credits vc
+        JOIN attendances a ON a.id = vc.source_attendance_id
+        GROUP BY a.activity_id
+    ) cr ON cr.activity_id = s2.activity_id
+    WHERE s.activity_id = s2.activity_id;
+END;
+$$ language 'plpgsql';
+
+-- ===== ATTENDANCE PERIOD TRIGGERS =====
+
+-- The time an activity occupies in its volunteers' schedules; cancelled activities occupy none
+CREATE OR REPLACE FUNCTION activity_time_range(starts_at TIMESTAMPTZ, ends_at TIMESTAMPTZ, status activity_status)
+RETURNS TSTZRANGE AS $$
+    SELECT CASE WHEN status = 'Cancelled' THEN NULL ELSE tstzrange(starts_at, ends_at, '[)') END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION trigger_set_attendance_period()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT activity_time_range(a.starts_at, a.ends_at, a.status) INTO NEW.activity_period
+    FROM activities a
+    WHERE a.id = NEW.activity_id;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Rescheduling or cancelling an activity moves its attendances along
+CREATE OR REPLACE FUNCTION trigger_propagate_activity_period()
+RETURNS TRIGGER AS $$
+DECLARE
+    period TSTZRANGE := activity_time_range(NEW.starts_at, NEW.ends_at, NEW.status);
+BEGIN
+    UPDATE attendances SET activity_period = period
+    WHERE activity_id = NEW.id AND activity_period IS DISTINCT FROM period;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_attendance_period_on_write
+    BEFORE INSERT OR UPDATE OF activity_id ON attendances
+    FOR EACH ROW EXECUTE FUNCTION trigger_set_attendance_period();
+
+CREATE TRIGGER propagate_activity_period_on_change
+    AFTER UPDATE OF starts_at, ends_at, status ON activities
+    FOR EACH ROW
+    WHEN (activity_time_range(OLD.starts_at, OLD.ends_at, OLD.status) IS DISTINCT FROM activity_time_range(NEW.starts_at, NEW.ends_at, NEW.status))
+    EXECUTE FUNCTION trigger_propagate_activity_period();
+
+-- Recompute every period (repair after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION rebuild_attendance_periods()
+RETURNS void AS $$
+BEGIN
+    UPDATE attendances at SET activity_period = activity_time_range(a.starts_at, a.ends_at, a.status)
+    FROM activities a
+    WHERE a.id = at.activity_id
+      AND at.activity_period IS DISTINCT FROM activity_time_range(a.starts_at, a.ends_at, a.status);
+END;
+$$ language 'plpgsql';
+
+-- Optional: let the database itself refuse overlapping sign-ups, even from concurrent requests
+-- (the API reports a violation as a schedule conflict). Adding it fails while overlaps exist:
+--
+-- ALTER TABLE attendances ADD CONSTRAINT attendances_no_overlap
+--     EXCLUDE USING GIST (volunteer_id WITH =, activity_period WITH &&) WHERE (status <> 'Rejected');
+
+-- ===== ALLOCATION ROLLUP TRIGGERS =====
+
+-- Add (sign = 1) or remove (sign = -1) one allocation from its daily bucket. Buckets carry
+-- the project's current region; FOR SHARE makes a concurrent region change wait for this
+-- transaction, so the re-bucketing trigger below sees its rows
+CREATE OR REPLACE FUNCTION apply_project_allocation_daily(alloc allocations, sign INTEGER)
+RETURNS void AS $$
+DECLARE
+    project_region UUID;
+BEGIN
+    SELECT p.region_id INTO project_region FROM projects p WHERE p.id = alloc.project_id FOR SHARE;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO project_allocation_daily (project_id, region_id, company_id, kind, day, allocation_count, total_amount)
+    VALUES (alloc.project_id, project_region, alloc.company_id, alloc.kind,
+            (alloc.created_at AT TIME ZONE 'UTC')::date, sign, sign * alloc.amount)
+    ON CONFLICT ON CONSTRAINT project_allocation_daily_key DO UPDATE SET
+        allocation_count = project_allocation_daily.allocation_count + EXCLUDED.allocation_count,
+        total_amount = project_allocation_daily.total_amount + EXCLUDED.total_amount;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_update_project_allocation_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.amount = OLD.amount
+       AND NEW.kind = OLD.kind
+       AND NEW.project_id = OLD.project_id
+       AND NEW.company_id IS NOT DISTINCT FROM OLD.company_id
+       AND NEW.created_at IS NOT DISTINCT FROM OLD.created_at THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM apply_project_allocation_daily(OLD, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM apply_project_allocation_daily(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER update_project_allocation_daily_on_allocations_change
+    AFTER INSERT OR UPDATE OR DELETE ON allocations
+    FOR EACH ROW EXECUTE FUNCTION trigger_update_project_allocation_daily();
+
+-- Move a project's buckets to its new region, so later removals find the rows they subtract from
+CREATE OR REPLACE FUNCTION trigger_rebucket_project_allocation_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    WITH moved AS (
+        DELETE FROM project_allocation_daily
+        WHERE project_id = NEW.id AND region_id <> NEW.region_id
+        RETURNING company_id, kind, day, allocation_count, total_amount
+    )
+    INSERT INTO project_allocation_daily (project_id, region_id, company_id, kind, day, allocation_count, total_amount)
+    SELECT NEW.id, NEW.region_id, company_id, kind, day, SUM(allocation_count), SUM(total_amount)
+    FROM moved
+    GROUP BY company_id, kind, day
+    ON CONFLICT ON CONSTRAINT project_allocation_daily_key DO UPDATE SET
+        allocation_count = project_allocation_daily.allocation_count + EXCLUDED.allocation_count,
+        total_amount = project_allocation_daily.total_amount + EXCLUDED.total_amount;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER rebucket_project_allocation_daily_on_region_change
+    AFTER UPDATE OF region_id ON projects
+    FOR EACH ROW
+    WHEN (OLD.region_id IS DISTINCT FROM NEW.region_id)
+    EXECUTE FUNCTION trigger_rebucket_project_allocation_daily();
+
+-- Recompute the rollup from scratch (repair after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION rebuild_project_allocation_daily()
+RETURNS void AS $$
+BEGIN
+    DELETE FROM project_allocation_daily;
+
+    INSERT INTO project_allocation_daily (project_id, region_id, company_id, kind, day, allocation_count, total_amount)
+    SELECT al.project_id, p.region_id, al.company_id, al.kind,
+           (al.created_at AT TIME ZONE 'UTC')::date, COUNT(*), SUM(al.amount)
+    FROM allocations al
+    JOIN projects p ON p.id = al.project_id
+    GROUP BY al.project_id, p.region_id, al.company_id, al.kind, (al.created_at AT TIME ZONE 'UTC')::date;
+END;
+$$ language 'plpgsql';
+
+-- ===== BUDGET COUNTER TRIGGERS =====
+
+-- project_company_fundings.allocated_budget and company_partnerships.budget_allocated
+-- follow every allocation change; their CHECK constraints then enforce the budgets
+CREATE OR REPLACE FUNCTION apply_budget_counters(alloc allocations, sign INTEGER)
+RETURNS void AS $$
+BEGIN
+    IF alloc.company_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    UPDATE project_company_fundings SET
+        allocated_budget = COALESCE(allocated_budget, 0) + sign * alloc.amount
+    WHERE project_id = alloc.project_id AND company_id = alloc.company_id;
+
+    UPDATE company_partnerships cp SET
+        budget_allocated = COALESCE(cp.budget_allocated, 0) + sign * alloc.amount
+    FROM projects p
+    WHERE p.id = alloc.project_id
+      AND cp.company_id = alloc.company_id
+      AND cp.organization_id = p.ngo_id;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_update_budget_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.amount = OLD.amount
+       AND NEW.project_id = OLD.project_id
+       AND NEW.company_id IS NOT DISTINCT FROM OLD.company_id THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM apply_budget_counters(OLD, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM apply_budget_counters(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER update_budget_counters_on_allocations_change
+    AFTER INSERT OR UPDATE OR DELETE ON allocations
+    FOR EACH ROW EXECUTE FUNCTION trigger_update_budget_counters();
+
+-- Recompute both budget counters from allocations (scripts/reconcile_budget_counters.py
+-- does the same in parallel chunks for large tables)
+CREATE OR REPLACE FUNCTION reconcile_budget_counters()
+RETURNS void AS $$
+BEGIN
+    UPDATE project_company_fundings f SET
+        allocated_budget = COALESCE((
+            SELECT SUM(a.amount)
+            FROM allocations a
+            WHERE a.project_id = f.project_id AND a.company_id = f.company_id
+        ), 0);
+
+    UPDATE company_partnerships cp SET
+        budget_allocated = COALESCE((
+            SELECT SUM(a.amount)
+            FROM allocations a
+            JOIN projects p ON p.id = a.project_id
+            WHERE a.company_id = cp.company_id AND p.ngo_id = cp.organization_id
+        ), 0);
+END;
+$$ language 'plpgsql';
+
+-- ===== BRAND IMPRESSION PARTITIONS =====
+
+-- Create monthly partitions of brand_impressions starting at from_month (no-op for existing ones)
+CREATE OR REPLACE FUNCTION create_brand_impression_partitions(from_month DATE, months INTEGER)
+RETURNS void AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+BEGIN
+    FOR i IN 0..months - 1 LOOP
+        month_start := (date_trunc('month', from_month) + make_interval(months => i))::date;
+        partition_name := 'brand_impressions_' || to_char(month_start, 'YYYY_MM');
+        -- Existing partitions take no lock at all. A missing one is created under an advisory
+        -- lock on its name, so concurrent callers queue instead of racing on CREATE TABLE; the
+        -- one that got there first wins and the others find the table once the lock is theirs
+        IF to_regclass(partition_name) IS NULL THEN
+            PERFORM pg_advisory_xact_lock(hashtext(partition_name));
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF brand_impressions FOR VALUES FROM (%L) TO (%L)',
+                    partition_name,
+                    month_start::timestamp AT TIME ZONE 'UTC',
+                    (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC'
+                );
+            EXCEPTION WHEN duplicate_table THEN
+                NULL;
+            END;
+        END IF;
+    END LOOP;
+END;
+$$ language 'plpgsql';
+
+SELECT create_brand_impression_partitions(CURRENT_DATE, 3);
+
+-- ===== NOTIFICATION COUNTER TRIGGERS =====
+
+-- Statement-level triggers over transition tables: a fan-out to 100k volunteers
+-- runs one grouped UPDATE of profiles instead of 100k row trigger calls
+CREATE OR REPLACE FUNCTION apply_unread_notification_deltas()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE profiles p SET unread_notifications = p.unread_notifications + d.delta
+        FROM (
+            SELECT volunteer_id, COUNT(*) AS delta FROM new_rows WHERE NOT read GROUP BY volunteer_id
+        ) d
+        WHERE p.volunteer_id = d.volunteer_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE profiles p SET unread_notifications = p.unread_notifications - d.delta
+        FROM (
+            SELECT volunteer_id, COUNT(*) AS delta FROM old_rows WHERE NOT read GROUP BY volunteer_id
+        ) d
+        WHERE p.volunteer_id = d.volunteer_id;
+    ELSE
+        -- Net change per volunteer: unread rows after minus unread rows before
+        UPDATE profiles p SET unread_notifications = p.unread_notifications + d.delta
+        FROM (
+            SELECT volunteer_id, SUM(delta) AS delta FROM (
+                SELECT volunteer_id, COUNT(*) FILTER (WHERE NOT read) AS delta FROM new_rows GROUP BY volunteer_id
+                UNION ALL
+                SELECT volunteer_id, -COUNT(*) FILTER (WHERE NOT read) FROM old_rows GROUP BY volunteer_id
+            ) changes
+            GROUP BY volunteer_id
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE p.volunteer_id = d.volunteer_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER update_unread_notifications_on_insert
+    AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_unread_notification_deltas();
+
+CREATE TRIGGER update_unread_notifications_on_update
+    AFTER UPDATE ON notifications
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_unread_notification_deltas();
+
+CREATE TRIGGER update_unread_notifications_on_delete
+    AFTER DELETE ON notifications
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_unread_notification_deltas();
+
+-- Recompute every unread counter from scratch (after bulk loads with triggers disabled)
+CREATE OR REPLACE FUNCTION rebuild_unread_notification_counts()
+RETURNS void AS $$
+BEGIN
+    UPDATE profiles p SET unread_notifications = COALESCE((
+        SELECT COUNT(*) FROM notifications n WHERE n.volunteer_id = p.volunteer_id AND NOT n.read
+    ), 0);
+END;
+$$ language 'plpgsql';
+
+-- ===== LIVE UPDATE NOTIFICATIONS =====
+
+-- Publish a change on the volo_live channel; NOTIFY is delivered at commit (never for
+-- rolled-back writes) and identical payloads within a transaction are sent once.
+-- Each API worker LISTENs once and pushes events to SSE subscribers of the topic.
+CREATE OR REPLACE FUNCTION publish_live_update(topic TEXT, kind TEXT, op TEXT, payload JSONB)
+RETURNS void AS $$
+BEGIN
+    PERFORM pg_notify('volo_live', (jsonb_build_object('topic', topic, 'kind', kind, 'op', op) || payload)::text);
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_live_attendance_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    att attendances;
+    payload JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        att := OLD;
+    ELSE
+        att := NEW;
+    END IF;
+
+    payload := jsonb_build_object(
+        'id', att.id,
+        'activity_id', att.activity_id,
+        'volunteer_id', att.volunteer_id,
+        'status', att.status
+    );
+    PERFORM publish_live_update('activity:' || att.activity_id, 'attendance', TG_OP, payload);
+    PERFORM publish_live_update('volunteer:' || att.volunteer_id, 'attendance', TG_OP, payload);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_live_credit_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    credit volo_credits;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        credit := OLD;
+    ELSE
+        credit := NEW;
+    END IF;
+
+    PERFORM publish_live_update('volunteer:' || credit.volunteer_id, 'credit', TG_OP, jsonb_build_object(
+        'id', credit.id,
+        'volunteer_id', credit.volunteer_id,
+        'amount', credit.amount,
+        'status', credit.status
+    ));
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION trigger_live_allocation_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    alloc allocations;
+    payload JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        alloc := OLD;
+    ELSE
+        alloc := NEW;
+    END IF;
+
+    payload := jsonb_build_object(
+        'id', alloc.id,
+        'volunteer_id', alloc.volunteer_id,
+        'project_id', alloc.project_id,
+        'amount', alloc.amount,
+        'allocation_kind', alloc.kind
+    );
+    PERFORM publish_live_update('volunteer:' || alloc.volunteer_id, 'allocation', TG_OP, payload);
+    PERFORM publish_live_update('project:' || alloc.project_id, 'allocation', TG_OP, payload);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER publish_live_attendance_update
+    AFTER INSERT OR UPDATE OR DELETE ON attendances
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_live_attendance_update();
+
+CREATE TRIGGER publish_live_credit_update
+    AFTER INSERT OR UPDATE OR DELETE ON volo_credits
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_live_credit_update();
+
+CREATE TRIGGER publish_live_allocation_update
+    AFTER INSERT OR UPDATE OR DELETE ON allocations
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_live_allocation_update();
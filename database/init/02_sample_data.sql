@@ -295,4 +295,15 @@ BEGIN
     FOR vol_id IN SELECT id FROM volunteers LOOP
         PERFORM update_profile_totals(vol_id);
     END LOOP;
-END $$;
\ No newline at end of file
+END $$;
+
+-- ===== SEAT COUNTER INITIALIZATION =====
+-- Sample attendances are inserted directly, so sync the maintained seat counters
+UPDATE activities act SET registered_count = (
+    SELECT COUNT(*) FROM attendances att
+    WHERE att.activity_id = act.id AND att.status NOT IN ('Waitlisted', 'Rejected')
+);
+
+-- ===== BUDGET COUNTER INITIALIZATION =====
+-- Funding and partnership rows above carry illustrative counters; derive them from the allocations instead
+SELECT reconcile_budget_counters();
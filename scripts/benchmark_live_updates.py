@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Volo Live Update Benchmark
+Opens increasing numbers of server-sent event subscribers on one activity topic,
+writes to the activity's roster and measures how long each subscriber waits for
+the change to arrive
+
+Defaults: 100, 1,000 and 5,000 subscribers, 10 writes each. Latency includes the
+broker's coalescing window (LIVE_COALESCE_MS on the API, 250ms by default).
+
+Run the API with RATE_LIMIT_ENABLED=false; all subscribers connect from this one
+address and would be throttled long before the larger counts are reached.
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+import httpx
+import psycopg2
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+SUBSCRIBER_COUNTS = [int(n) for n in os.getenv('BENCH_SUBSCRIBER_COUNTS', '100,1000,5000').split(',')]
+WRITES = int(os.getenv('BENCH_WRITES', '10'))
+# Pause between writes; must exceed the coalescing window so every write is its own event
+WRITE_INTERVAL_SECONDS = float(os.getenv('BENCH_WRITE_INTERVAL_SECONDS', '1.0'))
+# Fail the run if p99 delivery latency goes over this many milliseconds
+MAX_P99_MS = float(os.getenv('BENCH_MAX_P99_MS', '2000'))
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def seed(conn):
+    """Create one activity with one attendance, return (activity_id, attendance_id)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, region_id FROM projects LIMIT 1")
+        row = cur.fetchone()
+        if row is None:
+            print("❌ No projects found in database")
+            sys.exit(1)
+        project_id, region_id = row
+
+        activity_id, volunteer_id, attendance_id = (str(uuid.uuid4()) for _ in range(3))
+        starts_at = datetime.now() + timedelta(days=7)
+        cur.execute("""
+            INSERT INTO activities (id, project_id, starts_at, ends_at, location)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (activity_id, project_id, starts_at, starts_at + timedelta(hours=3), "Benchmark venue"))
+        cur.execute("""
+            INSERT INTO volunteers (id, name, email, age, region_id) VALUES (%s, %s, %s, %s, %s)
+        """, (volunteer_id, "Live Bench Volunteer", f"bench.live.{uuid.uuid4().hex[:8]}@example.com", 30, region_id))
+        cur.execute("""
+            INSERT INTO attendances (id, volunteer_id, activity_id) VALUES (%s, %s, %s)
+        """, (attendance_id, volunteer_id, activity_id))
+    conn.commit()
+    return activity_id, attendance_id
+
+async def subscribe(client, topic, received, connected):
+    """Hold one SSE stream open and record the arrival time of every attendance event"""
+    async with client.stream('GET', '/api/v1/live/events', params={"topics": topic}) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        connected()
+        async for line in response.aiter_lines():
+            if line.startswith('event: attendance'):
+                received.append(time.perf_counter())
+
+async def wait_for_subscriptions(client, expected, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        stats = (await client.get('/api/v1/live/stats')).json()
+        if stats['subscriptions'] >= expected and stats['listening']:
+            return True
+        await asyncio.sleep(0.2)
+    return False
+
+async def run_round(conn, topic, attendance_id, subscribers):
+    limits = httpx.Limits(max_connections=subscribers + 10, max_keepalive_connections=subscribers + 10)
+    timeout = httpx.Timeout(60.0, read=None)
+    async with httpx.AsyncClient(base_url=API_BASE_URL, limits=limits, timeout=timeout) as client:
+        received = [[] for _ in range(subscribers)]
+        opened = []
+        streams = [
+            asyncio.create_task(subscribe(client, topic, received[i], lambda: opened.append(1)))
+            for i in range(subscribers)
+        ]
+        if not await wait_for_subscriptions(client, subscribers):
+            print(f"❌ Only {len(opened)} of {subscribers} subscribers connected")
+            for stream in streams:
+                stream.cancel()
+            return None
+
+        writes = []
+        for _ in range(WRITES):
+            with conn.cursor() as cur:
+                cur.execute("UPDATE attendances SET updated_at = now() WHERE id = %s", (attendance_id,))
+            conn.commit()
+            writes.append(time.perf_counter())
+            await asyncio.sleep(WRITE_INTERVAL_SECONDS)
+
+        for stream in streams:
+            stream.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+
+    latencies, missed = [], 0
+    for arrivals in received:
+        for i, written_at in enumerate(writes):
+            next_write = writes[i + 1] if i + 1 < len(writes) else float('inf')
+            delivered = [t for t in arrivals if written_at <= t < next_write]
+            if delivered:
+                latencies.append((delivered[0] - written_at) * 1000)
+            else:
+                missed += 1
+    latencies.sort()
+    return latencies, missed
+
+def main():
+    print(f"🚀 Live update benchmark: subscribers {SUBSCRIBER_COUNTS}, {WRITES} writes each")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    activity_id, attendance_id = seed(conn)
+    topic = f"activity:{activity_id}"
+    print(f"✅ Seeded activity {activity_id}")
+
+    ok = True
+    print(f"{'subscribers':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'mean ms':>9} {'missed':>7}")
+    for subscribers in SUBSCRIBER_COUNTS:
+        result = asyncio.run(run_round(conn, topic, attendance_id, subscribers))
+        if result is None:
+            ok = False
+            continue
+        latencies, missed = result
+        if not latencies:
+            print(f"{subscribers:>12} no events delivered")
+            ok = False
+            continue
+        print(f"{subscribers:>12} {percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} "
+              f"{percentile(latencies, 99):>9.1f} {latencies[-1]:>9.1f} {statistics.mean(latencies):>9.1f} {missed:>7}")
+        if missed:
+            ok = False
+        if percentile(latencies, 99) > MAX_P99_MS:
+            ok = False
+    conn.close()
+
+    if ok:
+        print("🎉 Every subscriber received every write within bounds")
+    else:
+        print(f"❌ Missed events or p99 latency above {MAX_P99_MS:.0f}ms")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Volo Notification Fan-out Benchmark
+Announces one message to every volunteer of a freshly seeded region and checks
+that the fan-out, the unread counters and the inbox queries hold up at scale
+
+Defaults: 100,000 recipients. Volunteers are seeded with COPY directly in the
+database; the fan-out, inbox reads and mark-read calls go through the API.
+
+Run the API with RATE_LIMIT_ENABLED=false; the fan-out costs 20 tokens and the inbox
+and mark-read samples all come from this one address, so they would mostly get 429s.
+"""
+
+import io
+import os
+import sys
+import time
+import uuid
+import random
+import statistics
+
+import httpx
+import psycopg2
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+RECIPIENTS = int(os.getenv('BENCH_RECIPIENTS', '100000'))
+INBOX_SAMPLES = int(os.getenv('BENCH_INBOX_SAMPLES', '200'))
+# Fail the run if the fan-out request takes longer than this many seconds
+MAX_FANOUT_SECONDS = float(os.getenv('BENCH_MAX_FANOUT_SECONDS', '30'))
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def seed(conn):
+    """Create a region with RECIPIENTS volunteers, return (region_id, volunteer_ids)"""
+    run_id = uuid.uuid4().hex[:8]
+    region_id = str(uuid.uuid4())
+    volunteer_ids = [str(uuid.uuid4()) for _ in range(RECIPIENTS)]
+
+    buffer = io.StringIO()
+    for i, vid in enumerate(volunteer_ids):
+        buffer.write(f"{vid}\tBench Volunteer {i}\tbench.fanout.{run_id}.{i}@example.com\t30\t{region_id}\n")
+    buffer.seek(0)
+
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO regions (id, name) VALUES (%s, %s)", (region_id, f"Benchmark Region {run_id}"))
+        cur.copy_expert("COPY volunteers (id, name, email, age, region_id) FROM STDIN", buffer)
+    conn.commit()
+    return region_id, volunteer_ids
+
+def unread_totals(conn, region_id):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM notifications n JOIN volunteers v ON v.id = n.volunteer_id
+                 WHERE v.region_id = %s AND NOT n.read),
+                (SELECT COALESCE(SUM(p.unread_notifications), 0) FROM profiles p JOIN volunteers v ON v.id = p.volunteer_id
+                 WHERE v.region_id = %s)
+        """, (region_id, region_id))
+        return cur.fetchone()
+
+def main():
+    print(f"🚀 Notification fan-out benchmark: {RECIPIENTS} recipients")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    started = time.perf_counter()
+    region_id, volunteer_ids = seed(conn)
+    print(f"✅ Seeded region {region_id} with {len(volunteer_ids)} volunteers in {time.perf_counter() - started:.1f}s")
+
+    ok = True
+    with httpx.Client(base_url=API_BASE_URL, timeout=300.0) as client:
+        started = time.perf_counter()
+        response = client.post('/api/v1/notifications/fan-out', json={
+            "region_id": region_id,
+            "message": "Benchmark announcement: new activity in your region"
+        })
+        fanout_seconds = time.perf_counter() - started
+        if response.status_code != 200:
+            print(f"❌ Fan-out failed: HTTP {response.status_code} {response.text}")
+            sys.exit(1)
+        recipients = response.json()['recipients']
+        print(f"⏱  Fan-out to {recipients} volunteers in {fanout_seconds:.2f}s ({recipients / fanout_seconds:.0f} rows/s)")
+
+        sample = random.sample(volunteer_ids, min(INBOX_SAMPLES, len(volunteer_ids)))
+        inbox_latencies = []
+        for vid in sample:
+            started = time.perf_counter()
+            response = client.get(f'/api/v1/notifications/volunteer/{vid}', params={"unread_only": True, "limit": 20})
+            inbox_latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200 or response.json()['unread_count'] != 1:
+                print(f"❌ Unexpected inbox for {vid}: HTTP {response.status_code} {response.text}")
+                ok = False
+                break
+        inbox_latencies.sort()
+
+        mark_latencies = []
+        for vid in sample:
+            started = time.perf_counter()
+            response = client.post(f'/api/v1/notifications/volunteer/{vid}/mark-read', json={})
+            mark_latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200 or response.json()['unread_count'] != 0:
+                print(f"❌ Mark-read failed for {vid}: HTTP {response.status_code} {response.text}")
+                ok = False
+                break
+        mark_latencies.sort()
+
+    notifications_unread, counters_unread = unread_totals(conn, region_id)
+    conn.close()
+
+    print(f"   inbox   p50 {percentile(inbox_latencies, 50):.1f}ms  p99 {percentile(inbox_latencies, 99):.1f}ms  "
+          f"mean {statistics.mean(inbox_latencies):.1f}ms")
+    print(f"   mark-read p50 {percentile(mark_latencies, 50):.1f}ms  p99 {percentile(mark_latencies, 99):.1f}ms  "
+          f"mean {statistics.mean(mark_latencies):.1f}ms")
+    print(f"   database: unread notifications={notifications_unread} unread counters={counters_unread}")
+
+    if recipients != RECIPIENTS:
+        print(f"❌ Expected {RECIPIENTS} recipients")
+        ok = False
+    if notifications_unread != counters_unread or counters_unread != RECIPIENTS - len(sample):
+        print("❌ Unread counters drifted from the notification rows")
+        ok = False
+    if fanout_seconds > MAX_FANOUT_SECONDS:
+        print(f"❌ Fan-out slower than {MAX_FANOUT_SECONDS:.0f}s")
+        ok = False
+
+    if ok:
+        print("🎉 Fan-out complete and unread counters consistent")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Volo Rate Limit Microbenchmark
+Drives the rate limiting middleware in-process around a no-op ASGI app and reports
+the per-request overhead it adds, then checks that buckets actually throttle
+
+No API or database needed. Set RATE_LIMIT_REDIS_URL to also measure the shared store.
+"""
+
+import os
+import sys
+import time
+import uuid
+import json
+import asyncio
+import statistics
+
+# Generous limits so the overhead runs never get throttled
+os.environ.setdefault('RATE_LIMIT_CLIENT_BURST', '1000000000')
+os.environ.setdefault('RATE_LIMIT_VOLUNTEER_BURST', '1000000000')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from middleware.rate_limit import RateLimitMiddleware  # noqa: E402
+from services.rate_limit import InMemoryBucketStore, Limit, create_store  # noqa: E402
+
+# Configuration
+REQUESTS = int(os.getenv('BENCH_REQUESTS', '200000'))
+CLIENTS = int(os.getenv('BENCH_CLIENTS', '10000'))
+# Fail the run if the median overhead goes over this many microseconds
+MAX_OVERHEAD_US = float(os.getenv('BENCH_MAX_OVERHEAD_US', '25'))
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def noop_app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+def make_scope(method, path, client_ip):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(b"content-type", b"application/json")],
+        "client": (client_ip, 50000)
+    }
+
+def make_receive(body):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    return receive
+
+async def send(message):
+    pass
+
+async def time_requests(app, requests):
+    """Per-request latency in microseconds"""
+    timings = []
+    for scope, body in requests:
+        start = time.perf_counter_ns()
+        await app(scope, make_receive(body), send)
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    timings.sort()
+    return timings
+
+def build_requests(kind):
+    volunteers = [str(uuid.uuid4()) for _ in range(1000)]
+    requests = []
+    for i in range(REQUESTS):
+        client_ip = f"10.{(i % CLIENTS) // 65536}.{(i % CLIENTS) // 256 % 256}.{i % 256}"
+        volunteer_id = volunteers[i % len(volunteers)]
+        if kind == "plain GET":
+            requests.append((make_scope("GET", "/api/v1/projects/", client_ip), b""))
+        elif kind == "volunteer in path":
+            requests.append((make_scope("GET", f"/api/v1/volunteers/{volunteer_id}/dashboard", client_ip), b""))
+        else:
+            body = json.dumps({"volunteer_id": volunteer_id, "project_id": str(uuid.uuid4()),
+                               "amount": "5.00", "kind": "MANDATORY_50"}).encode()
+            requests.append((make_scope("POST", "/api/v1/allocations/", client_ip), body))
+    return requests
+
+async def measure_overhead(store_name, store):
+    limited = RateLimitMiddleware(noop_app, store=store, enabled=True)
+    results = []
+    for kind in ("plain GET", "volunteer in path", "volunteer in body"):
+        requests = build_requests(kind)
+        baseline = await time_requests(noop_app, requests)
+        with_limit = await time_requests(limited, requests)
+        overhead_p50 = statistics.median(with_limit) - statistics.median(baseline)
+        overhead_p99 = percentile(with_limit, 99) - percentile(baseline, 99)
+        print(f"   {store_name:<10} {kind:<18} p50 +{overhead_p50:6.2f} µs   p99 +{overhead_p99:6.2f} µs")
+        results.append(overhead_p50)
+    return results
+
+def check_throttling():
+    """A client burst of 10 at 1 token/s: the 11th request is refused with Retry-After 1"""
+    now = [0.0]
+    store = InMemoryBucketStore(clock=lambda: now[0])
+    limit = Limit(burst=10, rate=1)
+    decisions = [store.take([("client:a", limit)], 1) for _ in range(11)]
+    if not all(d.allowed for d in decisions[:10]) or decisions[10].allowed or decisions[10].retry_after != 1:
+        print("❌ Burst was not enforced")
+        return False
+
+    # A costly request that one bucket can pay and the other can't takes from neither
+    store.take([("volunteer:v", Limit(burst=5, rate=1))], 4)
+    denied = store.take([("client:b", limit), ("volunteer:v", Limit(burst=5, rate=1))], 5)
+    allowed = store.take([("client:b", limit)], 10)
+    if denied.allowed or denied.retry_after != 4 or not allowed.allowed:
+        print("❌ Multi-bucket take was not all-or-nothing")
+        return False
+
+    now[0] += 1
+    if not store.take([("client:a", limit)], 1).allowed:
+        print("❌ Bucket did not refill")
+        return False
+    print("✅ Burst, refill, Retry-After and all-or-nothing takes behave")
+    return True
+
+def main():
+    print(f"🚀 Rate limit microbenchmark ({REQUESTS:,} requests per case, {CLIENTS:,} clients)")
+    print("=" * 60)
+    ok = check_throttling()
+
+    print("\n⏱  Overhead over a no-op ASGI app")
+    overheads = asyncio.run(measure_overhead("in-process", InMemoryBucketStore()))
+    if os.getenv('RATE_LIMIT_REDIS_URL'):
+        asyncio.run(measure_overhead("redis", create_store()))
+
+    worst = max(overheads)
+    print("\n" + "=" * 60)
+    if worst > MAX_OVERHEAD_US:
+        print(f"❌ In-process overhead {worst:.2f} µs exceeds {MAX_OVERHEAD_US} µs")
+        ok = False
+    else:
+        print(f"✅ In-process overhead at most {worst:.2f} µs per request (limit {MAX_OVERHEAD_US} µs)")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
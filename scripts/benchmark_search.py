@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Volo Search Benchmark
+Seeds a large project catalog (1,000,000 projects by default) under one benchmark NGO and
+times GET /api/v1/search against it: selective queries (a place name, a cause plus a
+place), misspelled place names that only trigram matching finds, and broad single-word
+queries. Also pages through a query with the keyset cursor and checks no hit repeats.
+
+Project names are derived from their index, so later runs reuse the seeded rows and only
+add missing ones. Selective and misspelled queries must stay under BENCH_MAX_P95_MS;
+broad queries rank every match and are reported only.
+"""
+
+import io
+import os
+import sys
+import time
+import uuid
+import random
+import hashlib
+import statistics
+
+import httpx
+import psycopg2
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+PROJECTS = int(os.getenv('BENCH_PROJECTS', '1000000'))
+QUERIES = int(os.getenv('BENCH_QUERIES', '200'))
+CHUNK_SIZE = int(os.getenv('BENCH_CHUNK_SIZE', '50000'))
+SEED = int(os.getenv('BENCH_SEED', '42'))
+# Fail the run if p95 latency of selective or misspelled queries goes over this many milliseconds
+MAX_P95_MS = float(os.getenv('BENCH_MAX_P95_MS', '20'))
+
+NGO_NAME = "Search Benchmark NGO"
+CAUSES = [
+    "Community Garden", "River Cleanup", "Food Bank", "Literacy Program", "Animal Rescue",
+    "Youth Mentoring", "Senior Companionship", "Tree Planting", "Beach Restoration", "Coding Club",
+    "Refugee Support", "Homeless Shelter", "Health Clinic", "Book Drive", "Wildlife Survey",
+    "Clothing Drive", "Meal Delivery", "Habitat Repair", "Climate Education", "Sports Coaching"
+]
+SYLLABLES = ["ka", "lo", "mi", "ren", "tor", "vel", "sa", "bri", "don", "fel",
+             "gar", "hul", "is", "jun", "mar", "nor", "pel", "quin", "ros", "tal"]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def project_words(index):
+    """(cause, place, district) of the index-th benchmark project; ~160,000 distinct places"""
+    digest = hashlib.blake2b(f"{SEED}:{index}".encode(), digest_size=12).digest()
+    place = "".join(SYLLABLES[b % len(SYLLABLES)] for b in digest[:3 + digest[3] % 2]).capitalize()
+    district = "".join(SYLLABLES[b % len(SYLLABLES)] for b in digest[4:7]).capitalize()
+    return CAUSES[digest[8] % len(CAUSES)], place, district
+
+def misspell(word, rng):
+    """The word with two neighbouring letters swapped (never the first one)"""
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def seed(conn):
+    """Create the benchmark NGO and its missing projects, return (ngo_id, project count)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM regions ORDER BY name LIMIT 1")
+        row = cur.fetchone()
+        if row is None:
+            print("❌ No regions found in database")
+            sys.exit(1)
+        region_id = row[0]
+
+        cur.execute("SELECT id FROM organizations WHERE name = %s AND type = 'NGO'", (NGO_NAME,))
+        row = cur.fetchone()
+        if row is None:
+            cur.execute("INSERT INTO organizations (type, name) VALUES ('NGO', %s) RETURNING id", (NGO_NAME,))
+            row = cur.fetchone()
+        ngo_id = row[0]
+        cur.execute("SELECT COUNT(*) FROM projects WHERE ngo_id = %s", (ngo_id,))
+        existing = cur.fetchone()[0]
+    conn.commit()
+
+    if existing >= PROJECTS:
+        print(f"✅ Reusing {existing:,} benchmark projects")
+        return ngo_id, existing
+
+    print(f"🌱 Seeding {PROJECTS - existing:,} projects (the GIN indexes make this take a while)")
+    started = time.perf_counter()
+    for start in range(existing, PROJECTS, CHUNK_SIZE):
+        buffer = io.StringIO()
+        for index in range(start, min(start + CHUNK_SIZE, PROJECTS)):
+            cause, place, district = project_words(index)
+            buffer.write(f"{uuid.uuid4()}\t{ngo_id}\t{region_id}\t{cause} {place}\t"
+                         f"{cause} volunteers working in {place}, {district} district\n")
+        buffer.seek(0)
+        with conn.cursor() as cur:
+            cur.copy_expert("COPY projects (id, ngo_id, region_id, name, description) FROM STDIN", buffer)
+        conn.commit()
+        print(f"   {min(start + CHUNK_SIZE, PROJECTS):,} / {PROJECTS:,}")
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE projects")
+    conn.commit()
+    print(f"✅ Seeded in {time.perf_counter() - started:.0f}s")
+    return ngo_id, PROJECTS
+
+def build_queries(count):
+    """Query strings per class, drawn from names that exist"""
+    rng = random.Random(SEED)
+    queries = {'selective': [], 'misspelled': [], 'broad': []}
+    for _ in range(count):
+        cause, place, _ = project_words(rng.randrange(PROJECTS))
+        if rng.random() < 0.5:
+            queries['selective'].append(place)
+        else:
+            queries['selective'].append(f"{cause.split()[-1]} {place}")
+        queries['misspelled'].append(misspell(place, rng))
+    queries['broad'] = [cause.split()[0] for cause in CAUSES]
+    return queries
+
+def timed_search(client, params):
+    started = time.perf_counter()
+    response = client.get('/api/v1/search/', params=params)
+    elapsed = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    return elapsed, response.json()
+
+def run_class(client, ngo_id, queries):
+    latencies, empty = [], 0
+    for q in queries:
+        elapsed, body = timed_search(client, {'q': q, 'types': 'project', 'ngo_id': str(ngo_id)})
+        latencies.append(elapsed)
+        if not body['results']:
+            empty += 1
+    latencies.sort()
+    return latencies, empty
+
+def check_paging(client, ngo_id, q, pages=5):
+    """Page through q with the cursor; True when no hit shows up twice and ranks never increase"""
+    seen, last_rank, cursor = set(), None, None
+    for _ in range(pages):
+        params = {'q': q, 'types': 'project', 'ngo_id': str(ngo_id), 'limit': 50}
+        if cursor:
+            params['cursor'] = cursor
+        _, body = timed_search(client, params)
+        for hit in body['results']:
+            if hit['id'] in seen or (last_rank is not None and hit['rank'] > last_rank):
+                return False
+            seen.add(hit['id'])
+            last_rank = hit['rank']
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    return True
+
+def main():
+    print(f"🚀 Search benchmark: {PROJECTS:,} projects, {QUERIES} queries per class")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    ngo_id, _ = seed(conn)
+    conn.close()
+
+    queries = build_queries(QUERIES)
+    ok = True
+    with httpx.Client(base_url=API_BASE_URL, timeout=30.0) as client:
+        # Warm the connection pool and the index pages the first queries would otherwise pay for
+        for q in queries['selective'][:10]:
+            timed_search(client, {'q': q, 'types': 'project', 'ngo_id': str(ngo_id)})
+
+        for name, class_queries in queries.items():
+            latencies, empty = run_class(client, ngo_id, class_queries)
+            p95 = percentile(latencies, 95)
+            print(f"⏱  {name}: {len(latencies)} queries  p50 {percentile(latencies, 50):.1f}ms  "
+                  f"p95 {p95:.1f}ms  p99 {percentile(latencies, 99):.1f}ms  max {latencies[-1]:.1f}ms  "
+                  f"mean {statistics.mean(latencies):.1f}ms  no hits {empty}")
+            if name != 'broad' and p95 > MAX_P95_MS:
+                print(f"❌ {name} p95 latency above {MAX_P95_MS:.0f}ms")
+                ok = False
+            if name == 'selective' and empty:
+                print(f"❌ {empty} selective queries found nothing")
+                ok = False
+
+        if check_paging(client, ngo_id, queries['broad'][0]):
+            print("✅ Cursor pages are disjoint and ordered by rank")
+        else:
+            print("❌ Cursor paging repeated a hit or went out of rank order")
+            ok = False
+
+    if ok:
+        print("🎉 Search latency within bounds")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
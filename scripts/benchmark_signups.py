@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Volo Activity Sign-up Benchmark
+Fires a burst of concurrent sign-ups at one capacity-limited activity and checks
+that seat reservation never oversubscribes it
+
+Defaults: 10,000 sign-ups for a 200-seat activity. Volunteers are seeded directly
+in the database (the API would dominate setup time), sign-ups go through the API.
+
+Run the API with RATE_LIMIT_ENABLED=false; every sign-up comes from this one address
+and the client bucket would turn most of them into 429s.
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+import httpx
+import psycopg2
+from psycopg2.extras import execute_values
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+SIGNUPS = int(os.getenv('BENCH_SIGNUPS', '10000'))
+CAPACITY = int(os.getenv('BENCH_CAPACITY', '200'))
+CONCURRENCY = int(os.getenv('BENCH_CONCURRENCY', '500'))
+# Fail the run if p99 latency goes over this many milliseconds
+MAX_P99_MS = float(os.getenv('BENCH_MAX_P99_MS', '2000'))
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def seed(conn):
+    """Create one activity and SIGNUPS volunteers, return (activity_id, volunteer_ids)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, region_id FROM projects LIMIT 1")
+        row = cur.fetchone()
+        if row is None:
+            print("❌ No projects found in database")
+            sys.exit(1)
+        project_id, region_id = row
+
+        activity_id = str(uuid.uuid4())
+        starts_at = datetime.now() + timedelta(days=7)
+        cur.execute("""
+            INSERT INTO activities (id, project_id, starts_at, ends_at, location, capacity)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (activity_id, project_id, starts_at, starts_at + timedelta(hours=3), "Benchmark venue", CAPACITY))
+
+        run_id = uuid.uuid4().hex[:8]
+        volunteer_ids = [str(uuid.uuid4()) for _ in range(SIGNUPS)]
+        execute_values(cur, """
+            INSERT INTO volunteers (id, name, email, age, region_id) VALUES %s
+        """, [
+            (vid, f"Bench Volunteer {i}", f"bench.{run_id}.{i}@example.com", 30, region_id)
+            for i, vid in enumerate(volunteer_ids)
+        ], page_size=1000)
+    conn.commit()
+    return activity_id, volunteer_ids
+
+async def sign_up(client, semaphore, activity_id, volunteer_id, latencies, statuses):
+    async with semaphore:
+        started = time.perf_counter()
+        response = await client.post('/api/v1/attendances/', json={
+            "volunteer_id": volunteer_id,
+            "activity_id": activity_id
+        })
+        latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code == 200:
+            statuses.append(response.json()['status'])
+        else:
+            statuses.append(f"HTTP {response.status_code}")
+
+async def run_burst(activity_id, volunteer_ids):
+    latencies, statuses = [], []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=API_BASE_URL, limits=limits, timeout=60.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            sign_up(client, semaphore, activity_id, vid, latencies, statuses)
+            for vid in volunteer_ids
+        ))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+def main():
+    print(f"🚀 Sign-up benchmark: {SIGNUPS} sign-ups, {CAPACITY} seats, concurrency {CONCURRENCY}")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    activity_id, volunteer_ids = seed(conn)
+    print(f"✅ Seeded activity {activity_id} and {len(volunteer_ids)} volunteers")
+
+    latencies, statuses, elapsed = asyncio.run(run_burst(activity_id, volunteer_ids))
+    latencies.sort()
+
+    seated = sum(1 for s in statuses if s != 'Waitlisted' and not s.startswith('HTTP'))
+    waitlisted = statuses.count('Waitlisted')
+    errors = [s for s in statuses if s.startswith('HTTP')]
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT registered_count FROM activities WHERE id = %s", (activity_id,))
+        registered_count = cur.fetchone()[0]
+        cur.execute("""
+            SELECT COUNT(*) FILTER (WHERE status NOT IN ('Waitlisted', 'Rejected')), COUNT(*) FILTER (WHERE status = 'Waitlisted')
+            FROM attendances WHERE activity_id = %s
+        """, (activity_id,))
+        db_seated, db_waitlisted = cur.fetchone()
+    conn.close()
+
+    print(f"⏱  {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"   p50 {percentile(latencies, 50):.1f}ms  p95 {percentile(latencies, 95):.1f}ms  "
+          f"p99 {percentile(latencies, 99):.1f}ms  max {latencies[-1]:.1f}ms  mean {statistics.mean(latencies):.1f}ms")
+    print(f"   seated {seated}  waitlisted {waitlisted}  errors {len(errors)}")
+    print(f"   database: registered_count={registered_count} seated={db_seated} waitlisted={db_waitlisted}")
+
+    ok = True
+    if db_seated > CAPACITY or registered_count > CAPACITY:
+        print("❌ Activity is oversubscribed")
+        ok = False
+    if db_seated != registered_count:
+        print("❌ registered_count drifted from the attendance rows")
+        ok = False
+    if errors:
+        print(f"❌ {len(errors)} sign-ups failed")
+        ok = False
+    if percentile(latencies, 99) > MAX_P99_MS:
+        print(f"❌ p99 latency above {MAX_P99_MS:.0f}ms")
+        ok = False
+
+    if ok:
+        print("🎉 No oversubscription and latency within bounds")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
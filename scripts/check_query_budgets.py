@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Volo Query Budget Check
+Calls read endpoints on a running API and fails any whose X-DB-Query-Count header
+exceeds its declared budget. List endpoints are called with a full page, so a
+relationship loaded per row (N+1) blows the budget instead of hiding behind a
+page of one. Company endpoints are called for the companies with the most fundings,
+several at once where the endpoint takes a list.
+"""
+
+import os
+import sys
+from collections import Counter
+
+import requests
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+PAGE_SIZE = int(os.getenv('BUDGET_PAGE_SIZE', '100'))
+# How many funded companies the analytics endpoint is asked about in one call
+ANALYTICS_COMPANIES = int(os.getenv('BUDGET_ANALYTICS_COMPANIES', '10'))
+
+# (path, max statements); {volunteer_id} and friends are filled from existing rows
+BUDGETS = [
+    ("/api/v1/volunteers/?limit={page_size}", 2),
+    ("/api/v1/volunteers/{volunteer_id}", 2),
+    ("/api/v1/volunteers/{volunteer_id}/profile", 1),
+    ("/api/v1/volunteers/{volunteer_id}/dashboard", 1),
+    ("/api/v1/projects/?limit={page_size}", 2),
+    ("/api/v1/activities/?limit={page_size}", 2),
+    ("/api/v1/attendances/?limit={page_size}", 2),
+    ("/api/v1/allocations/?limit={page_size}", 1),
+    ("/api/v1/allocations/volunteer/{volunteer_id}/summary", 1),
+    ("/api/v1/notifications/volunteer/{volunteer_id}?limit={page_size}", 4),
+    ("/api/v1/organizations/?limit={page_size}", 1),
+    ("/api/v1/companies/?limit={page_size}", 1),
+    ("/api/v1/project-fundings/?limit={page_size}", 1),
+    ("/api/v1/project-fundings/company/{funded_company_id}/approved-projects", 1),
+    ("/api/v1/company-analytics/?{analytics_company_ids}", 3),
+    ("/api/v1/partnerships/?limit={page_size}", 1),
+    ("/api/v1/brand-messages/active/{company_id}/all", 0),
+]
+
+def first_id(path, key=None):
+    response = requests.get(f"{API_BASE_URL}{path}")
+    response.raise_for_status()
+    data = response.json()
+    rows = data[key] if key else data
+    return rows[0]['id'] if rows else None
+
+def funded_companies():
+    """Company ids from a page of fundings, most fundings first"""
+    response = requests.get(f"{API_BASE_URL}/api/v1/project-fundings/?limit=100")
+    response.raise_for_status()
+    counts = Counter(funding['company_id'] for funding in response.json())
+    return [company_id for company_id, _ in counts.most_common()]
+
+def main():
+    print(f"🚀 Query budget check against {API_BASE_URL}")
+    print("=" * 60)
+
+    ids = {
+        "volunteer_id": first_id("/api/v1/volunteers/?limit=1", "volunteers"),
+        "company_id": first_id("/api/v1/companies/?limit=1"),
+        "page_size": PAGE_SIZE
+    }
+    if ids["volunteer_id"] is None or ids["company_id"] is None:
+        print("❌ No volunteers or companies found; load sample data first")
+        sys.exit(1)
+    # Per-company or per-funding loads only show up with several of each
+    companies = funded_companies()
+    if len(companies) < 2:
+        print("❌ Fewer than two companies with active fundings; load sample data first")
+        sys.exit(1)
+    ids["funded_company_id"] = companies[0]
+    ids["analytics_company_ids"] = "&".join(f"company_ids={c}" for c in companies[:ANALYTICS_COMPANIES])
+
+    failures = 0
+    for template, budget in BUDGETS:
+        path = template.format(**ids)
+        response = requests.get(f"{API_BASE_URL}{path}")
+        count = response.headers.get('X-DB-Query-Count')
+        if response.status_code != 200 or count is None:
+            print(f"❌ {path}: HTTP {response.status_code}, query count {'missing' if count is None else count}")
+            failures += 1
+            continue
+
+        timing = response.headers.get('Server-Timing', '')
+        if int(count) > budget:
+            print(f"❌ {path}: {count} queries (budget {budget})  {timing}")
+            failures += 1
+        else:
+            print(f"✅ {path}: {count}/{budget} queries  {timing}")
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"❌ {failures} of {len(BUDGETS)} endpoints over budget or failing")
+    else:
+        print(f"🎉 All {len(BUDGETS)} endpoints within their query budgets")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
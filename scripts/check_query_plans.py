@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Volo Query Plan Check
+Runs the routers' hot queries under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) against a
+seeded database and compares each plan with a saved snapshot. Fails when a query
+sequentially scans a large table, when its plan shape changes, or when the buffers it
+touches grow past the allowed regression.
+
+Load production-sized data first (scripts/generate_test_data.py); on the sample data
+every table is small enough that a sequential scan is the right plan. The rows the
+queries are parameterized with are picked deterministically when recording and saved
+in the snapshot; comparisons reuse them, so every run explains the same lookups.
+
+Usage:
+    PLAN_UPDATE_SNAPSHOTS=true python scripts/check_query_plans.py   # record
+    python scripts/check_query_plans.py                              # compare
+"""
+
+import os
+import sys
+import json
+import subprocess
+from datetime import datetime, timezone
+
+import psycopg2
+
+# Configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+SNAPSHOT_PATH = os.getenv('PLAN_SNAPSHOT_PATH', 'scripts/baselines/query_plans.json')
+UPDATE_SNAPSHOTS = os.getenv('PLAN_UPDATE_SNAPSHOTS', 'false').lower() == 'true'
+# A sequential scan over a table the planner estimates at more rows than this fails the check
+LARGE_TABLE_ROWS = int(os.getenv('PLAN_LARGE_TABLE_ROWS', '10000'))
+# Buffers (shared hit + read) may grow this much over the snapshot, and always by the slack
+MAX_BUFFER_REGRESSION_PCT = float(os.getenv('PLAN_MAX_BUFFER_REGRESSION_PCT', '50'))
+BUFFER_SLACK = int(os.getenv('PLAN_BUFFER_SLACK', '16'))
+
+# Rows the queries are parameterized with: a volunteer with a credit allocated to a funded
+# project, one of their attendances, and the position of some activity. Ordered by primary
+# key so a snapshot recorded twice on the same data picks the same rows
+PARAMETERS_SQL = """
+    SELECT al.volunteer_id, al.source_credit_id AS credit_id, al.project_id, al.company_id,
+           at.activity_id, p.region_id, here.latitude, here.longitude
+    FROM (SELECT latitude, longitude FROM activities WHERE latitude IS NOT NULL ORDER BY id LIMIT 1) here,
+         allocations al
+    JOIN attendances at ON at.volunteer_id = al.volunteer_id
+    JOIN projects p ON p.id = al.project_id
+    WHERE al.source_credit_id IS NOT NULL AND al.company_id IS NOT NULL
+    ORDER BY al.id, at.id
+    LIMIT 1
+"""
+# Saved parameters still name existing rows (a reloaded database gets new ids)
+PARAMETERS_EXIST_SQL = """
+    SELECT EXISTS (
+        SELECT 1 FROM allocations al
+        JOIN attendances at ON at.volunteer_id = al.volunteer_id AND at.activity_id = %(activity_id)s
+        WHERE al.volunteer_id = %(volunteer_id)s AND al.source_credit_id = %(credit_id)s
+          AND al.project_id = %(project_id)s AND al.company_id = %(company_id)s
+    )
+"""
+
+# (name, SQL) as the routers issue them; ORM queries are written out the way SQLAlchemy emits them
+QUERIES = [
+    ("allocations.funding_check", """
+        SELECT * FROM project_company_fundings
+        WHERE project_id = %(project_id)s AND company_id = %(company_id)s AND status = 'ACTIVE'
+        LIMIT 1
+    """),
+    ("allocations.credit_balance", """
+        SELECT COALESCE(SUM(amount), 0) FROM allocations
+        WHERE source_credit_id = %(credit_id)s
+    """),
+    ("allocations.volunteer_summary", """
+        SELECT kind, COUNT(id), COALESCE(SUM(amount), 0) FROM allocations
+        WHERE volunteer_id = %(volunteer_id)s
+        GROUP BY kind
+    """),
+    ("attendances.duplicate_check", """
+        SELECT * FROM attendances
+        WHERE volunteer_id = %(volunteer_id)s AND activity_id = %(activity_id)s
+        LIMIT 1
+    """),
+    ("volunteers.dashboard", """
+        SELECT volunteer_id, volunteer_name, total_hours, total_credits_earned,
+               total_credits_allocated, projects_supported, region_name
+        FROM impact_dashboard
+        WHERE volunteer_id = %(volunteer_id)s
+    """),
+    ("activities.summary", """
+        SELECT * FROM activity_summary
+        WHERE activity_id = %(activity_id)s
+    """),
+    ("volunteers.list_by_region", """
+        SELECT * FROM volunteers
+        WHERE region_id = %(region_id)s
+        LIMIT 100
+    """),
+    ("projects.list_by_region", """
+        SELECT * FROM projects
+        WHERE region_id = %(region_id)s
+        LIMIT 100
+    """),
+    ("activities.list_by_project", """
+        SELECT * FROM activities
+        WHERE project_id = %(project_id)s
+        LIMIT 100
+    """),
+    ("attendances.list_by_activity", """
+        SELECT * FROM attendances
+        WHERE activity_id = %(activity_id)s AND status = 'Verified'
+        LIMIT 100
+    """),
+    ("attendances.list_by_volunteer", """
+        SELECT * FROM attendances
+        WHERE volunteer_id = %(volunteer_id)s
+        LIMIT 100
+    """),
+    ("allocations.list_by_project", """
+        SELECT * FROM allocations
+        WHERE project_id = %(project_id)s
+        LIMIT 100
+    """),
+    ("projects.top_by_region", """
+        SELECT project_id, SUM(total_amount) AS total_amount FROM project_allocation_daily
+        WHERE region_id = %(region_id)s AND day >= CURRENT_DATE - 30
+        GROUP BY project_id
+        ORDER BY total_amount DESC
+        LIMIT 10
+    """),
+    ("activities.nearby", """
+        SELECT a.*, earth_distance(ll_to_earth(%(latitude)s, %(longitude)s), ll_to_earth(a.latitude, a.longitude)) AS distance_m
+        FROM activities a
+        WHERE a.latitude IS NOT NULL
+          AND earth_box(ll_to_earth(%(latitude)s, %(longitude)s), 10000) @> ll_to_earth(a.latitude, a.longitude)
+          AND earth_distance(ll_to_earth(%(latitude)s, %(longitude)s), ll_to_earth(a.latitude, a.longitude)) <= 10000
+          AND a.starts_at >= now()
+        ORDER BY distance_m, a.starts_at
+        LIMIT 20
+    """),
+    ("activities.calendar_by_region", """
+        SELECT date_trunc('week', a.starts_at, 'UTC') AS bucket_start, COUNT(a.id), SUM(a.capacity)
+        FROM activities a
+        JOIN projects p ON p.id = a.project_id
+        WHERE p.region_id = %(region_id)s AND a.starts_at >= now() AND a.starts_at < now() + interval '90 days'
+        GROUP BY bucket_start
+        ORDER BY bucket_start
+    """),
+    ("attendances.schedule_conflicts", """
+        SELECT at.id, at.activity_id FROM attendances at
+        WHERE at.volunteer_id = %(volunteer_id)s
+          AND at.status <> 'Rejected'
+          AND at.activity_period && (SELECT tstzrange(starts_at, ends_at, '[)') FROM activities WHERE id = %(activity_id)s)
+          AND at.activity_id <> %(activity_id)s
+    """),
+]
+
+def plan_nodes(node, depth=0):
+    """Each node of a JSON plan with its depth, parents first"""
+    yield node, depth
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child, depth + 1)
+
+def describe(node):
+    label = node['Node Type']
+    if 'Index Name' in node:
+        label += f" using {node['Index Name']}"
+    if 'Relation Name' in node:
+        label += f" on {node['Relation Name']}"
+    return label
+
+def explain(cur, sql, parameters):
+    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", parameters)
+    return cur.fetchone()[0][0]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def check(current, previous, row_estimates):
+    """Failures for one query's plan"""
+    failures = []
+    for node, _ in plan_nodes(current['plan']):
+        relation = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and row_estimates.get(relation, 0) > LARGE_TABLE_ROWS:
+            failures.append(f"sequential scan on {relation} (~{row_estimates[relation]:,.0f} rows)")
+
+    if previous:
+        if current['shape'] != previous['shape']:
+            failures.append("plan shape changed:\n      was  " + "\n           ".join(previous['shape'])
+                            + "\n      now  " + "\n           ".join(current['shape']))
+        allowed = max(previous['buffers'] * (1 + MAX_BUFFER_REGRESSION_PCT / 100), previous['buffers'] + BUFFER_SLACK)
+        if current['buffers'] > allowed:
+            failures.append(f"buffers {previous['buffers']:,} → {current['buffers']:,} (allowed {allowed:,.0f})")
+    return failures
+
+def main():
+    print("🔍 Query plan check" + (" (recording snapshots)" if UPDATE_SNAPSHOTS else ""))
+    print("=" * 60)
+
+    snapshot = {}
+    if not UPDATE_SNAPSHOTS:
+        if not os.path.exists(SNAPSHOT_PATH):
+            print(f"❌ No snapshot at {SNAPSHOT_PATH}; record one with PLAN_UPDATE_SNAPSHOTS=true")
+            sys.exit(1)
+        with open(SNAPSHOT_PATH) as f:
+            snapshot = json.load(f)
+        print(f"Comparing with {SNAPSHOT_PATH} ({snapshot.get('git_commit') or 'unknown commit'})")
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    parameters = snapshot.get('parameters')
+    if parameters:
+        cur.execute(PARAMETERS_EXIST_SQL, parameters)
+        if not cur.fetchone()[0]:
+            print("❌ The snapshot's parameter rows are not in this database; re-record with PLAN_UPDATE_SNAPSHOTS=true")
+            sys.exit(1)
+    else:
+        cur.execute(PARAMETERS_SQL)
+        row = cur.fetchone()
+        if row is None:
+            print("❌ No company-backed allocation with an attendance found; load data with scripts/generate_test_data.py first")
+            sys.exit(1)
+        # Stored as JSON in the snapshot: ids as strings, coordinates as floats
+        parameters = {c.name: (value if isinstance(value, float) else str(value))
+                      for c, value in zip(cur.description, row)}
+    print(f"Parameters: volunteer {parameters['volunteer_id']}, activity {parameters['activity_id']}, project {parameters['project_id']}")
+    cur.execute("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')")
+    row_estimates = dict(cur.fetchall())
+
+    results = {}
+    failures = 0
+    for name, sql in QUERIES:
+        explained = explain(cur, sql, parameters)
+        plan = explained['Plan']
+        current = {
+            'plan': plan,
+            'shape': [f"{'  ' * depth}{describe(node)}" for node, depth in plan_nodes(plan)],
+            'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+            'execution_ms': explained['Execution Time']
+        }
+        problems = check(current, snapshot.get('queries', {}).get(name), row_estimates)
+        if problems:
+            failures += 1
+            print(f"❌ {name}")
+            for problem in problems:
+                print(f"   {problem}")
+        else:
+            print(f"✅ {name}: {current['buffers']:,} buffers, {current['execution_ms']:.2f} ms  {current['shape'][0].strip()}")
+        results[name] = {key: current[key] for key in ('shape', 'buffers', 'execution_ms')}
+    # EXPLAIN ANALYZE executes the statements; nothing here writes, but leave no transaction behind
+    conn.rollback()
+    conn.close()
+
+    if UPDATE_SNAPSHOTS:
+        os.makedirs(os.path.dirname(os.path.abspath(SNAPSHOT_PATH)), exist_ok=True)
+        with open(SNAPSHOT_PATH, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.now(timezone.utc).isoformat(),
+                'git_commit': git_commit(),
+                'row_estimates': {table: row_estimates.get(table) for table in ('volunteers', 'activities', 'attendances', 'allocations')},
+                'parameters': parameters,
+                'queries': results
+            }, f, indent=2)
+        print(f"\n💾 Snapshot saved to {SNAPSHOT_PATH}")
+
+    print("\n" + "=" * 60)
+    if failures:
+        print(f"❌ {failures} of {len(QUERIES)} queries regressed")
+    else:
+        print(f"🎉 All {len(QUERIES)} query plans within budget")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
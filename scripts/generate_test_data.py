@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Volo Synthetic Data Generator
+Loads a referentially consistent dataset at production scale for benchmarks: regions,
+NGOs and NBEs, companies, volunteers, projects, activities, attendances, credits,
+allocations, fundings, partnerships and the ledger hash chain.
+
+Rows are generated in chunks by a pool of worker processes and streamed into PostgreSQL
+with COPY, one connection and transaction per chunk. Every value is derived from --seed,
+--anchor and the row's index, so the same arguments always produce the same dataset (ids
+included) whatever the worker count. --volunteers 1000000 loads about 20 million rows.
+
+With --disable-triggers the per-row profile, activity stats, rollup, budget and live
+update triggers are switched off during the load and the aggregates they maintain are
+rebuilt once at the end. Disabling a trigger is table-wide, so keep live traffic off the
+database while it runs. With triggers on, participation chunks (attendances, credits,
+allocations) are loaded one at a time: their triggers update the same profile, activity
+stats, rollup and budget counter rows, and concurrent chunks would deadlock on them.
+
+Usage:
+    python scripts/generate_test_data.py [--volunteers 100000] [--seed 42] [--workers 4]
+                                         [--chunk-size 5000] [--disable-triggers]
+"""
+
+import os
+import io
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from multiprocessing import Pool
+
+import psycopg2
+from faker import Faker
+
+# Configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+
+# Activities are spread over two years of history and the next three months
+HISTORY_DAYS = 730
+HORIZON_DAYS = 90
+CENT = Decimal("0.01")
+CREDITS_PER_HOUR = Decimal("10")
+# Budgets are loaded open (the DECIMAL(12,2) maximum) and sized from what was allocated at the end
+OPEN_BUDGET = Decimal("9999999999.99")
+# Activities lie within this many degrees of latitude of their region's center (about 50 km)
+ACTIVITY_SPREAD_DEGREES = 0.45
+NGO_SUFFIXES = ['Foundation', 'Trust', 'Initiative', 'Alliance', 'Network', 'Collective']
+
+# Tables whose user triggers --disable-triggers switches off for the load
+TRIGGER_TABLES = ['volunteers', 'activities', 'attendances', 'volo_credits', 'allocations']
+# Tasks whose chunks share trigger-maintained counter rows; loaded one at a time unless
+# triggers are disabled
+SERIAL_WITH_TRIGGERS = {'participation'}
+
+ATTENDANCE_COLUMNS = ['id', 'volunteer_id', 'activity_id', 'check_in_at', 'check_out_at', 'verified_by_user_id', 'status', 'created_at']
+CREDIT_COLUMNS = ['id', 'volunteer_id', 'source_attendance_id', 'amount', 'status', 'granted_at', 'expires_at', 'created_at']
+ALLOCATION_COLUMNS = ['id', 'volunteer_id', 'project_id', 'company_id', 'source_credit_id', 'amount', 'kind', 'created_at']
+
+class Layout:
+    """Row counts and the index arithmetic every worker shares"""
+    def __init__(self, volunteers, regions, attendances_per_volunteer, seed, anchor, chunk_size):
+        self.seed = seed
+        self.anchor = anchor
+        self.chunk_size = chunk_size
+        self.regions = regions
+        self.volunteers = volunteers
+        self.ngos = max(regions, volunteers // 500)
+        self.nbes = max(1, self.ngos // 10)
+        self.companies = max(1, volunteers // 2000)
+        # Multiples of the region count, so index % regions is the region of a volunteer,
+        # project or activity alike
+        self.projects = max(1, volunteers // 50 // regions) * regions
+        self.activities = max(1, volunteers // 5 // regions) * regions
+        # Every other project has one company funding it
+        self.fundings = (self.projects + 1) // 2
+        self.attendances_per_volunteer = attendances_per_volunteer
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_OID, f"volo-synthetic-{seed}")
+
+    def id(self, table, key):
+        return uuid.uuid5(self.namespace, f"{table}:{key}")
+
+    def chunks(self, total):
+        return [(start, min(start + self.chunk_size, total)) for start in range(0, total, self.chunk_size)]
+
+    def funding_company(self, project):
+        return (project // 2) % self.companies
+
+def _hash(layout, *parts):
+    digest = hashlib.blake2b(repr((layout.seed,) + parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+_fake = None
+
+def _faker(layout, *parts):
+    """The worker's Faker, reseeded for one chunk"""
+    global _fake
+    if _fake is None:
+        _fake = Faker()
+    _fake.seed_instance(_hash(layout, *parts))
+    return _fake
+
+def activity_schedule(layout, a):
+    """starts_at, ends_at and whether activity a was cancelled; attendances need it without loading the activity"""
+    h = _hash(layout, 'activity', a)
+    quarter_hours = (HISTORY_DAYS + HORIZON_DAYS) * 96
+    starts_at = layout.anchor - timedelta(days=HISTORY_DAYS) + timedelta(minutes=15 * (h % quarter_hours))
+    ends_at = starts_at + timedelta(hours=1 + (h >> 32) % 6)
+    return starts_at, ends_at, (h >> 48) % 50 == 0
+
+def region_center(layout, r):
+    h = _hash(layout, 'region-center', r)
+    return -55 + (h % 12500) / 100, -180 + ((h >> 16) % 36000) / 100
+
+def activity_coordinates(layout, a):
+    """(latitude, longitude) near the activity's region center; one in sixteen has none"""
+    h = _hash(layout, 'activity-coordinates', a)
+    if h >> 60 == 0:
+        return None, None
+    latitude, longitude = region_center(layout, a % layout.regions)
+    d_lat = ((h % 10001) / 10000 - 0.5) * 2 * ACTIVITY_SPREAD_DEGREES
+    d_lng = (((h >> 16) % 10001) / 10000 - 0.5) * 2 * ACTIVITY_SPREAD_DEGREES / math.cos(math.radians(latitude))
+    return round(latitude + d_lat, 6), round((longitude + d_lng + 180) % 360 - 180, 6)
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', ' ').replace('\n', ' ')
+
+def copy_rows(cur, table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(v) for v in row) + '\n')
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return len(rows)
+
+def load_regions(cur, layout, start, end):
+    fake = _faker(layout, 'regions', start)
+    rows = [(layout.id('region', r), f"{fake.country()} ({layout.seed}-{r})") for r in range(start, end)]
+    return {'regions': copy_rows(cur, 'regions', ['id', 'name'], rows)}
+
+def load_organizations(cur, layout, start, end):
+    fake = _faker(layout, 'organizations', start)
+    rows = []
+    for o in range(start, end):
+        if o < layout.ngos:
+            rows.append((layout.id('organization', o), 'NGO', f"{fake.last_name()} {fake.random_element(NGO_SUFFIXES)}"))
+        else:
+            rows.append((layout.id('organization', o), 'NBE', fake.company()))
+    return {'organizations': copy_rows(cur, 'organizations', ['id', 'type', 'name'], rows)}
+
+def load_companies(cur, layout, start, end):
+    fake = _faker(layout, 'companies', start)
+    rows = [(layout.id('company', c), fake.company()) for c in range(start, end)]
+    return {'companies': copy_rows(cur, 'companies', ['id', 'name'], rows)}
+
+def load_volunteers(cur, layout, start, end):
+    fake = _faker(layout, 'volunteers', start)
+    rows = []
+    for v in range(start, end):
+        name = fake.name()
+        local = '.'.join(''.join(c for c in name.lower() if c.isalnum() or c == ' ').split())
+        rows.append((
+            layout.id('volunteer', v),
+            name[:100],
+            f"{local}.{layout.seed}.{v}@{fake.free_email_domain()}",
+            fake.random_int(16, 75),
+            layout.id('region', v % layout.regions)
+        ))
+    return {'volunteers': copy_rows(cur, 'volunteers', ['id', 'name', 'email', 'age', 'region_id'], rows)}
+
+def load_projects(cur, layout, start, end):
+    fake = _faker(layout, 'projects', start)
+    rows = [(
+        layout.id('project', p),
+        layout.id('organization', p % layout.ngos),
+        layout.id('region', p % layout.regions),
+        fake.catch_phrase()[:200],
+        fake.paragraph()
+    ) for p in range(start, end)]
+    return {'projects': copy_rows(cur, 'projects', ['id', 'ngo_id', 'region_id', 'name', 'description'], rows)}
+
+def load_activities(cur, layout, start, end):
+    fake = _faker(layout, 'activities', start)
+    rows = []
+    for a in range(start, end):
+        starts_at, ends_at, cancelled = activity_schedule(layout, a)
+        status = 'Cancelled' if cancelled else 'Completed' if ends_at <= layout.anchor else 'Scheduled'
+        # Capacity is raised at the end wherever the random sign-ups overshot it
+        capacity = None if fake.random_int(0, 9) < 3 else fake.random_int(20, 80)
+        latitude, longitude = activity_coordinates(layout, a)
+        rows.append((
+            layout.id('activity', a),
+            layout.id('project', a % layout.projects),
+            starts_at,
+            ends_at,
+            f"{fake.street_address()}, {fake.city()}"[:255],
+            latitude,
+            longitude,
+            capacity,
+            status
+        ))
+    columns = ['id', 'project_id', 'starts_at', 'ends_at', 'location', 'latitude', 'longitude', 'capacity', 'status']
+    return {'activities': copy_rows(cur, 'activities', columns, rows)}
+
+def load_fundings(cur, layout, start, end):
+    fake = _faker(layout, 'fundings', start)
+    since = layout.anchor - timedelta(days=HISTORY_DAYS)
+    rows = [(
+        layout.id('funding', f),
+        layout.id('project', 2 * f),
+        layout.id('company', layout.funding_company(2 * f)),
+        OPEN_BUDGET,
+        'ACTIVE',
+        since,
+        fake.name()
+    ) for f in range(start, end)]
+    columns = ['id', 'project_id', 'company_id', 'max_budget', 'status', 'approved_at', 'approved_by']
+    return {'project_company_fundings': copy_rows(cur, 'project_company_fundings', columns, rows)}
+
+def load_partnerships(cur, layout, start, end):
+    """One partnership per (company, NGO) pair that a funding connects"""
+    fake = _faker(layout, 'partnerships')
+    pairs = sorted({(layout.funding_company(2 * f), (2 * f) % layout.ngos) for f in range(layout.fundings)})
+    since = (layout.anchor - timedelta(days=HISTORY_DAYS)).date()
+    rows = [(
+        layout.id('partnership', f"{c}:{o}"),
+        layout.id('company', c),
+        layout.id('organization', o),
+        'FUNDING',
+        OPEN_BUDGET,
+        since,
+        fake.sentence()
+    ) for c, o in pairs]
+    columns = ['id', 'company_id', 'organization_id', 'partnership_type', 'budget_committed', 'active_from', 'description']
+    return {'company_partnerships': copy_rows(cur, 'company_partnerships', columns, rows)}
+
+def participation(layout, start, end):
+    """
+    Attendances, credits, allocations and ledger events of volunteers [start, end)
+    Volunteers sign up for activities in their own region; past ones are checked in and
+    out and mostly verified, and most credits are split 50/50 like the API does.
+    """
+    rng = random.Random(_hash(layout, 'participation', start))
+    per_region = layout.activities // layout.regions
+    attendances, credits, allocations, events = [], [], [], []
+    for v in range(start, end):
+        region = v % layout.regions
+        volunteer_id = layout.id('volunteer', v)
+        count = min(per_region, rng.randint(0, 2 * layout.attendances_per_volunteer))
+        for k in rng.sample(range(per_region), count):
+            a = region + k * layout.regions
+            starts_at, ends_at, cancelled = activity_schedule(layout, a)
+            if cancelled:
+                continue
+            activity_id = layout.id('activity', a)
+            attendance_id = layout.id('attendance', f"{v}:{a}")
+            signed_up_at = min(starts_at - timedelta(days=rng.randint(1, 30)), layout.anchor)
+            if ends_at > layout.anchor:
+                status = 'Waitlisted' if rng.random() < 0.05 else 'Pending'
+                attendances.append((attendance_id, volunteer_id, activity_id, None, None, None, status, signed_up_at))
+                continue
+
+            check_in_at = starts_at + timedelta(minutes=rng.randint(0, 15))
+            check_out_at = ends_at - timedelta(minutes=rng.randint(0, 15))
+            roll = rng.random()
+            if roll >= 0.7:
+                status = 'Rejected' if roll < 0.75 else 'Pending'
+                attendances.append((attendance_id, volunteer_id, activity_id, check_in_at, check_out_at, None, status, signed_up_at))
+                continue
+
+            project = a % layout.projects
+            verifier_id = layout.id('verifier', project % layout.ngos)
+            attendances.append((attendance_id, volunteer_id, activity_id, check_in_at, check_out_at, verifier_id, 'Verified', signed_up_at))
+
+            minutes = int((check_out_at - check_in_at).total_seconds() // 60)
+            amount = (Decimal(minutes) * CREDITS_PER_HOUR / 60).quantize(CENT, rounding=ROUND_HALF_UP)
+            granted_at = min(check_out_at + timedelta(hours=rng.randint(1, 72)), layout.anchor)
+            expires_at = granted_at + timedelta(days=365)
+            allocated = rng.random() < 0.6
+            credit_status = 'Allocated' if allocated else 'Expired' if expires_at <= layout.anchor else 'Available'
+            credit_id = layout.id('credit', f"{v}:{a}")
+            credits.append((credit_id, volunteer_id, attendance_id, amount, credit_status, granted_at, expires_at, granted_at))
+            verified = {
+                "attendance_id": str(attendance_id),
+                "volunteer_id": str(volunteer_id),
+                "activity_id": str(activity_id),
+                "credit_id": str(credit_id),
+                "credit_amount": str(amount)
+            }
+            events.append(('Attendance', attendance_id, verified))
+            events.append(('VoloCredit', credit_id, verified))
+            if not allocated:
+                continue
+
+            allocated_at = min(granted_at + timedelta(days=rng.randint(0, 30)), layout.anchor)
+            mandatory = (amount / 2).quantize(CENT, rounding=ROUND_HALF_UP)
+            free_project = region + rng.randrange(layout.projects // layout.regions) * layout.regions
+            for kind, target, share in (('MANDATORY_50', project, mandatory), ('FREE_CHOICE_50', free_project, amount - mandatory)):
+                company_id = None
+                if target % 2 == 0 and rng.random() < 0.5:
+                    company_id = layout.id('company', layout.funding_company(target))
+                allocation_id = layout.id('allocation', f"{v}:{a}:{kind}")
+                project_id = layout.id('project', target)
+                allocations.append((allocation_id, volunteer_id, project_id, company_id, credit_id, share, kind, allocated_at))
+                events.append(('Allocation', allocation_id, {
+                    "allocation_id": str(allocation_id),
+                    "volunteer_id": str(volunteer_id),
+                    "project_id": str(project_id),
+                    "company_id": str(company_id) if company_id else None,
+                    "amount": str(share),
+                    "kind": kind
+                }))
+    return attendances, credits, allocations, events
+
+def load_participation(cur, layout, start, end):
+    attendances, credits, allocations, _ = participation(layout, start, end)
+    return {
+        'attendances': copy_rows(cur, 'attendances', ATTENDANCE_COLUMNS, attendances),
+        'volo_credits': copy_rows(cur, 'volo_credits', CREDIT_COLUMNS, credits),
+        'allocations': copy_rows(cur, 'allocations', ALLOCATION_COLUMNS, allocations)
+    }
+
+def load_ledger(cur, layout, start, end):
+    """
+    Extend the ledger hash chain with every participation chunk, in chunk order
+    The chunks are replayed rather than read back, so this runs alongside their load. One
+    transaction holds the ledger lock the API appends under, from head to last entry.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext('ledger_entries'))")
+    cur.execute("SELECT hash FROM ledger_entries ORDER BY seq DESC LIMIT 1")
+    head = cur.fetchone()
+    prev_hash = head[0] if head else None
+    loaded = 0
+    for chunk_start, chunk_end in layout.chunks(end):
+        rows = []
+        for ref_type, ref_id, payload in participation(layout, chunk_start, chunk_end)[3]:
+            material = "|".join([prev_hash or "", ref_type, str(ref_id), json.dumps(payload, sort_keys=True, default=str)])
+            entry_hash = hashlib.sha256(material.encode()).hexdigest()
+            rows.append((layout.id('ledger', f"{ref_type}:{ref_id}"), ref_type, ref_id, entry_hash, prev_hash))
+            prev_hash = entry_hash
+        loaded += copy_rows(cur, 'ledger_entries', ['id', 'ref_type', 'ref_id', 'hash', 'prev_hash'], rows)
+    return {'ledger_entries': loaded}
+
+LOADERS = {
+    'regions': load_regions,
+    'organizations': load_organizations,
+    'companies': load_companies,
+    'volunteers': load_volunteers,
+    'projects': load_projects,
+    'activities': load_activities,
+    'fundings': load_fundings,
+    'partnerships': load_partnerships,
+    'participation': load_participation,
+    'ledger': load_ledger
+}
+
+def phases(layout):
+    """Task lists in foreign key order; the tasks within a phase are independent"""
+    return [
+        ("Regions, organizations and companies", [
+            ('regions', 0, layout.regions),
+            ('organizations', 0, layout.ngos + layout.nbes),
+            ('companies', 0, layout.companies)
+        ]),
+        ("Volunteers and projects",
+            [('volunteers', s, e) for s, e in layout.chunks(layout.volunteers)]
+            + [('projects', s, e) for s, e in layout.chunks(layout.projects)]),
+        ("Activities, fundings and partnerships",
+            [('activities', s, e) for s, e in layout.chunks(layout.activities)]
+            + [('fundings', s, e) for s, e in layout.chunks(layout.fundings)]
+            + [('partnerships', 0, 0)]),
+        # The ledger is one sequential chain, so it goes first and runs the whole phase
+        ("Attendances, credits, allocations and ledger",
+            [('ledger', 0, layout.volunteers)]
+            + [('participation', s, e) for s, e in layout.chunks(layout.volunteers)])
+    ]
+
+_layout = None
+
+def _init_worker(layout):
+    global _layout
+    _layout = layout
+
+def run_task(task):
+    kind, start, end = task
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            # A lost chunk is reloaded from scratch anyway
+            cur.execute("SET synchronous_commit = off")
+            loaded = LOADERS[kind](cur, _layout, start, end)
+        conn.commit()
+    finally:
+        conn.close()
+    return loaded
+
+FINISH_STEPS = {
+    'rebuild': [
+        ("Profiles", "SELECT rebuild_profile_totals()"),
+        ("Activity stats", "SELECT rebuild_activity_stats()"),
+        ("Attendance periods", "SELECT rebuild_attendance_periods()"),
+        ("Allocation rollup", "SELECT rebuild_project_allocation_daily()"),
+        ("Budget counters", "SELECT reconcile_budget_counters()")
+    ],
+    'always': [
+        # Nothing but the API's seat claim maintains registered_count
+        ("Seat counts", """
+            UPDATE activities a SET
+                registered_count = c.registered,
+                capacity = CASE WHEN a.capacity < c.registered THEN c.registered ELSE a.capacity END
+            FROM (
+                SELECT activity_id, COUNT(*) FILTER (WHERE status NOT IN ('Waitlisted', 'Rejected')) AS registered
+                FROM attendances
+                GROUP BY activity_id
+            ) c
+            WHERE c.activity_id = a.id AND a.registered_count <> c.registered
+        """),
+        ("Fundings", """
+            UPDATE project_company_fundings
+            SET max_budget = GREATEST(CEIL(allocated_budget * 1.5 / 1000) * 1000, 5000)
+            WHERE max_budget = %(open_budget)s
+        """),
+        ("Partnerships", """
+            UPDATE company_partnerships
+            SET budget_committed = GREATEST(CEIL(budget_allocated * 1.5 / 1000) * 1000, 20000)
+            WHERE budget_committed = %(open_budget)s
+        """),
+        ("Planner statistics", "ANALYZE")
+    ]
+}
+
+def run_phase(pool, tasks, triggers_enabled):
+    """Yield the row counts of each task as it finishes"""
+    serial = [t for t in tasks if triggers_enabled and t[0] in SERIAL_WITH_TRIGGERS]
+    parallel = [t for t in tasks if t not in serial]
+    pending = pool.imap_unordered(run_task, parallel)
+    # Serial tasks still overlap the parallel ones (the ledger), just never each other
+    for task in serial:
+        yield pool.apply(run_task, (task,))
+    yield from pending
+
+def finish(rebuild):
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    steps = (FINISH_STEPS['rebuild'] if rebuild else []) + FINISH_STEPS['always']
+    with conn.cursor() as cur:
+        for name, sql in steps:
+            started = time.perf_counter()
+            cur.execute(sql, {'open_budget': OPEN_BUDGET})
+            print(f"   ✅ {name} ({time.perf_counter() - started:.1f}s)")
+    conn.close()
+
+def set_triggers(enabled):
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for table in TRIGGER_TABLES:
+            cur.execute(f"ALTER TABLE {table} {'ENABLE' if enabled else 'DISABLE'} TRIGGER USER")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a synthetic, referentially consistent Volo dataset with COPY")
+    parser.add_argument('--volunteers', type=int, default=100000)
+    parser.add_argument('--regions', type=int, default=20)
+    parser.add_argument('--attendances-per-volunteer', type=int, default=4, help="Average sign-ups per volunteer")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--anchor', help="ISO date the data is generated around (default: today, UTC); pass it to reproduce a dataset on another day")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Rows (or volunteers, for participation) per COPY transaction")
+    parser.add_argument('--disable-triggers', action='store_true', help="Skip per-row triggers during the load and rebuild aggregates once at the end")
+    args = parser.parse_args()
+
+    if args.anchor:
+        anchor = datetime.fromisoformat(args.anchor)
+        anchor = anchor if anchor.tzinfo else anchor.replace(tzinfo=timezone.utc)
+    else:
+        anchor = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    layout = Layout(args.volunteers, args.regions, args.attendances_per_volunteer, args.seed, anchor, args.chunk_size)
+
+    print("🏭 Generating synthetic Volo data")
+    print("=" * 60)
+    print(f"Seed {args.seed}, anchor {anchor.date()}, {args.workers} workers, chunks of {args.chunk_size:,}")
+    print(f"{layout.regions} regions, {layout.ngos:,} NGOs, {layout.nbes:,} NBEs, {layout.companies:,} companies")
+    print(f"{layout.volunteers:,} volunteers, {layout.projects:,} projects, {layout.activities:,} activities")
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM regions WHERE id = %s", (str(layout.id('region', 0)),))
+        already_loaded = cur.fetchone() is not None
+    conn.close()
+    if already_loaded:
+        print(f"❌ Seed {args.seed} is already loaded in this database; use another --seed or a fresh database")
+        sys.exit(1)
+
+    if args.disable_triggers:
+        set_triggers(enabled=False)
+        print(f"⏸️  Triggers disabled on {', '.join(TRIGGER_TABLES)}")
+
+    totals = {}
+    started = time.perf_counter()
+    try:
+        with Pool(args.workers, initializer=_init_worker, initargs=(layout,)) as pool:
+            for name, tasks in phases(layout):
+                print(f"\n📦 {name} ({len(tasks)} chunks)")
+                phase_started = time.perf_counter()
+                rows = 0
+                for loaded in run_phase(pool, tasks, triggers_enabled=not args.disable_triggers):
+                    for table, count in loaded.items():
+                        totals[table] = totals.get(table, 0) + count
+                        rows += count
+                elapsed = time.perf_counter() - phase_started
+                print(f"   ✅ {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    finally:
+        if args.disable_triggers:
+            set_triggers(enabled=True)
+            print("▶️  Triggers re-enabled")
+
+    print("\n🔧 Finishing" + (" and rebuilding aggregates" if args.disable_triggers else ""))
+    finish(rebuild=args.disable_triggers)
+
+    elapsed = time.perf_counter() - started
+    total_rows = sum(totals.values())
+    print("\n" + "=" * 60)
+    for table, count in totals.items():
+        print(f"{table:<28} {count:>14,}")
+    print(f"{'total':<28} {total_rows:>14,}")
+    print(f"\n🎉 Loaded {total_rows:,} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
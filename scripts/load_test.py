@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Volo Load Test
+Replays the event-day workload from the architecture steps against a running API with
+an asyncio httpx load generator: signup storm, check-in and check-out bursts, mass
+verification, the end-of-event allocation wave and dashboard polling
+
+Each run seeds a fresh event (Faker volunteers, an NGO, two projects, activities) at
+LOAD_VOLUNTEERS scale, reports throughput and p50/p95/p99 per scenario, and can save
+the results as a JSON baseline or compare against one to catch regressions.
+
+Run the API with RATE_LIMIT_ENABLED=false, or the verification and allocation waves
+will mostly measure 429s: the per-device X-API-Key headers are ignored unless listed in
+RATE_LIMIT_API_KEYS, so every simulated phone shares one client bucket.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import platform
+import subprocess
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_DOWN
+
+import httpx
+import psycopg2
+from faker import Faker
+from psycopg2.extras import execute_values
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+VOLUNTEERS = int(os.getenv('LOAD_VOLUNTEERS', '2000'))
+ACTIVITIES = int(os.getenv('LOAD_ACTIVITIES', '20'))
+CONCURRENCY = int(os.getenv('LOAD_CONCURRENCY', '200'))
+POLL_SECONDS = float(os.getenv('LOAD_POLL_SECONDS', '30'))
+SEED = int(os.getenv('LOAD_SEED', '42'))
+# Comma-separated subset of scenarios to time (all by default; earlier steps still run to set up later ones)
+SCENARIOS = [s for s in os.getenv('LOAD_SCENARIOS', '').split(',') if s]
+SAVE_BASELINE = os.getenv('LOAD_SAVE_BASELINE')
+COMPARE_BASELINE = os.getenv('LOAD_COMPARE_BASELINE')
+# A scenario regresses when p95 grows, or throughput drops, by more than this percentage
+MAX_REGRESSION_PCT = float(os.getenv('LOAD_MAX_REGRESSION_PCT', '20'))
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class ScenarioResult:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.statuses = {}
+        self.elapsed = 0.0
+
+    def record(self, status, latency_ms):
+        self.latencies.append(latency_ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        errors = sum(count for status, count in self.statuses.items() if status >= 400)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_rps": round(len(latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0
+        }
+
+class LoadGenerator:
+    def __init__(self, client, concurrency):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(self, result, method, path, device, payload=None):
+        """
+        One request as sent from `device`; returns the response
+        Each device sends its own X-API-Key, but the API only gives keys listed in
+        RATE_LIMIT_API_KEYS a bucket of their own; otherwise all devices share this
+        machine's address bucket
+        """
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, path, json=payload, headers={"X-API-Key": device})
+                status = response.status_code
+            except httpx.HTTPError:
+                response, status = None, 599
+            result.record(status, (time.perf_counter() - started) * 1000)
+            return response
+
+    async def run(self, name, calls):
+        """Fire every call concurrently (bounded by the semaphore) and time the whole wave"""
+        result = ScenarioResult(name)
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(call(result) for call in calls))
+        result.elapsed = time.perf_counter() - started
+        return result, responses
+
+def seed(conn, fake):
+    """One event: an NGO with two projects in a region, ACTIVITIES activities today and VOLUNTEERS volunteers"""
+    run_id = uuid.uuid4().hex[:8]
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM regions ORDER BY name LIMIT 1")
+        row = cur.fetchone()
+        if row is None:
+            print("❌ No regions found in database")
+            sys.exit(1)
+        region_id = row[0]
+
+        ngo_id = str(uuid.uuid4())
+        cur.execute("INSERT INTO organizations (id, type, name) VALUES (%s, 'NGO', %s)",
+                    (ngo_id, f"{fake.company()} Foundation"))
+        project_ids = [str(uuid.uuid4()) for _ in range(2)]
+        execute_values(cur, "INSERT INTO projects (id, ngo_id, region_id, name, description) VALUES %s", [
+            (pid, ngo_id, region_id, f"{fake.catch_phrase()} ({run_id})", fake.paragraph())
+            for pid in project_ids
+        ])
+
+        capacity = math.ceil(VOLUNTEERS / ACTIVITIES)
+        starts_at = datetime.now(timezone.utc) - timedelta(hours=4)
+        activity_ids = [str(uuid.uuid4()) for _ in range(ACTIVITIES)]
+        execute_values(cur, """
+            INSERT INTO activities (id, project_id, starts_at, ends_at, location, capacity) VALUES %s
+        """, [
+            (aid, project_ids[0], starts_at, starts_at + timedelta(hours=3), fake.street_address(), capacity)
+            for aid in activity_ids
+        ])
+
+        volunteers = [
+            (str(uuid.uuid4()), fake.name(), f"load.{run_id}.{i}.{fake.user_name()}@example.com",
+             fake.random_int(min=16, max=75), region_id)
+            for i in range(VOLUNTEERS)
+        ]
+        execute_values(cur, "INSERT INTO volunteers (id, name, email, age, region_id) VALUES %s",
+                       volunteers, page_size=1000)
+    conn.commit()
+    return {
+        "ngo_id": ngo_id,
+        "project_ids": project_ids,
+        "activity_ids": activity_ids,
+        "volunteer_ids": [v[0] for v in volunteers]
+    }
+
+def credits_for(conn, attendance_ids):
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT source_attendance_id::text, id::text, volunteer_id::text, amount
+            FROM volo_credits WHERE source_attendance_id = ANY(%s::uuid[])
+        """, (attendance_ids,))
+        return cur.fetchall()
+
+async def run_scenarios(conn, event, rng):
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    results = []
+    async with httpx.AsyncClient(base_url=API_BASE_URL, limits=limits, timeout=60.0) as client:
+        gen = LoadGenerator(client, CONCURRENCY)
+        ngo_device = f"ngo-{event['ngo_id']}"
+
+        # Step 1: every volunteer signs up for an activity at once
+        signups = [(vid, event['activity_ids'][i % ACTIVITIES]) for i, vid in enumerate(event['volunteer_ids'])]
+        result, responses = await gen.run("signup_storm", [
+            lambda r, vid=vid, aid=aid: gen.request(r, 'POST', '/api/v1/attendances/', f"vol-{vid}",
+                                                    {"volunteer_id": vid, "activity_id": aid})
+            for vid, aid in signups
+        ])
+        results.append(result)
+        attendances = [
+            (resp.json()['id'], vid) for resp, (vid, _) in zip(responses, signups)
+            if resp is not None and resp.status_code == 200 and resp.json()['status'] != 'Waitlisted'
+        ]
+
+        # Step 2: doors open, everyone scans in within minutes; then everyone scans out
+        for name, action in (("check_in_burst", "check-in"), ("check_out_burst", "check-out")):
+            result, responses = await gen.run(name, [
+                lambda r, aid=aid, vid=vid, action=action: gen.request(
+                    r, 'POST', f'/api/v1/attendances/{aid}/{action}', f"vol-{vid}"
+                )
+                for aid, vid in attendances
+            ])
+            results.append(result)
+            attendances = [a for a, resp in zip(attendances, responses) if resp is not None and resp.status_code == 200]
+
+        # Step 3: the NGO verifies the whole roster at the end of the event
+        result, responses = await gen.run("mass_verification", [
+            lambda r, aid=aid: gen.request(r, 'POST', f'/api/v1/attendances/{aid}/verify', ngo_device,
+                                           {"verified_by_user_id": event['ngo_id']})
+            for aid, _ in attendances
+        ])
+        results.append(result)
+        verified = [aid for (aid, _), resp in zip(attendances, responses) if resp is not None and resp.status_code == 200]
+
+        # Step 4: every volunteer splits their credit 50/50 (attended project, then a free choice)
+        calls = []
+        for _, credit_id, vid, amount in credits_for(conn, verified):
+            half = (Decimal(amount) / 2).quantize(Decimal("0.01"), rounding=ROUND_DOWN)
+            if half <= 0:
+                continue
+            free_choice = rng.choice(event['project_ids'])
+            for kind, project_id in (("MANDATORY_50", event['project_ids'][0]), ("FREE_CHOICE_50", free_choice)):
+                calls.append(lambda r, vid=vid, project_id=project_id, credit_id=credit_id, kind=kind, half=half:
+                             gen.request(r, 'POST', '/api/v1/allocations/', f"vol-{vid}", {
+                                 "volunteer_id": vid, "project_id": project_id, "source_credit_id": credit_id,
+                                 "amount": str(half), "kind": kind
+                             }))
+        result, _ = await gen.run("allocation_wave", calls)
+        results.append(result)
+
+        # Step 5/6: volunteers keep refreshing their dashboard and inbox badge for POLL_SECONDS
+        result = ScenarioResult("dashboard_polling")
+        deadline = time.perf_counter() + POLL_SECONDS
+        volunteer_ids = event['volunteer_ids']
+
+        async def poller():
+            while time.perf_counter() < deadline:
+                vid = rng.choice(volunteer_ids)
+                await gen.request(result, 'GET', f'/api/v1/volunteers/{vid}/dashboard', f"vol-{vid}")
+                await gen.request(result, 'GET', f'/api/v1/notifications/volunteer/{vid}/unread-count', f"vol-{vid}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(poller() for _ in range(CONCURRENCY)))
+        result.elapsed = time.perf_counter() - started
+        results.append(result)
+
+    return [r for r in results if not SCENARIOS or r.name in SCENARIOS]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline, scenarios):
+    """Regressions of p95 latency and throughput against a saved baseline"""
+    regressions = []
+    for name, current in scenarios.items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        p95_change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+        rps_change = (current['throughput_rps'] - previous['throughput_rps']) / previous['throughput_rps'] * 100 \
+            if previous['throughput_rps'] else 0
+        print(f"   {name:<20} p95 {previous['p95_ms']:8.1f} → {current['p95_ms']:8.1f} ms ({p95_change:+.0f}%)   "
+              f"{previous['throughput_rps']:7.1f} → {current['throughput_rps']:7.1f} req/s ({rps_change:+.0f}%)")
+        if p95_change > MAX_REGRESSION_PCT:
+            regressions.append(f"{name}: p95 up {p95_change:.0f}%")
+        if -rps_change > MAX_REGRESSION_PCT:
+            regressions.append(f"{name}: throughput down {-rps_change:.0f}%")
+    return regressions
+
+def main():
+    print(f"🚀 Load test: {VOLUNTEERS} volunteers over {ACTIVITIES} activities, concurrency {CONCURRENCY}")
+    print("=" * 60)
+
+    fake = Faker()
+    Faker.seed(SEED)
+    rng = random.Random(SEED)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    event = seed(conn, fake)
+    print(f"✅ Seeded NGO {event['ngo_id']} with {ACTIVITIES} activities and {VOLUNTEERS} volunteers")
+
+    results = asyncio.run(run_scenarios(conn, event, rng))
+    conn.close()
+
+    scenarios = {}
+    print()
+    print(f"{'scenario':<20} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for result in results:
+        s = result.summary()
+        scenarios[result.name] = s
+        print(f"{result.name:<20} {s['requests']:>8} {s['errors']:>6} {s['throughput_rps']:>8.1f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}")
+        if s['errors']:
+            print(f"   statuses: {s['statuses']}")
+
+    ok = all(s['errors'] == 0 for s in scenarios.values())
+    if not ok:
+        print("\n❌ Some requests failed")
+
+    report = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "host": platform.node(),
+        "config": {"volunteers": VOLUNTEERS, "activities": ACTIVITIES, "concurrency": CONCURRENCY,
+                   "poll_seconds": POLL_SECONDS, "seed": SEED},
+        "scenarios": scenarios
+    }
+
+    if COMPARE_BASELINE:
+        with open(COMPARE_BASELINE) as f:
+            baseline = json.load(f)
+        print(f"\n📊 Compared with {COMPARE_BASELINE} ({baseline.get('git_commit') or 'unknown commit'})")
+        if baseline.get('config') != report['config']:
+            print("   ⚠️  Baseline was recorded with a different configuration")
+        regressions = compare(baseline, scenarios)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        ok = ok and not regressions
+
+    if SAVE_BASELINE:
+        os.makedirs(os.path.dirname(os.path.abspath(SAVE_BASELINE)), exist_ok=True)
+        with open(SAVE_BASELINE, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved to {SAVE_BASELINE}")
+
+    if ok:
+        print("\n🎉 Load test finished without errors or regressions")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
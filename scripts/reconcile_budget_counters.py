@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Volo Budget Counter Reconciliation
+Recomputes project_company_fundings.allocated_budget and
+company_partnerships.budget_allocated from the allocations table and repairs drift
+
+The counters are maintained by database triggers; this command catches drift from
+bulk loads with triggers disabled or manual edits. Each table is split into
+primary-key chunks that are reconciled in parallel, one connection per worker.
+Rows in a chunk are locked before summing, so allocations committed concurrently
+are never lost.
+
+Usage:
+    python scripts/reconcile_budget_counters.py [--chunk-size 1000] [--workers 4] [--dry-run]
+"""
+
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psycopg2
+import psycopg2.extras
+
+# Chunk bounds and ids round-trip as uuid.UUID
+psycopg2.extras.register_uuid()
+
+# Configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+
+# Each target: table, counter column, and the SUM that the counter must equal
+TARGETS = {
+    'project_company_fundings': {
+        'counter': 'allocated_budget',
+        'actual': """
+            SELECT t.id, COALESCE(SUM(a.amount), 0) AS actual
+            FROM project_company_fundings t
+            LEFT JOIN allocations a
+                   ON a.project_id = t.project_id AND a.company_id = t.company_id
+            WHERE t.id = ANY(%(ids)s)
+            GROUP BY t.id
+        """
+    },
+    'company_partnerships': {
+        'counter': 'budget_allocated',
+        'actual': """
+            SELECT t.id, COALESCE(SUM(a.amount), 0) AS actual
+            FROM company_partnerships t
+            LEFT JOIN projects p ON p.ngo_id = t.organization_id
+            LEFT JOIN allocations a
+                   ON a.project_id = p.id AND a.company_id = t.company_id
+            WHERE t.id = ANY(%(ids)s)
+            GROUP BY t.id
+        """
+    }
+}
+
+def chunk_bounds(conn, table, chunk_size):
+    """First id of every chunk, in primary-key order"""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT id FROM (
+                SELECT id, row_number() OVER (ORDER BY id) AS rn FROM {table}
+            ) numbered
+            WHERE (rn - 1) %% %s = 0
+            ORDER BY id
+        """, (chunk_size,))
+        return [row[0] for row in cur.fetchall()]
+
+def reconcile_chunk(table, lower, upper, dry_run):
+    """Lock one chunk, compare counters with the real sums and fix mismatches"""
+    target = TARGETS[table]
+    counter = target['counter']
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            # Lock first: a concurrent allocation then either committed before our SUM
+            # (and is counted) or waits on the lock and applies its delta after us
+            cur.execute(f"""
+                SELECT id, {counter} FROM {table}
+                WHERE id >= %s AND (%s::uuid IS NULL OR id < %s::uuid)
+                ORDER BY id
+                FOR UPDATE
+            """, (lower, upper, upper))
+            recorded = dict(cur.fetchall())
+            if not recorded:
+                conn.rollback()
+                return table, 0, []
+
+            cur.execute(target['actual'], {'ids': list(recorded)})
+            drift = [
+                (row_id, recorded[row_id], actual)
+                for row_id, actual in cur.fetchall()
+                if recorded[row_id] != actual
+            ]
+
+            if drift and not dry_run:
+                cur.executemany(
+                    f"UPDATE {table} SET {counter} = %s WHERE id = %s",
+                    [(actual, row_id) for row_id, _, actual in drift]
+                )
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        return table, len(recorded), drift
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile denormalized budget counters with allocations")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--dry-run', action='store_true', help="Report drift without repairing it")
+    args = parser.parse_args()
+
+    print("🔧 Reconciling budget counters" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    jobs = []
+    for table in TARGETS:
+        bounds = chunk_bounds(conn, table, args.chunk_size)
+        for i, lower in enumerate(bounds):
+            upper = bounds[i + 1] if i + 1 < len(bounds) else None
+            jobs.append((table, lower, upper))
+    conn.close()
+
+    scanned = {table: 0 for table in TARGETS}
+    repaired = {table: 0 for table in TARGETS}
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(reconcile_chunk, table, lower, upper, args.dry_run) for table, lower, upper in jobs]
+        for future in as_completed(futures):
+            try:
+                table, count, drift = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"❌ Chunk failed: {e}")
+                continue
+            scanned[table] += count
+            repaired[table] += len(drift)
+            for row_id, was, actual in drift:
+                print(f"   {table} {row_id}: {was} -> {actual}")
+
+    for table in TARGETS:
+        verb = "drifted" if args.dry_run else "repaired"
+        print(f"✅ {table}: {scanned[table]} rows scanned, {repaired[table]} {verb}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Volo Idempotency Test Suite
+Fires concurrent duplicates of mutating requests and checks that each one takes
+effect exactly once: one credit per verified attendance, one allocation per key
+"""
+
+import os
+import sys
+import uuid
+import threading
+import requests
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Configuration
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+DUPLICATES = int(os.getenv('TEST_DUPLICATES', '20'))
+
+def concurrent_requests(method, endpoint, payload, headers=None, count=DUPLICATES):
+    """Send `count` identical requests released at the same moment, return the responses"""
+    barrier = threading.Barrier(count)
+
+    def send():
+        barrier.wait()
+        return requests.request(method, f"{API_BASE_URL}{endpoint}", json=payload, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [pool.submit(send) for _ in range(count)]
+        return [future.result() for future in futures]
+
+def api(method, endpoint, payload=None, headers=None):
+    response = requests.request(method, f"{API_BASE_URL}{endpoint}", json=payload, headers=headers)
+    if response.status_code not in (200, 201):
+        raise RuntimeError(f"{method} {endpoint} failed: {response.status_code} {response.text}")
+    return response.json()
+
+def create_completed_attendance():
+    """Volunteer, activity and a checked-in/checked-out attendance ready for verification"""
+    region_id = api('GET', '/api/v1/regions/')[0]['id']
+    project = api('GET', '/api/v1/projects/')
+    project = (project['projects'] if 'projects' in project else project)[0]
+    volunteer = api('POST', '/api/v1/volunteers/', {
+        "name": "Idempotency Tester",
+        "email": f"idempotency.{uuid.uuid4().hex[:8]}@example.com",
+        "age": 30,
+        "region_id": region_id
+    })
+    starts_at = datetime.now() - timedelta(hours=3)
+    activity = api('POST', '/api/v1/activities/', {
+        "project_id": project['id'],
+        "starts_at": starts_at.isoformat(),
+        "ends_at": (starts_at + timedelta(hours=2)).isoformat(),
+        "location": "Idempotency test venue",
+        "capacity": 10
+    })
+    attendance = api('POST', '/api/v1/attendances/', {
+        "volunteer_id": volunteer['id'],
+        "activity_id": activity['id']
+    })
+    api('POST', f"/api/v1/attendances/{attendance['id']}/check-in")
+    api('POST', f"/api/v1/attendances/{attendance['id']}/check-out")
+    return volunteer, project, attendance
+
+def count_rows(conn, query, params):
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        return cur.fetchone()[0]
+
+def test_concurrent_verify_with_key(conn, verifier_id):
+    """Duplicates sharing an Idempotency-Key: one execution, the rest replay or wait"""
+    print("\n🧪 Concurrent verify with the same Idempotency-Key")
+    volunteer, project, attendance = create_completed_attendance()
+    endpoint = f"/api/v1/attendances/{attendance['id']}/verify"
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    responses = concurrent_requests('POST', endpoint, {"verified_by_user_id": verifier_id}, headers)
+    statuses = [r.status_code for r in responses]
+    executed = [r for r in responses if r.status_code == 200 and r.headers.get('Idempotent-Replayed') != 'true']
+    replayed = [r for r in responses if r.headers.get('Idempotent-Replayed') == 'true']
+    print(f"   statuses: {sorted(statuses)}")
+
+    retry = requests.post(f"{API_BASE_URL}{endpoint}", json={"verified_by_user_id": verifier_id}, headers=headers)
+    credits = count_rows(conn, "SELECT COUNT(*) FROM volo_credits WHERE source_attendance_id = %s", (attendance['id'],))
+
+    ok = True
+    if len(executed) != 1:
+        print(f"❌ Expected exactly one executed request, got {len(executed)}")
+        ok = False
+    if any(s not in (200, 409) for s in statuses):
+        print("❌ Unexpected status among duplicates")
+        ok = False
+    if retry.headers.get('Idempotent-Replayed') != 'true' or (executed and retry.json() != executed[0].json()):
+        print("❌ Retry after completion did not replay the original response")
+        ok = False
+    if credits != 1:
+        print(f"❌ Expected 1 credit, found {credits}")
+        ok = False
+    if ok:
+        print(f"✅ 1 executed, {len(replayed)} replayed, {statuses.count(409)} told to retry; 1 credit minted")
+    return ok, volunteer, project, attendance
+
+def test_concurrent_verify_without_key(conn, verifier_id):
+    """No key: the row lock and the Verified check still allow only one credit"""
+    print("\n🧪 Concurrent verify without an Idempotency-Key")
+    _, _, attendance = create_completed_attendance()
+    endpoint = f"/api/v1/attendances/{attendance['id']}/verify"
+
+    responses = concurrent_requests('POST', endpoint, {"verified_by_user_id": verifier_id})
+    statuses = [r.status_code for r in responses]
+    credits = count_rows(conn, "SELECT COUNT(*) FROM volo_credits WHERE source_attendance_id = %s", (attendance['id'],))
+    print(f"   statuses: {sorted(statuses)}")
+
+    if statuses.count(200) == 1 and statuses.count(400) == len(statuses) - 1 and credits == 1:
+        print("✅ One verification succeeded, the rest were refused as already verified")
+        return True
+    print(f"❌ Expected one 200 and {len(statuses) - 1} 400s with 1 credit, found {credits} credits")
+    return False
+
+def test_key_reuse_with_different_body(volunteer, project, attendance):
+    """The same key with a different body is rejected instead of replayed"""
+    print("\n🧪 Idempotency-Key reused with a different body")
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = requests.post(f"{API_BASE_URL}/api/v1/notifications/", json={
+        "volunteer_id": volunteer['id'], "message": "first"
+    }, headers=headers)
+    second = requests.post(f"{API_BASE_URL}/api/v1/notifications/", json={
+        "volunteer_id": volunteer['id'], "message": "second"
+    }, headers=headers)
+    if first.status_code == 200 and second.status_code == 422:
+        print("✅ Reused key with a different body rejected with 422")
+        return True
+    print(f"❌ Got {first.status_code} then {second.status_code}")
+    return False
+
+def test_concurrent_allocation_with_key(conn, volunteer, project, attendance):
+    """Duplicate allocations sharing a key create a single allocation"""
+    print("\n🧪 Concurrent allocation with the same Idempotency-Key")
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, amount FROM volo_credits WHERE source_attendance_id = %s", (attendance['id'],))
+        credit_id, amount = cur.fetchone()
+
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    responses = concurrent_requests('POST', '/api/v1/allocations/', {
+        "volunteer_id": volunteer['id'],
+        "project_id": project['id'],
+        "source_credit_id": str(credit_id),
+        "amount": str(amount / 2),
+        "kind": "MANDATORY_50"
+    }, headers)
+    statuses = [r.status_code for r in responses]
+    allocations = count_rows(conn, "SELECT COUNT(*) FROM allocations WHERE source_credit_id = %s", (credit_id,))
+    print(f"   statuses: {sorted(statuses)}")
+
+    if allocations == 1 and all(s in (200, 409) for s in statuses):
+        print("✅ Exactly one allocation created")
+        return True
+    print(f"❌ Expected 1 allocation, found {allocations}")
+    return False
+
+def main():
+    print(f"🚀 Idempotency tests ({DUPLICATES} concurrent duplicates per case)")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
+    verifier_id = api('GET', '/api/v1/organizations/')[0]['id']
+
+    results = []
+    ok, volunteer, project, attendance = test_concurrent_verify_with_key(conn, verifier_id)
+    results.append(ok)
+    results.append(test_concurrent_verify_without_key(conn, verifier_id))
+    results.append(test_key_reuse_with_different_body(volunteer, project, attendance))
+    results.append(test_concurrent_allocation_with_key(conn, volunteer, project, attendance))
+    conn.close()
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print(f"🎉 All {len(results)} idempotency tests passed")
+    else:
+        print(f"❌ {results.count(False)} of {len(results)} idempotency tests failed")
+    sys.exit(0 if all(results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Volo Money Aggregate Property Test
+Writes random batches of credit and allocation amounts for a throwaway volunteer and
+project, then checks every aggregate the database keeps over them (SUM, the profile
+totals and the allocation rollup) against the exact Decimal sum computed in Python
+
+Amounts are drawn from cent-heavy distributions (0.01 steps, values like 0.1 and 0.33
+that have no exact binary float) so a float or rounding step anywhere shows up as a
+cent of drift. Each trial runs in its own transaction and is rolled back.
+"""
+
+import os
+import sys
+import uuid
+import random
+from decimal import Decimal
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# Configuration
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': os.getenv('DB_PORT', '5432'),
+    'database': os.getenv('DB_NAME', 'volo_db'),
+    'user': os.getenv('DB_USER', 'volo_user'),
+    'password': os.getenv('DB_PASSWORD', 'volo_password')
+}
+TRIALS = int(os.getenv('TEST_TRIALS', '200'))
+SEED = int(os.getenv('TEST_SEED', '42'))
+MAX_ROWS = int(os.getenv('TEST_MAX_ROWS', '100'))
+
+CENT = Decimal("0.01")
+# Binary floats can't represent these exactly; sums of many of them drift first
+AWKWARD_AMOUNTS = [Decimal(v) for v in ("0.01", "0.10", "0.20", "0.30", "0.33", "0.67", "1.10", "2.68")]
+
+def random_amount(rng):
+    """A positive amount in whole cents, under 10,000 so a trial fits DECIMAL(10,2) totals"""
+    shape = rng.random()
+    if shape < 0.3:
+        return rng.choice(AWKWARD_AMOUNTS)
+    if shape < 0.6:
+        return rng.randint(1, 99) * CENT
+    if shape < 0.9:
+        return rng.randint(100, 10000) * CENT
+    return rng.randint(10000, 999999) * CENT
+
+def fixtures(conn):
+    """(region_id, ngo_id) to hang the throwaway rows on"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM regions ORDER BY name LIMIT 1")
+        region = cur.fetchone()
+        cur.execute("SELECT id FROM organizations WHERE type = 'NGO' ORDER BY name LIMIT 1")
+        ngo = cur.fetchone()
+    conn.rollback()
+    if region is None or ngo is None:
+        print("❌ No regions or NGOs found; load sample data first")
+        sys.exit(1)
+    return region[0], ngo[0]
+
+def run_trial(conn, trial_seed, region_id, ngo_id):
+    """Write one random batch and return the aggregates that disagree with Python's sums"""
+    rng = random.Random(trial_seed)
+    credits = [random_amount(rng) for _ in range(rng.randint(1, MAX_ROWS))]
+    allocations = [(random_amount(rng), rng.choice(['MANDATORY_50', 'FREE_CHOICE_50']))
+                   for _ in range(rng.randint(1, MAX_ROWS))]
+    expected_by_kind = {}
+    for amount, kind in allocations:
+        expected_by_kind[kind] = expected_by_kind.get(kind, Decimal("0.00")) + amount
+    expected = {
+        'credits SUM': sum(credits, Decimal("0.00")),
+        'profile total_credits_earned': sum(credits, Decimal("0.00")),
+        'allocations SUM': sum((a for a, _ in allocations), Decimal("0.00")),
+        'profile total_credits_allocated': sum((a for a, _ in allocations), Decimal("0.00")),
+        'rollup total_amount': sum((a for a, _ in allocations), Decimal("0.00"))
+    }
+    for kind, total in expected_by_kind.items():
+        expected[f'rollup total_amount ({kind})'] = total
+
+    volunteer_id, project_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO volunteers (id, name, email, age, region_id) VALUES (%s, %s, %s, 30, %s)",
+            (volunteer_id, "Money Property Tester", f"money.{volunteer_id[:8]}@example.com", region_id)
+        )
+        cur.execute(
+            "INSERT INTO projects (id, ngo_id, region_id, name) VALUES (%s, %s, %s, %s)",
+            (project_id, ngo_id, region_id, f"Money Property Project {trial_seed}")
+        )
+        execute_values(cur, "INSERT INTO volo_credits (volunteer_id, amount) VALUES %s",
+                       [(volunteer_id, amount) for amount in credits])
+        execute_values(cur, "INSERT INTO allocations (volunteer_id, project_id, amount, kind) VALUES %s",
+                       [(volunteer_id, project_id, amount, kind) for amount, kind in allocations])
+
+        actual = {}
+        cur.execute("SELECT SUM(amount) FROM volo_credits WHERE volunteer_id = %s", (volunteer_id,))
+        actual['credits SUM'] = cur.fetchone()[0]
+        cur.execute("SELECT SUM(amount) FROM allocations WHERE volunteer_id = %s", (volunteer_id,))
+        actual['allocations SUM'] = cur.fetchone()[0]
+        cur.execute("SELECT total_credits_earned, total_credits_allocated FROM profiles WHERE volunteer_id = %s",
+                    (volunteer_id,))
+        actual['profile total_credits_earned'], actual['profile total_credits_allocated'] = cur.fetchone()
+        cur.execute("SELECT kind, SUM(total_amount) FROM project_allocation_daily WHERE project_id = %s GROUP BY kind",
+                    (project_id,))
+        for kind, total in cur.fetchall():
+            actual[f'rollup total_amount ({kind})'] = total
+        actual['rollup total_amount'] = sum(
+            (v for k, v in actual.items() if k.startswith('rollup total_amount (')), Decimal("0.00")
+        )
+    conn.rollback()
+
+    return [(name, value, actual.get(name)) for name, value in expected.items() if actual.get(name) != value]
+
+def main():
+    print(f"🚀 Money aggregate property test: {TRIALS} trials, up to {MAX_ROWS} rows per table, seed {SEED}")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    region_id, ngo_id = fixtures(conn)
+
+    failed = 0
+    for trial in range(TRIALS):
+        trial_seed = SEED + trial
+        mismatches = run_trial(conn, trial_seed, region_id, ngo_id)
+        if mismatches:
+            failed += 1
+            print(f"❌ Trial {trial} (reproduce with TEST_SEED={trial_seed} TEST_TRIALS=1):")
+            for name, expected, actual in mismatches:
+                print(f"   {name}: expected {expected}, database has {actual}")
+    conn.close()
+
+    print("\n" + "=" * 60)
+    if failed:
+        print(f"❌ {failed} of {TRIALS} trials had aggregates off from the exact Decimal sums")
+    else:
+        print(f"🎉 All {TRIALS} trials matched the exact Decimal sums to the cent")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
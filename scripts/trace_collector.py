@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Volo Trace Collector Stand-in
+Receives span batches POSTed by the API (TRACE_COLLECTOR_URL=http://localhost:4318/v1/traces),
+appends them to a JSON lines file and prints each finished request as a span tree, slowest
+steps first, so a slow allocation shows where its time went
+"""
+
+import os
+import json
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Configuration
+PORT = int(os.getenv('COLLECTOR_PORT', '4318'))
+OUTPUT_PATH = os.getenv('COLLECTOR_OUTPUT', 'collected_traces.jsonl')
+# Only print traces whose root span took at least this long
+MIN_PRINT_MS = float(os.getenv('COLLECTOR_MIN_PRINT_MS', '0'))
+
+# trace_id -> spans received so far (children finish, and arrive, before their root)
+pending = defaultdict(list)
+
+def print_tree(spans):
+    children = defaultdict(list)
+    ids = {s['span_id'] for s in spans}
+    roots = []
+    for s in spans:
+        if s['parent_span_id'] in ids:
+            children[s['parent_span_id']].append(s)
+        else:
+            roots.append(s)
+
+    def walk(s, depth):
+        statement = s['attributes'].get('db.statement')
+        label = ' '.join(statement.split())[:90] if statement else s['name']
+        print(f"{'  ' * depth}{s['duration_ms']:9.2f} ms  {label}")
+        for child in sorted(children[s['span_id']], key=lambda c: -c['duration_ms']):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    print()
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        spans = json.loads(body).get('spans', [])
+        with open(OUTPUT_PATH, 'a') as f:
+            for s in spans:
+                f.write(json.dumps(s) + "\n")
+
+        for s in spans:
+            pending[s['trace_id']].append(s)
+            # A root span (no parent in this process) closes its trace
+            if s['parent_span_id'] is None or s['name'].split(' ')[0] in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE'):
+                trace = pending.pop(s['trace_id'])
+                if s['duration_ms'] >= MIN_PRINT_MS:
+                    print(f"🔎 trace {s['trace_id']}")
+                    print_tree(trace)
+
+        self.send_response(202)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    print(f"🚀 Trace collector listening on :{PORT}, writing {OUTPUT_PATH}")
+    HTTPServer(('0.0.0.0', PORT), CollectorHandler).serve_forever()
+
+if __name__ == "__main__":
+    main()